@@ -12,7 +12,9 @@ interface AdPageProps {
 
 async function getAdDetail(external_id: string): Promise<AdDetail> {
   const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/ads/${external_id}`, {
-    cache: 'no-store', // Always fetch fresh data
+    // Matches the API's Cache-Control max-age (AD_CACHE_MAX_AGE); metadata
+    // and page render share one cached response instead of two fetches.
+    next: { revalidate: 300 },
   });
   
   if (!res.ok) {
@@ -1,15 +1,24 @@
 import { MetadataRoute } from 'next';
 
-export default function robots(): MetadataRoute.Robots {
+export default async function robots(): Promise<MetadataRoute.Robots> {
   const baseUrl = process.env.NEXT_PUBLIC_BASE_URL || 'https://tellyads.com';
-  
+  const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+
+  // app/sitemap.ts emits one sitemap per API shard
+  let shardCount = 1;
+  try {
+    const res = await fetch(`${apiUrl}/api/sitemap`, { next: { revalidate: 900 } });
+    if (res.ok) shardCount = Math.max((await res.json()).shards.length, 1);
+  } catch {
+    // Fall back to the first shard
+  }
+
   return {
     rules: {
       userAgent: '*',
       allow: '/',
       disallow: ['/api/', '/admin/'],
     },
-    sitemap: `${baseUrl}/sitemap.xml`,
+    sitemap: Array.from({ length: shardCount }, (_, id) => `${baseUrl}/sitemap/${id}.xml`),
   };
 }
-
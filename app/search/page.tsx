@@ -1,7 +1,7 @@
 import { Metadata } from 'next';
 import AdGrid from '@/components/AdGrid';
 import SearchBar from '@/components/SearchBar';
-import { SearchResult } from '@/lib/types';
+import StreamingSearchResults from '@/components/StreamingSearchResults';
 import { constructMetadata } from '@/lib/seo';
 
 // Force dynamic rendering as search results depend on query params
@@ -20,24 +20,8 @@ export async function generateMetadata({ searchParams }: SearchPageProps): Promi
   });
 }
 
-async function getSearchResults(query: string): Promise<SearchResult[]> {
-  const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/search`, {
-    method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ query, limit: 50 }),
-    cache: 'no-store',
-  });
-  
-  if (!res.ok) {
-    throw new Error('Failed to fetch results');
-  }
-  
-  return res.json();
-}
-
 export default async function SearchPage({ searchParams }: SearchPageProps) {
   const query = searchParams.q || '';
-  const results = query ? await getSearchResults(query) : [];
 
   return (
     <div className="min-h-screen bg-slate-50">
@@ -61,12 +45,10 @@ export default async function SearchPage({ searchParams }: SearchPageProps) {
                 <h1 className="text-2xl font-bold text-slate-800">
                     {query ? `Results for "${query}"` : 'Search Ads'}
                 </h1>
-                <p className="text-slate-500">
-                    {results.length} commercials found
-                </p>
             </div>
 
-            <AdGrid ads={results} />
+            {/* Results stream in from /api/search/stream: keyword hits first, reranked order last */}
+            {query ? <StreamingSearchResults query={query} limit={50} /> : <AdGrid ads={[]} />}
         </main>
     </div>
   );
@@ -1,22 +1,64 @@
 import { MetadataRoute } from 'next';
 
 const BASE_URL = process.env.NEXT_PUBLIC_BASE_URL || 'https://tellyads.com';
+const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+// Matches the API's sitemap Cache-Control max-age
+const REVALIDATE_SECONDS = 900;
 
-export default async function sitemap(): Promise<MetadataRoute.Sitemap> {
-  // In a real app, fetch these from API
-  // const ads = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/api/recent?limit=1000`).then(res => res.json());
-  
-  const routes = [
-    '',
-    '/about',
-    '/how-it-works',
-    '/search',
-  ].map((route) => ({
-    url: `${BASE_URL}${route}`,
-    lastModified: new Date(),
-    changeFrequency: 'daily' as const,
-    priority: route === '' ? 1 : 0.8,
-  }));
-
-  return [...routes];
+interface SitemapIndex {
+  shard_size: number;
+  total: number;
+  shards: { id: number; ad_count: number; last_modified: string }[];
+}
+
+interface SitemapEntry {
+  external_id: string;
+  updated_at: string | null;
+}
+
+const STATIC_ROUTES = ['', '/about', '/how-it-works', '/search'];
+
+async function fetchIndex(): Promise<SitemapIndex | null> {
+  try {
+    const res = await fetch(`${API_URL}/api/sitemap`, { next: { revalidate: REVALIDATE_SECONDS } });
+    return res.ok ? res.json() : null;
+  } catch {
+    return null;
+  }
+}
+
+// One sitemap per API shard (/sitemap/<id>.xml); shard 0 also lists the static pages.
+export async function generateSitemaps() {
+  const index = await fetchIndex();
+  const count = Math.max(index?.shards.length ?? 0, 1);
+  return Array.from({ length: count }, (_, id) => ({ id }));
+}
+
+export default async function sitemap({ id }: { id: number }): Promise<MetadataRoute.Sitemap> {
+  const routes: MetadataRoute.Sitemap =
+    id === 0
+      ? STATIC_ROUTES.map((route) => ({
+          url: `${BASE_URL}${route}`,
+          lastModified: new Date(),
+          changeFrequency: 'daily' as const,
+          priority: route === '' ? 1 : 0.8,
+        }))
+      : [];
+
+  // Shards are keyset scans on the API, cached there and revalidated by ETag
+  const res = await fetch(`${API_URL}/api/sitemap/${id}`, { next: { revalidate: REVALIDATE_SECONDS } }).catch(
+    () => null,
+  );
+  if (!res?.ok) return routes;
+  const ads: SitemapEntry[] = await res.json();
+
+  return [
+    ...routes,
+    ...ads.map((ad) => ({
+      url: `${BASE_URL}/ads/${encodeURIComponent(ad.external_id)}`,
+      lastModified: ad.updated_at ? new Date(ad.updated_at) : undefined,
+      changeFrequency: 'monthly' as const,
+      priority: 0.6,
+    })),
+  ];
 }
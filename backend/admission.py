@@ -0,0 +1,159 @@
+"""
+Load protection for the search endpoints.
+
+- ``SingleFlight`` coalesces identical in-flight searches. When a query is
+  trending, the first request runs the retrieval and every identical request
+  that arrives before it finishes awaits the same result.
+- ``AdmissionController`` caps concurrent retrievals (SEARCH_MAX_CONCURRENCY,
+  sized below the OpenAI/Cohere rate limits and DB_POOL_MAX_SIZE). Excess
+  requests wait in a bounded queue (SEARCH_MAX_QUEUE) for at most
+  SEARCH_QUEUE_TIMEOUT_MS and are then shed with ``Overloaded``, which the API
+  turns into 429 + Retry-After.
+
+Both are process-local and run on the event loop. Only coalesced leaders take
+an admission slot, and result-cache hits take none.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed; ``retry_after`` is in seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _percentile(values: Deque[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(pct * len(ordered)))], 1)
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded, time-limited wait queue."""
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout_ms: int, *, window: int = 512):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_ms = queue_timeout_ms
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._active = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._shed_queue_full = 0
+        self._shed_timeout = 0
+        self._wait_ms: Deque[float] = deque(maxlen=window)
+        # Exponentially weighted service time, used to size Retry-After
+        self._service_ms = 1000.0
+
+    def retry_after(self) -> float:
+        """Rough time for the current backlog to drain, in seconds (at least 1)."""
+        backlog = self._waiting + self._active
+        return max(1.0, backlog * self._service_ms / 1000.0 / self.max_concurrency)
+
+    async def acquire(self) -> Tuple[Callable[[], None], float]:
+        """
+        Take one retrieval slot, waiting in the bounded queue (``Overloaded``
+        when shed). Returns ``(release, queue wait in ms)``. ``release`` is
+        idempotent and must run on the event loop; call it when the work the
+        slot guards has really finished, which may be after the caller is gone.
+        """
+        if self._active + self._waiting >= self.max_concurrency + self.max_queue:
+            self._shed_queue_full += 1
+            raise Overloaded("Search queue is full; retry shortly.", self.retry_after())
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout_ms / 1000.0)
+        except asyncio.TimeoutError:
+            self._shed_timeout += 1
+            raise Overloaded("Search is overloaded; retry shortly.", self.retry_after()) from None
+        finally:
+            self._waiting -= 1
+        admitted = time.monotonic()
+        waited_ms = (admitted - started) * 1000.0
+        self._wait_ms.append(waited_ms)
+        self._admitted += 1
+        self._active += 1
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if released:
+                return
+            released = True
+            self._active -= 1
+            self._semaphore.release()
+            elapsed_ms = (time.monotonic() - admitted) * 1000.0
+            self._service_ms = 0.8 * self._service_ms + 0.2 * elapsed_ms
+
+        return release, waited_ms
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[float]:
+        """Hold one retrieval slot for the ``async with`` body; yields the queue wait in ms."""
+        release, waited_ms = await self.acquire()
+        try:
+            yield waited_ms
+        finally:
+            release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "queued": self._waiting,
+            "admitted": self._admitted,
+            "shed_queue_full": self._shed_queue_full,
+            "shed_timeout": self._shed_timeout,
+            "queue_wait_ms_p50": _percentile(self._wait_ms, 0.50),
+            "queue_wait_ms_p95": _percentile(self._wait_ms, 0.95),
+            "queue_wait_ms_max": round(max(self._wait_ms), 1) if self._wait_ms else 0.0,
+            "service_ms_ewma": round(self._service_ms, 1),
+        }
+
+
+class SingleFlight:
+    """Share one in-flight call between identical concurrent requests."""
+
+    def __init__(self) -> None:
+        self._flights: Dict[str, "asyncio.Task[Any]"] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Await ``factory()`` or an identical call already in flight.
+
+        Returns ``(result, coalesced)``. The shared task is shielded, so a
+        client disconnecting does not cancel it for the others.
+        """
+        flight = self._flights.get(key)
+        if flight is not None:
+            self._coalesced += 1
+            return await asyncio.shield(flight), True
+        flight = asyncio.ensure_future(factory())
+        self._flights[key] = flight
+        self._leaders += 1
+        flight.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(flight), False
+
+    def _finish(self, key: str, flight: "asyncio.Task[Any]") -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Mark the exception retrieved when every waiter has gone away
+        if not flight.cancelled():
+            flight.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"in_flight": len(self._flights), "leaders": self._leaders, "coalesced": self._coalesced}
@@ -1,11 +1,35 @@
+"""
+Fallback asset-URL lookups from the TellyAds metadata spreadsheet.
+
+Asset URLs normally come from ``ads.video_url`` / ``ads.image_url`` (written
+at ingest or by ``scripts/backfill_asset_urls.py``). This module only covers
+rows that have not been backfilled yet. The CSV is parsed lazily, on first
+use or by ``warm_up()`` from the API's startup hook, rather than at import
+time. Only the two URL columns are kept. Set ``ASSET_CSV_FALLBACK=0`` to never
+load it.
+"""
+
 import csv
+import logging
+import os
+import threading
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CSV_PATH = "TELLY+ADS (2).csv"
+CSV_PATH = os.getenv("ASSET_CSV_PATH", DEFAULT_CSV_PATH)
+FALLBACK_ENABLED = os.getenv("ASSET_CSV_FALLBACK", "1").lower() in {"1", "true", "yes", "on"}
+
+# external_id -> (video_url, image_url)
+AssetUrls = Tuple[Optional[str], Optional[str]]
+
 
 class TellyAdsCSVParser:
     def __init__(self, csv_path: str):
         self.csv_path = Path(csv_path)
-        self.ad_map: Dict[str, Dict] = {}
+        self.ad_map: Dict[str, AssetUrls] = {}
         self._load_csv()
 
     def _load_csv(self):
@@ -17,39 +41,55 @@ class TellyAdsCSVParser:
             with open(self.csv_path, mode='r', encoding='utf-8', errors='replace') as f:
                 reader = csv.DictReader(f)
                 for row in reader:
-                    # Clean up keys if necessary (sometimes there are BOMs or weird chars)
-                    # Mapping: record_id, movie_filename -> external_id
-                    
-                    # In TellyAds data:
-                    # movie_filename usually looks like "TA12345"
-                    # record_id is "12345"
-                    
+                    # In TellyAds data movie_filename looks like "TA12345"
                     external_id = row.get("movie_filename")
-                    if external_id:
-                        self.ad_map[external_id] = {
-                            "video_url": row.get("VID_filename_Link"),
-                            "image_url": row.get("still_filename_Link"),
-                            "title": row.get("commercial_title"),
-                            "advertiser": row.get("advertiser-1"),
-                            "date_collected": row.get("Date_Collected")
-                        }
+                    video_url = row.get("VID_filename_Link") or None
+                    image_url = row.get("still_filename_Link") or None
+                    if external_id and (video_url or image_url):
+                        self.ad_map[external_id] = (video_url, image_url)
         except Exception as e:
-            print(f"Error loading CSV: {e}")
+            logger.error(f"Error loading CSV: {e}")
 
-    def get_ad_data(self, external_id: str) -> Optional[Dict]:
-        """Returns CSV data for a given external_id"""
-        return self.ad_map.get(external_id)
+    def get_urls(self, external_id: str) -> AssetUrls:
+        return self.ad_map.get(external_id, (None, None))
+
+
+_parser: Optional[TellyAdsCSVParser] = None
+_parser_lock = threading.Lock()
+
+
+def _get_parser() -> Optional[TellyAdsCSVParser]:
+    global _parser
+    if not FALLBACK_ENABLED:
+        return None
+    with _parser_lock:
+        if _parser is None:
+            _parser = TellyAdsCSVParser(CSV_PATH)
+            logger.info("Loaded %d asset URL fallbacks from %s", len(_parser.ad_map), CSV_PATH)
+        return _parser
+
+
+def warm_up() -> None:
+    """Load the fallback map ahead of the first request (startup/readiness hook)."""
+    _get_parser()
+
+
+def is_ready() -> bool:
+    """True once the fallback map is loaded (or the fallback is disabled)."""
+    return not FALLBACK_ENABLED or _parser is not None
+
+
+def get_asset_urls(external_ids: Iterable[str]) -> Dict[str, AssetUrls]:
+    """Batch lookup of ``external_id -> (video_url, image_url)``."""
+    parser = _get_parser()
+    if parser is None:
+        return {}
+    return {external_id: parser.get_urls(external_id) for external_id in external_ids}
 
-# Singleton instance to be used by the API
-# In a real app, this path should be from env or config
-DEFAULT_CSV_PATH = "TELLY+ADS (2).csv"
-parser = TellyAdsCSVParser(DEFAULT_CSV_PATH)
 
 def get_video_url_from_csv(external_id: str) -> Optional[str]:
-    data = parser.get_ad_data(external_id)
-    return data.get("video_url") if data else None
+    return get_asset_urls([external_id]).get(external_id, (None, None))[0]
 
-def get_image_url_from_csv(external_id: str) -> Optional[str]:
-    data = parser.get_ad_data(external_id)
-    return data.get("image_url") if data else None
 
+def get_image_url_from_csv(external_id: str) -> Optional[str]:
+    return get_asset_urls([external_id]).get(external_id, (None, None))[1]
@@ -1,21 +1,67 @@
-from fastapi import FastAPI, HTTPException, Query, Request
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, StringConstraints
+from typing import Annotated, List, Optional, Dict, Any
 import os
 from pathlib import Path
 import json
 import logging
-from tvads_rag.tvads_rag import retrieval, db_backend
+import orjson
+from tvads_rag.tvads_rag import pagination, retrieval, db_backend, suggest
+from tvads_rag.tvads_rag.circuit_breaker import CircuitOpenError, breaker_states
+from backend import services
+from backend.admission import Overloaded
+
+try:  # Optional: brotli for clients that accept it, gzip for the rest
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # pragma: no cover - optional dependency
+    BrotliMiddleware = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("api")
 
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("API_COMPRESS_MIN_BYTES", "1024"))
+# Ad pages: shared caches may serve a copy this long, then revalidate via ETag
+AD_CACHE_MAX_AGE = int(os.getenv("AD_CACHE_MAX_AGE", "300"))
+AD_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("AD_CACHE_STALE_WHILE_REVALIDATE", "86400"))
+
+
+class OrjsonResponse(JSONResponse):
+    """JSON response rendered with orjson (several times faster than json on large JSONB)."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the DB pool and asset-URL fallback in the background; /api/ready
+    # reports when it is done so the worker can be put into rotation.
+    warm_up = asyncio.create_task(services.warm_up())
+    # Keep the typeahead index in step with newly ingested ads
+    refresh_suggestions = asyncio.create_task(services.refresh_suggestions_forever())
+    # Reload the emotional-arc matrix without holding up similar-arc requests
+    refresh_arcs = asyncio.create_task(services.refresh_arcs_forever())
+    yield
+    warm_up.cancel()
+    refresh_suggestions.cancel()
+    refresh_arcs.cancel()
+    # Release worker threads and pooled DB connections on shutdown
+    services.shutdown()
+
 app = FastAPI(
     title="TellyAds RAG API",
     description="Semantic Search API for TellyAds Archive",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=OrjsonResponse,
 )
 
 # Configure CORS
@@ -31,14 +77,58 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Search-Skipped-Stages", "X-Search-Elapsed-Ms", "X-Next-Cursor", "ETag"],
 )
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESS_MIN_BYTES, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES)
 
 # --- Models ---
 
+class SearchFilters(BaseModel):
+    brands: Optional[List[str]] = None
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    product_categories: Optional[List[str]] = None
+    format_types: Optional[List[str]] = None
+    has_celeb: Optional[bool] = None
+    aida_stage: Optional[str] = None
+    claim_type: Optional[str] = None
+
+# Blank queries are rejected with 422 before reaching the embedding provider
+QueryText = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+
 class SearchRequest(BaseModel):
+    query: QueryText
+    limit: int = Field(default=20, ge=1, le=100)
+    offset: int = Field(default=0, ge=0)
+    # X-Next-Cursor from the previous page; later pages skip retrieval
+    cursor: Optional[str] = None
+    filters: Optional[SearchFilters] = None
+    # Latency budget; defaults to SEARCH_BUDGET_MS
+    budget_ms: Optional[int] = Field(default=None, ge=100, le=10000)
+    # Facet counts over the fused candidates (first pages only, same SQL round trip)
+    facets: bool = False
+
+class BatchSearchRequest(BaseModel):
+    queries: List[QueryText] = Field(min_length=1, max_length=100)
+    limit: int = Field(default=10, ge=1, le=50)
+    filters: Optional[SearchFilters] = None
+
+class BatchSearchResult(BaseModel):
     query: str
-    limit: int = 20
-    offset: int = 0
+    results: List["SearchResult"]
+
+class FacetBucket(BaseModel):
+    value: str
+    count: int
+
+class FacetedSearchResponse(BaseModel):
+    results: List["SearchResult"]
+    # brand, year, format_type, product_category, item_type -> buckets, largest first
+    facets: Optional[Dict[str, List[FacetBucket]]] = None
+    next_cursor: Optional[str] = None
 
 class SearchResult(BaseModel):
     id: str
@@ -62,8 +152,18 @@ class AdDetail(BaseModel):
     impact_scores: Optional[Dict[str, Any]] = None
     video_url: Optional[str] = None
     image_url: Optional[str] = None
+    # Other heavy fields requested via ?include=
+    extra: Optional[Dict[str, Any]] = None
 
-from backend.csv_parser import get_video_url_from_csv, get_image_url_from_csv
+
+async def _fill_asset_urls(rows: List[Dict[str, Any]]) -> None:
+    """Fill asset URLs missing from the ads table with one batched CSV fallback lookup."""
+    missing = [r["external_id"] for r in rows if not (r.get("video_url") and r.get("image_url"))]
+    fallback = await services.asset_urls(missing)
+    for r in rows:
+        video_url, image_url = fallback.get(r["external_id"], (None, None))
+        r["video_url"] = r.get("video_url") or video_url
+        r["image_url"] = r.get("image_url") or image_url
 
 # --- Endpoints ---
 
@@ -71,177 +171,568 @@ from backend.csv_parser import get_video_url_from_csv, get_image_url_from_csv
 async def get_status():
     """System health check"""
     try:
-        # Check DB connection by running a simple query
-        if db_backend.ad_exists(external_id="check_connection"):
-            pass 
-        return {"status": "online", "db": "connected", "version": "1.0.0"}
+        # Check DB connection by running a simple query (off the event loop)
+        checks = await services.status()
+        return {
+            "status": "online",
+            "db": "connected",
+            "version": "1.0.0",
+            "caches": checks["caches"],
+            "circuits": breaker_states(),
+            "admission": checks["admission"],
+            "suggest": checks["suggest"],
+            "emotion_arc": checks["emotion_arc"],
+        }
     except Exception as e:
         logger.error(f"Status check failed: {e}")
-        return {"status": "degraded", "error": str(e)}
+        return {
+            "status": "degraded",
+            "error": str(e),
+            "circuits": breaker_states(),
+            "admission": services.admission_stats(),
+        }
 
-@app.post("/api/search", response_model=List[SearchResult])
-async def search_ads(request: SearchRequest):
-    """Semantic/Hybrid search endpoint"""
+@app.get("/api/ready")
+async def get_ready():
+    """Readiness probe: 503 until the startup warm-up has finished"""
+    if not services.is_ready():
+        raise HTTPException(status_code=503, detail="Warming up")
+    return {"ready": True}
+
+def _overloaded(e: Overloaded) -> HTTPException:
+    """Shed by admission control: 429 with a backlog-based Retry-After"""
+    return HTTPException(
+        status_code=429,
+        detail=str(e),
+        headers={"Retry-After": str(max(int(e.retry_after + 0.5), 1))},
+    )
+
+def _search_result(r: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a retrieval row onto the SearchResult fields"""
+    # Cross-encoder score for reranked rows; RRF when rerank was skipped
+    score = r["rerank_score"] if r.get("rerank_score") is not None else r.get("rrf_score")
+    return {
+        "id": str(r.get("ad_id", "")),
+        "external_id": r.get("external_id") or "Unknown",
+        "brand_name": r.get("brand_name"),
+        "product_name": r.get("product_name"),
+        "text": r.get("text"),
+        "score": float(score) if score is not None else None,
+        "meta": r.get("meta"),
+        "item_type": r.get("item_type", "unknown"),
+    }
+
+async def _run_search(request: SearchRequest, http_response: Response) -> retrieval.SearchPage:
+    """Shared body of the JSON search endpoints; maps search errors to HTTP codes."""
     try:
-        results = retrieval.retrieve_with_rerank(
-            request.query, 
-            final_k=request.limit
+        filters = request.filters.model_dump(exclude_none=True) if request.filters else None
+        page = await services.search(
+            request.query,
+            limit=request.limit,
+            offset=request.offset,
+            cursor=request.cursor,
+            budget_ms=request.budget_ms,
+            filters=filters,
+            facets=request.facets,
+        )
+        outcome = page.retrieval
+        if outcome is not None:
+            # Degraded responses say which stages were dropped to meet the deadline
+            http_response.headers["X-Search-Skipped-Stages"] = ",".join(outcome.skipped_stages)
+            http_response.headers["X-Search-Elapsed-Ms"] = str(outcome.elapsed_ms)
+        if page.next_cursor:
+            http_response.headers["X-Next-Cursor"] = page.next_cursor
+        return page
+    except Overloaded as e:
+        raise _overloaded(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except retrieval.DeadlineExceeded as e:
+        logger.warning(f"Search deadline exceeded: {e}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except CircuitOpenError as e:
+        # A provider is failing fast; tell clients when to come back
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(int(e.retry_after), 1))},
         )
-        
-        response = []
-        for r in results:
-            response.append(SearchResult(
-                id=str(r.get("ad_id", "")), # Assuming ad_id is available in retrieval result
-                external_id=r.get("external_id", "Unknown"), # Need to ensure retrieval returns this
-                brand_name=r.get("brand_name"),
-                product_name=r.get("product_name"),
-                text=r.get("text"),
-                score=r.get("rerank_score") or r.get("rrf_score"),
-                meta=r.get("meta"),
-                item_type=r.get("item_type", "unknown")
-            ))
-        return response
     except Exception as e:
         logger.error(f"Search failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/search", response_model=List[SearchResult])
+async def search_ads(request: SearchRequest, http_response: Response):
+    """Semantic/Hybrid search endpoint (deadline-aware)"""
+    page = await _run_search(request, http_response)
+    return [SearchResult(**_search_result(r)) for r in page.results]
+
+@app.post("/api/search/faceted", response_model=FacetedSearchResponse)
+async def search_ads_faceted(request: SearchRequest, http_response: Response):
+    """
+    Search plus facet counts (brand, year, format_type, product_category,
+    item_type) over the fused candidates, computed in the same SQL round trip.
+    ``facets`` is forced on; cursor pages return ``facets: null``.
+    """
+    page = await _run_search(request.model_copy(update={"facets": True}), http_response)
+    return {
+        "results": [_search_result(r) for r in page.results],
+        "facets": page.facets,
+        "next_cursor": page.next_cursor,
+    }
+
+@app.post("/api/search/batch", response_model=List[BatchSearchResult])
+async def search_ads_batch(request: BatchSearchRequest):
+    """
+    Run many searches at once: one embedding request, one SQL round trip and
+    concurrent reranks. Meant for evaluation and bulk analytics; results come
+    back in query order.
+    """
+    try:
+        filters = request.filters.model_dump(exclude_none=True) if request.filters else None
+        batches = await services.search_batch(request.queries, limit=request.limit, filters=filters)
+        return [
+            {"query": query, "results": [_search_result(r) for r in rows]}
+            for query, rows in zip(request.queries, batches)
+        ]
+    except Overloaded as e:
+        raise _overloaded(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except retrieval.DeadlineExceeded as e:
+        logger.warning(f"Batch search timed out: {e}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(int(e.retry_after), 1))},
+        )
+    except Exception as e:
+        logger.error(f"Batch search failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _ndjson(event: Dict[str, Any]) -> bytes:
+    return orjson.dumps(event, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+
+
+@app.post("/api/search/stream")
+async def search_ads_stream(request: SearchRequest):
+    """
+    Progressive search as NDJSON, one typed event per line:
+
+    - ``lexical``: keyword hits, sent as soon as the tsquery leg returns
+    - ``fused``: the hybrid RRF page, sent when a rerank is about to run
+    - ``final``: the final order, with ``next_cursor``, ``skipped_stages``, ``elapsed_ms``
+      and ``facets`` (when ``facets`` was requested)
+    - ``error``: ``status`` / ``detail`` matching the codes of ``POST /api/search``
+
+    Each results event replaces the previous one. Cache hits and cursor pages
+    send ``final`` only.
+    """
+    filters = request.filters.model_dump(exclude_none=True) if request.filters else None
+
+    async def events():
+        try:
+            async for item in services.search_stream(
+                request.query,
+                limit=request.limit,
+                offset=request.offset,
+                cursor=request.cursor,
+                budget_ms=request.budget_ms,
+                filters=filters,
+                facets=request.facets,
+            ):
+                if isinstance(item, retrieval.SearchPage):
+                    outcome = item.retrieval
+                    yield _ndjson({
+                        "type": "final",
+                        "results": [_search_result(r) for r in item.results],
+                        "next_cursor": item.next_cursor,
+                        "skipped_stages": outcome.skipped_stages if outcome else [],
+                        "elapsed_ms": outcome.elapsed_ms if outcome else None,
+                        "facets": item.facets,
+                    })
+                else:
+                    stage, rows = item
+                    yield _ndjson({"type": stage, "results": [_search_result(r) for r in rows]})
+        except Overloaded as e:
+            yield _ndjson({
+                "type": "error",
+                "status": 429,
+                "detail": str(e),
+                "retry_after": max(int(e.retry_after + 0.5), 1),
+            })
+        except ValueError as e:
+            yield _ndjson({"type": "error", "status": 400, "detail": str(e)})
+        except retrieval.DeadlineExceeded as e:
+            logger.warning(f"Search deadline exceeded: {e}")
+            yield _ndjson({"type": "error", "status": 504, "detail": str(e)})
+        except CircuitOpenError as e:
+            yield _ndjson({
+                "type": "error",
+                "status": 503,
+                "detail": str(e),
+                "retry_after": max(int(e.retry_after), 1),
+            })
+        except Exception as e:
+            logger.error(f"Streaming search failed: {e}")
+            yield _ndjson({"type": "error", "status": 500, "detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        # Stop proxies (nginx, Vercel) buffering the stream until it ends
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+# Heavy JSONB fields the ad page renders; ?include= narrows or extends them
+AD_DETAIL_DEFAULT_INCLUDE = ("analysis_json", "impact_scores")
+
+
+def _parse_include(include: Optional[str]) -> List[str]:
+    if include is None:
+        return list(AD_DETAIL_DEFAULT_INCLUDE)
+    return [field.strip() for field in include.split(",") if field.strip()]
+
+
+def _ad_etag(external_id: str, version: Any, fields: List[str]) -> str:
+    """Weak ETag for one ad page: changes with ads.updated_at and the ?include= set."""
+    if hasattr(version, "isoformat"):
+        version = version.isoformat()
+    key = f"{external_id}|{version}|{','.join(sorted(set(fields)))}"
+    # Weak because the same entity is served gzip/brotli/identity encoded
+    return f'W/"{hashlib.sha1(key.encode("utf-8")).hexdigest()[:24]}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison against an If-None-Match header (list or ``*``)."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def _ad_cache_headers(etag: str) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={AD_CACHE_MAX_AGE}, "
+            f"stale-while-revalidate={AD_CACHE_STALE_WHILE_REVALIDATE}"
+        ),
+    }
+
+
 @app.get("/api/ads/{external_id}", response_model=AdDetail)
-async def get_ad_detail(external_id: str):
-    """Get detailed ad metadata"""
+async def get_ad_detail(
+    request: Request,
+    external_id: str,
+    include: Optional[str] = Query(
+        None,
+        description="Comma-separated heavy fields (e.g. analysis_json,impact_scores,raw_transcript); empty for none",
+    ),
+):
+    """Get detailed ad metadata (conditional GET via ETag / If-None-Match)"""
     try:
-        # We need a function to get ad by external_id. 
-        # db_backend.ad_exists checks existence, but we need retrieval.
-        # Assuming we can query by external_id directly via DB connection or helper.
-        
-        # For now, using a direct DB query approach as db_backend might not have a "get_by_external_id" exposed yet.
-        # Ideally, add `get_ad_by_external_id` to db_backend.py
-        
-        conn = db_backend.get_connection()
-        if not conn:
-             raise HTTPException(status_code=503, detail="Database unavailable")
-             
-        with conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT * FROM ads WHERE external_id = %s", 
-                    (external_id,)
-                )
-                row = cur.fetchone()
-                if not row:
-                    raise HTTPException(status_code=404, detail="Ad not found")
-                
-                # Convert row to dict
-                ad_data = dict(row)
-                
-                return AdDetail(
-                    id=str(ad_data.get("id")),
-                    external_id=ad_data.get("external_id"),
-                    brand_name=ad_data.get("brand_name"),
-                    product_name=ad_data.get("product_name"),
-                    description=ad_data.get("one_line_summary"),
-                    duration_seconds=ad_data.get("duration_seconds"),
-                    year=ad_data.get("year"),
-                    analysis=ad_data.get("analysis_json"),
-                    impact_scores=ad_data.get("impact_scores"),
-                    video_url=get_video_url_from_csv(external_id),
-                    image_url=get_image_url_from_csv(external_id)
-                )
+        fields = _parse_include(include)
+        # Revalidation: compare against updated_at alone and skip the JSONB read
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            version = await services.run_blocking(db_backend.get_ad_version, external_id)
+            if version is not None:
+                etag = _ad_etag(external_id, version, fields)
+                if _etag_matches(if_none_match, etag):
+                    return Response(status_code=304, headers=_ad_cache_headers(etag))
+
+        ad_data = await services.run_blocking(
+            db_backend.get_ad_by_external_id, external_id, include=fields
+        )
+        if not ad_data:
+            raise HTTPException(status_code=404, detail="Ad not found")
+        await _fill_asset_urls([ad_data])
+
+        extra = {
+            field: ad_data.get(field)
+            for field in fields
+            if field not in AD_DETAIL_DEFAULT_INCLUDE
+        }
+        duration = ad_data.get("duration_seconds")
+        # Built as a plain dict and serialised by orjson: the JSONB sections
+        # come straight from the DB, so AdDetail validation would only copy them.
+        body = {
+            "id": str(ad_data.get("id")),
+            "external_id": ad_data.get("external_id"),
+            "brand_name": ad_data.get("brand_name"),
+            "product_name": ad_data.get("product_name"),
+            "description": ad_data.get("one_line_summary"),
+            "duration_seconds": float(duration) if duration is not None else None,
+            "year": ad_data.get("year"),
+            "analysis": ad_data.get("analysis_json"),
+            "impact_scores": ad_data.get("impact_scores"),
+            "video_url": ad_data["video_url"],
+            "image_url": ad_data["image_url"],
+            "extra": extra or None,
+        }
+        etag = _ad_etag(external_id, ad_data.get("updated_at"), fields)
+        return OrjsonResponse(body, headers=_ad_cache_headers(etag))
 
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Get ad detail failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/ads/{external_id}/similar")
-async def get_similar_ads(external_id: str, limit: int = 5):
-    """Get similar ads based on content"""
-    # Placeholder: In a real implementation, this would use the embedding of the current ad 
-    # to find nearest neighbors.
-    # For MVP, we might perform a text search using the ad's summary or brand.
-    
+async def get_similar_ads(external_id: str, limit: int = Query(5, ge=1, le=50)):
+    """Nearest ads from the precomputed ad_neighbors graph (one indexed lookup)."""
     try:
-        # Fetch ad summary to use as query
-        conn = db_backend.get_connection()
-        query_text = ""
-        with conn:
-             with conn.cursor() as cur:
-                cur.execute("SELECT one_line_summary, brand_name FROM ads WHERE external_id = %s", (external_id,))
-                row = cur.fetchone()
-                if row:
-                    query_text = f"{row['brand_name']} {row['one_line_summary']}"
-        
-        if not query_text:
-            return []
-
-        results = retrieval.retrieve_with_rerank(query_text, final_k=limit)
-        # Filter out the ad itself if present
-        filtered = [r for r in results if r.get("external_id") != external_id]
-        return filtered[:limit]
-        
+        rows = await services.run_blocking(db_backend.get_similar_ads, external_id, limit)
+        return [
+            {
+                "id": str(r["id"]),
+                "external_id": r["external_id"],
+                "brand_name": r["brand_name"],
+                "product_name": r["product_name"],
+                "one_line_summary": r["one_line_summary"],
+                "score": float(r["similarity"]),
+            }
+            for r in rows
+        ]
     except Exception as e:
         logger.error(f"Similar ads failed: {e}")
-        return []
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/ads/{external_id}/similar-arc")
+async def get_similar_arc_ads(
+    external_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    dtw: bool = Query(True, description="Re-rank the shortlist with dynamic time warping"),
+):
+    """Ads whose emotional arc (intensity and valence over normalised time) is closest to this ad's."""
+    try:
+        rows = await services.similar_arcs(external_id, limit=limit, dtw=dtw)
+    except Exception as e:
+        logger.error(f"Similar-arc search failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if rows is None:
+        raise HTTPException(status_code=404, detail="Ad not found or has no emotional timeline")
+    return [{**r, "id": str(r["id"])} for r in rows]
 
 @app.get("/api/recent")
-async def get_recent_ads(limit: int = 20, offset: int = 0):
-    """Get recently indexed ads"""
+async def get_recent_ads(
+    http_response: Response,
+    limit: int = Query(20, ge=1, le=200),
+    offset: int = Query(0, ge=0, description="Deprecated; prefer cursor"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+):
+    """Get recently indexed ads (keyset-paginated via X-Next-Cursor)"""
     try:
-        conn = db_backend.get_connection()
-        with conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT external_id, brand_name, product_name, one_line_summary, created_at 
-                    FROM ads 
-                    ORDER BY created_at DESC 
-                    LIMIT %s OFFSET %s
-                """, (limit, offset))
-                rows = cur.fetchall()
-                
-                return [
-                    {
-                        "external_id": r["external_id"],
-                        "brand_name": r["brand_name"],
-                        "title": r["one_line_summary"],
-                        "image_url": get_image_url_from_csv(r["external_id"])
-                    }
-                    for r in rows
-                ]
+        after = pagination.decode_recent_cursor(cursor)
+        rows = await services.run_blocking(
+            db_backend.list_recent, limit + 1, 0 if after else offset, after=after
+        )
+        if len(rows) > limit:
+            rows = rows[:limit]
+            http_response.headers["X-Next-Cursor"] = pagination.recent_cursor(rows[-1])
+        await _fill_asset_urls(rows)
+        return [
+            {
+                "external_id": r["external_id"],
+                "brand_name": r["brand_name"],
+                "title": r["one_line_summary"],
+                "image_url": r["image_url"],
+            }
+            for r in rows
+        ]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Recent ads failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/brands")
-async def get_brands():
-    """List all brands"""
+async def get_brands(
+    http_response: Response,
+    counts: bool = False,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+):
+    """List brands alphabetically (with ad counts when ``counts=true``; paged when ``limit`` is set)"""
     try:
-        conn = db_backend.get_connection()
-        with conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT DISTINCT brand_name FROM ads ORDER BY brand_name")
-                rows = cur.fetchall()
-                return [r["brand_name"] for r in rows if r["brand_name"]]
+        after = pagination.decode_brand_cursor(cursor)
+        fetch = limit + 1 if limit else None
+        rows = await services.run_blocking(db_backend.list_brand_counts, fetch, after)
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            http_response.headers["X-Next-Cursor"] = pagination.brand_cursor(rows[-1]["brand_name"])
+        if counts:
+            return rows
+        return [row["brand_name"] for row in rows]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Get brands failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/leaderboard")
+async def get_leaderboard(
+    http_response: Response,
+    metric: str = Query("overall_impact", description="overall_impact, hook_power, ..., hero_score"),
+    limit: int = Query(50, ge=1, le=200),
+    category: Optional[str] = None,
+    brand: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    min_score: Optional[float] = Query(None, description="Only ads scoring at least this"),
+):
+    """Top ads by one impact score, best first (an index scan over the promoted score column)"""
+    try:
+        rows = await services.run_blocking(
+            db_backend.impact_leaderboard,
+            metric,
+            limit,
+            category=category,
+            brand=brand,
+            year_from=year_from,
+            year_to=year_to,
+            min_score=min_score,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Leaderboard failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    # Scores only change when ads are (re)ingested
+    http_response.headers["Cache-Control"] = f"public, max-age={AD_CACHE_MAX_AGE}"
+    return [
+        {**r, "score": float(r["score"]) if r.get("score") is not None else None}
+        for r in rows
+    ]
+
+@app.get("/api/transcript-search")
+async def search_transcripts(
+    http_response: Response,
+    q: str = Query(..., description='Line to find, e.g. "because you\'re worth it"'),
+    limit: int = Query(20, ge=1, le=100),
+    exact: bool = Query(False, description="Only literal matches (punctuation included)"),
+):
+    """
+    Exact-quote search over spoken transcripts: each hit is the ad plus the
+    start/end second of the line and a <mark>-highlighted snippet.
+    """
+    try:
+        rows = await services.run_blocking(db_backend.search_transcript_phrase, q, limit, exact_only=exact)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Transcript search failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    # Transcripts only change when ads are (re)ingested
+    http_response.headers["Cache-Control"] = f"public, max-age={AD_CACHE_MAX_AGE}"
+    return [
+        {
+            **r,
+            "ad_id": str(r["ad_id"]),
+            "start_time": float(r["start_time"]) if r.get("start_time") is not None else None,
+            "end_time": float(r["end_time"]) if r.get("end_time") is not None else None,
+            "rank": float(r["rank"]) if r.get("rank") is not None else None,
+        }
+        for r in rows
+    ]
+
+def _sitemap_etag(scope: str, shards: List[Dict[str, Any]]) -> str:
+    """Weak ETag over the versions of the shards a sitemap response covers."""
+    key = scope + "|" + ";".join(repr(services.sitemap_shard_version(s)) for s in shards)
+    return f'W/"{hashlib.sha1(key.encode("utf-8")).hexdigest()[:24]}"'
+
+
+def _sitemap_cache_headers(etag: str) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={services.SITEMAP_CACHE_SECONDS}, "
+            f"stale-while-revalidate={AD_CACHE_STALE_WHILE_REVALIDATE}"
+        ),
+    }
+
+@app.get("/api/sitemap")
+async def get_sitemap_index(request: Request):
+    """
+    Sitemap shards: ``{id, ad_count, last_modified}`` for each block of
+    SITEMAP_SHARD_SIZE ads in external_id order. Supports If-None-Match.
+    """
+    try:
+        shards = await services.sitemap_shards()
+    except Exception as e:
+        logger.error(f"Sitemap index failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    headers = _sitemap_cache_headers(_sitemap_etag("index", shards))
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    body = {
+        "shard_size": services.SITEMAP_SHARD_SIZE,
+        "total": sum(int(s["ad_count"]) for s in shards),
+        "shards": [
+            {"id": s["shard"], "ad_count": s["ad_count"], "last_modified": s["last_modified"]}
+            for s in shards
+        ],
+    }
+    return OrjsonResponse(body, headers=headers)
+
+@app.get("/api/sitemap/{shard}")
+async def get_sitemap_shard(request: Request, shard: int):
+    """
+    ``{external_id, updated_at}`` for every ad in one shard (a keyset range
+    scan). Unchanged shards answer If-None-Match with 304 without a DB read.
+    """
+    try:
+        shards = await services.sitemap_shards()
+        if not 0 <= shard < len(shards):
+            raise HTTPException(status_code=404, detail="Sitemap shard not found")
+        headers = _sitemap_cache_headers(_sitemap_etag(f"shard:{shard}", [shards[shard]]))
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        rows = await services.sitemap_page(shard)
+        if rows is None:
+            raise HTTPException(status_code=404, detail="Sitemap shard not found")
+        return OrjsonResponse(rows, headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Sitemap shard failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/suggest")
+async def get_suggestions(
+    http_response: Response,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: Optional[int] = Query(None, ge=1, le=20),
+    kinds: Optional[str] = Query(None, description="Comma-separated: brand,product,category,query"),
+):
+    """Typeahead suggestions for a prefix, served from the in-memory index"""
+    wanted = [k.strip() for k in kinds.split(",") if k.strip()] if kinds else None
+    unknown = sorted(set(wanted or ()) - set(suggest.KINDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown suggestion kinds: {', '.join(unknown)}")
+    try:
+        suggestions = await services.suggest_terms(q, limit=limit, kinds=wanted)
+    except Exception as e:
+        logger.error(f"Suggest failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    # Suggestions only change on the refresh interval, so CDNs and browsers can reuse them
+    http_response.headers["Cache-Control"] = "public, max-age=60"
+    return [s.as_dict() for s in suggestions]
+
 @app.get("/api/stats")
 async def get_stats():
     """Public stats"""
     try:
-        conn = db_backend.get_connection()
-        with conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT COUNT(*) as count FROM ads")
-                ad_count = cur.fetchone()["count"]
-                
-                cur.execute("SELECT COUNT(DISTINCT brand_name) as count FROM ads")
-                brand_count = cur.fetchone()["count"]
-                
-                return {
-                    "total_ads": ad_count,
-                    "total_brands": brand_count
-                }
+        return await services.run_blocking(db_backend.stats)
     except Exception as e:
         logger.error(f"Get stats failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,441 @@
+"""
+Async service layer for the API.
+
+The retrieval pipeline (caches, deadlines, circuit breakers) and the DB
+helpers are synchronous and shared with the ingestion CLI, so handlers never
+call them directly: every blocking call is offloaded to a bounded thread pool
+via ``run_blocking``. The event loop stays free to accept and serve other
+requests while searches wait on OpenAI, Cohere or Postgres, and pooled DB
+connections (DB_POOL_MAX_SIZE) are reused across those threads.
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, Optional, Tuple, TypeVar
+
+from backend import csv_parser
+from backend.admission import AdmissionController, SingleFlight
+from tvads_rag.tvads_rag import db_backend, emotion_arc, retrieval, suggest
+from tvads_rag.tvads_rag.config import (
+    get_emotion_arc_config,
+    get_search_budget_config,
+    get_suggest_config,
+)
+
+T = TypeVar("T")
+
+# Threads available for blocking work; keep in line with DB_POOL_MAX_SIZE.
+BLOCKING_WORKERS = int(os.getenv("API_BLOCKING_WORKERS", "16"))
+
+# Concurrent retrievals (embedding + SQL + rerank). Keep below the provider
+# rate limits and DB_POOL_MAX_SIZE; excess requests queue, then get a 429.
+SEARCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_MAX_CONCURRENCY", "8"))
+SEARCH_MAX_QUEUE = int(os.getenv("SEARCH_MAX_QUEUE", "64"))
+SEARCH_QUEUE_TIMEOUT_MS = int(os.getenv("SEARCH_QUEUE_TIMEOUT_MS", "2000"))
+
+# Ads per sitemap shard (the sitemap protocol allows at most 50,000 URLs) and
+# how long the shard summary is reused before it is re-read.
+SITEMAP_SHARD_SIZE = min(int(os.getenv("SITEMAP_SHARD_SIZE", "5000")), 50000)
+SITEMAP_CACHE_SECONDS = int(os.getenv("SITEMAP_CACHE_SECONDS", "900"))
+
+# Longest pause between startup warm-up attempts while the DB is unreachable.
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "30"))
+
+# Minimum gap between lazy suggest-index builds while the index is unavailable.
+SUGGEST_RETRY_SECONDS = float(os.getenv("SUGGEST_RETRY_SECONDS", "10"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_warm = False
+admission = AdmissionController(SEARCH_MAX_CONCURRENCY, SEARCH_MAX_QUEUE, SEARCH_QUEUE_TIMEOUT_MS)
+_search_flights = SingleFlight()
+_sitemap_flights = SingleFlight()
+# Lazy suggest-index build in flight, and when it started
+_suggest_build: Optional["asyncio.Future[Any]"] = None
+_suggest_build_started = float("-inf")
+# (monotonic time read, shard summary)
+_sitemap_index: Optional[Tuple[float, List[Dict[str, Any]]]] = None
+# shard -> (shard version, rows)
+_sitemap_pages: Dict[int, Tuple[Tuple[Any, ...], List[Dict[str, Any]]]] = {}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=BLOCKING_WORKERS, thread_name_prefix="api-blocking"
+        )
+    return _executor
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a synchronous call in the API thread pool without blocking the loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+async def _admitted(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    ``run_blocking`` behind the search admission queue (may raise ``Overloaded``).
+
+    The slot is held until the worker thread finishes, not just while the
+    caller waits, so abandoned requests still count against the limit.
+    """
+    release, _ = await admission.acquire()
+    return await _start_admitted(release, func, *args, **kwargs)
+
+
+def _start_admitted(
+    release: Callable[[], None], func: Callable[..., T], *args: Any, **kwargs: Any
+) -> "asyncio.Future[T]":
+    """Submit ``func`` to the thread pool; ``release`` runs on the loop once the thread is done."""
+    loop = asyncio.get_running_loop()
+    try:
+        future = _get_executor().submit(functools.partial(func, *args, **kwargs))
+    except BaseException:
+        release()
+        raise
+
+    def _done(_: Any) -> None:
+        try:
+            loop.call_soon_threadsafe(release)
+        except RuntimeError:
+            # Event loop already closed (shutdown); nothing is admitted any more
+            pass
+
+    future.add_done_callback(_done)
+    # Cancelling the wrapper cancels the job only if it has not started yet
+    return asyncio.wrap_future(future, loop=loop)
+
+
+def _flight_key(query_text: str, **params: Any) -> str:
+    raw = json.dumps(
+        {"q": retrieval.normalise_query_text(query_text), **params}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def search(
+    query_text: str,
+    *,
+    limit: int,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    filters: Optional[Mapping[str, Any]] = None,
+    budget_ms: Optional[int] = None,
+    facets: bool = False,
+) -> retrieval.SearchPage:
+    """
+    Deadline-aware hybrid search + rerank, one page at a time.
+
+    Result-cache hits and cursor pages (sliced from the search-page cache)
+    are served without an admission slot. Other identical first-page searches
+    in flight at the same time share one retrieval, which holds one slot.
+    """
+    if cursor:
+        return await run_blocking(
+            retrieval.search_page, query_text, limit=limit, offset=offset, cursor=cursor
+        )
+    page = await run_blocking(
+        retrieval.cached_search_page, query_text, limit=limit, offset=offset, filters=filters, facets=facets
+    )
+    if page is None:
+        page = await _coalesced_search(
+            query_text, limit=limit, offset=offset, filters=filters, budget_ms=budget_ms, facets=facets
+        )
+    if page.results and offset == 0:
+        suggest.get_suggester().record_query(query_text)
+    return page
+
+
+async def _coalesced_search(
+    query_text: str,
+    *,
+    limit: int,
+    offset: int,
+    filters: Optional[Mapping[str, Any]],
+    budget_ms: Optional[int],
+    facets: bool,
+) -> retrieval.SearchPage:
+    key = _flight_key(
+        query_text, limit=limit, offset=offset, filters=filters, budget_ms=budget_ms, facets=facets
+    )
+    page, _ = await _search_flights.run(
+        key,
+        lambda: _admitted(
+            retrieval.search_page,
+            query_text,
+            limit=limit,
+            offset=offset,
+            budget_ms=budget_ms,
+            filters=filters,
+            facets=facets,
+        ),
+    )
+    return page
+
+
+async def search_batch(
+    query_texts: List[str],
+    *,
+    limit: int,
+    filters: Optional[Mapping[str, Any]] = None,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Batch retrieval (one admission slot for the whole batch), bounded by
+    SEARCH_BATCH_TIMEOUT_MS; raises ``retrieval.DeadlineExceeded`` on overrun.
+    """
+    return await _admitted(
+        retrieval.retrieve_batch,
+        query_texts,
+        candidate_k=max(retrieval.DEFAULT_CANDIDATE_K, limit),
+        final_k=limit,
+        filters=filters,
+        timeout_ms=get_search_budget_config().batch_timeout_ms or None,
+    )
+
+
+async def search_stream(
+    query_text: str,
+    *,
+    limit: int,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    filters: Optional[Mapping[str, Any]] = None,
+    budget_ms: Optional[int] = None,
+    facets: bool = False,
+) -> AsyncIterator[Any]:
+    """
+    Progressive variant of ``search``.
+
+    Yields ``(stage, rows)`` for each early result list ("lexical", then
+    "fused" when a rerank follows) as the worker thread reports it, then the
+    final ``retrieval.SearchPage``. Errors from the search propagate after any
+    partial results already yielded. Result-cache hits and cursor pages yield
+    only the page and take no admission slot. Other searches take one
+    (``Overloaded`` when shed) and hold it until the worker thread finishes,
+    even if the client disconnects first. They are not coalesced, since each
+    client receives its own progressive events.
+    """
+    if cursor:
+        yield await search(query_text, limit=limit, offset=offset, cursor=cursor)
+        return
+    page = await run_blocking(
+        retrieval.cached_search_page, query_text, limit=limit, offset=offset, filters=filters, facets=facets
+    )
+    if page is not None:
+        if page.results and offset == 0:
+            suggest.get_suggester().record_query(query_text)
+        yield page
+        return
+
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[Any]" = asyncio.Queue()
+
+    def on_partial(stage: str, rows: List[Dict[str, Any]]) -> None:
+        loop.call_soon_threadsafe(queue.put_nowait, (stage, rows))
+
+    release, _ = await admission.acquire()
+    task = _start_admitted(
+        release,
+        retrieval.search_page,
+        query_text,
+        limit=limit,
+        offset=offset,
+        budget_ms=budget_ms,
+        filters=filters,
+        on_partial=on_partial,
+        facets=facets,
+    )
+    try:
+        while not task.done():
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield getter.result()
+            else:
+                getter.cancel()
+        while not queue.empty():
+            yield queue.get_nowait()
+        page = task.result()
+        if page.results and offset == 0:
+            suggest.get_suggester().record_query(query_text)
+        yield page
+    finally:
+        # Client went away mid-stream: a job still queued is dropped; a running
+        # one finishes on its thread and only then frees the admission slot
+        task.cancel()
+
+
+async def sitemap_shards() -> List[Dict[str, Any]]:
+    """
+    Sitemap shard summary, re-read at most every SITEMAP_CACHE_SECONDS.
+
+    Concurrent crawlers share one read.
+    """
+    global _sitemap_index
+    if _sitemap_index is not None and time.monotonic() - _sitemap_index[0] < SITEMAP_CACHE_SECONDS:
+        return _sitemap_index[1]
+    shards, _ = await _sitemap_flights.run(
+        "index", lambda: run_blocking(db_backend.list_sitemap_shards, SITEMAP_SHARD_SIZE)
+    )
+    _sitemap_index = (time.monotonic(), shards)
+    return shards
+
+
+def sitemap_shard_version(shard: Mapping[str, Any]) -> Tuple[Any, ...]:
+    """Changes whenever an ad in the shard is added, removed or updated."""
+    return (shard["shard"], shard["first_external_id"], int(shard["ad_count"]), str(shard["last_modified"]))
+
+
+async def sitemap_page(shard: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    ``{external_id, updated_at}`` rows of one shard, or None if it does not exist.
+
+    Rows are kept until the shard's version changes.
+    """
+    shards = await sitemap_shards()
+    if not 0 <= shard < len(shards):
+        return None
+    info = shards[shard]
+    version = sitemap_shard_version(info)
+    cached = _sitemap_pages.get(shard)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    rows, _ = await _sitemap_flights.run(
+        f"page:{version}",
+        lambda: run_blocking(db_backend.list_sitemap_page, info["first_external_id"], int(info["ad_count"])),
+    )
+    _sitemap_pages[shard] = (version, rows)
+    return rows
+
+
+async def status() -> Dict[str, Any]:
+    """DB round trip plus cache metrics."""
+    await run_blocking(db_backend.ad_exists, external_id="check_connection")
+    return {
+        "caches": await run_blocking(retrieval.cache_stats),
+        "admission": admission_stats(),
+        "suggest": suggest.get_suggester().stats(),
+        "emotion_arc": emotion_arc.get_arc_search().stats(),
+    }
+
+
+def admission_stats() -> Dict[str, Any]:
+    """Admission queue and coalescing counters (queue wait percentiles in ms)."""
+    return {**admission.stats(), "coalescing": _search_flights.stats()}
+
+
+async def warm_up() -> None:
+    """
+    Open a pooled DB connection and load the asset-URL fallback off the request
+    path. Failures (e.g. the DB is down at boot) are retried with exponential
+    backoff up to WARMUP_RETRY_MAX_SECONDS apart, so the worker becomes ready
+    once its dependencies recover.
+    """
+    global _warm
+    delay = 1.0
+    while True:
+        try:
+            await run_blocking(db_backend.ad_exists, external_id="check_connection")
+            await run_blocking(csv_parser.warm_up)
+            _warm = True
+            break
+        except Exception:
+            logging.getLogger("api").exception(
+                f"Warm-up failed; /api/ready stays unready, retrying in {delay:g}s"
+            )
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+    try:
+        await run_blocking(suggest.get_suggester().rebuild)
+    except Exception:
+        # Typeahead is optional; suggest_terms and the refresh loop retry the build
+        logging.getLogger("api").exception("Suggest index build failed")
+
+
+async def suggest_terms(
+    prefix: str, *, limit: int, kinds: Optional[List[str]] = None
+) -> List[suggest.Suggestion]:
+    """
+    Typeahead lookup, served from memory. Until the index is built it returns
+    no suggestions and starts one background build, so a burst of keystrokes
+    never queues up rebuilds.
+    """
+    suggester = suggest.get_suggester()
+    if not suggester.ready:
+        _start_suggest_build(suggester)
+        return []
+    return suggester.suggest(prefix, limit, kinds)
+
+
+def _start_suggest_build(suggester: suggest.Suggester) -> None:
+    global _suggest_build, _suggest_build_started
+    if _suggest_build is not None and not _suggest_build.done():
+        return
+    # After a failed build, wait before hitting the database again
+    if time.monotonic() - _suggest_build_started < SUGGEST_RETRY_SECONDS:
+        return
+    _suggest_build_started = time.monotonic()
+    _suggest_build = asyncio.ensure_future(run_blocking(suggester.rebuild))
+    _suggest_build.add_done_callback(_log_suggest_build)
+
+
+def _log_suggest_build(task: "asyncio.Future[Any]") -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logging.getLogger("api").error(f"Suggest index build failed: {task.exception()}")
+
+
+async def refresh_suggestions_forever() -> None:
+    """Apply changed ads to the suggest index every SUGGEST_REFRESH_SECONDS."""
+    interval = get_suggest_config().refresh_seconds
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_blocking(suggest.get_suggester().refresh)
+        except Exception:
+            logging.getLogger("api").exception("Suggest index refresh failed")
+
+
+async def refresh_arcs_forever() -> None:
+    """Reload the emotional-arc index every EMOTION_ARC_REFRESH_SECONDS, off the request path."""
+    interval = get_emotion_arc_config().refresh_seconds
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_blocking(emotion_arc.get_arc_search().refresh)
+        except Exception:
+            logging.getLogger("api").exception("Emotional-arc index refresh failed")
+
+
+async def similar_arcs(external_id: str, *, limit: int, dtw: bool = True) -> Optional[List[Dict[str, Any]]]:
+    """Ads with the closest emotional arc; None when the ad has no stored arc."""
+    return await run_blocking(emotion_arc.get_arc_search().similar_to, external_id, limit, dtw=dtw)
+
+
+def is_ready() -> bool:
+    """Readiness: warm-up finished and the asset-URL fallback is loaded."""
+    return _warm and csv_parser.is_ready()
+
+
+async def asset_urls(external_ids: List[str]) -> Dict[str, Any]:
+    """Batched CSV fallback for ads whose asset URLs are not stored yet."""
+    if not external_ids:
+        return {}
+    return await run_blocking(csv_parser.get_asset_urls, external_ids)
+
+
+def shutdown() -> None:
+    """Stop the worker threads and release pooled DB connections."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    db_backend.close_pool()
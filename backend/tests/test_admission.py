@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+
+from backend.admission import AdmissionController, Overloaded, SingleFlight
+
+
+def test_admission_sheds_when_the_queue_is_full():
+    async def scenario():
+        controller = AdmissionController(1, 0, 1000)
+        release, waited_ms = await controller.acquire()
+        assert waited_ms >= 0
+        with pytest.raises(Overloaded) as shed:
+            await controller.acquire()
+        assert shed.value.retry_after >= 1
+        release()
+        release()  # idempotent: the slot is returned once
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["shed_queue_full"] == 1
+    assert stats["active"] == 0 and stats["admitted"] == 1
+
+
+def test_admission_sheds_after_the_queue_timeout_and_admits_after_release():
+    async def scenario():
+        controller = AdmissionController(1, 1, 20)
+        release, _ = await controller.acquire()
+        with pytest.raises(Overloaded):
+            await controller.acquire()
+        assert controller.stats()["queued"] == 0
+
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        release()
+        _, waited_ms = await waiter
+        return controller.stats(), waited_ms
+
+    stats, waited_ms = asyncio.run(scenario())
+    assert stats["shed_timeout"] == 1
+    assert stats["admitted"] == 2 and stats["active"] == 1
+    assert waited_ms < 20
+
+
+def test_retry_after_scales_with_the_backlog():
+    async def scenario():
+        controller = AdmissionController(1, 2, 5000)
+        await controller.acquire()
+        idle = controller.retry_after()
+        waiters = [asyncio.ensure_future(controller.acquire()) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as shed:
+            await controller.acquire()
+        for waiter in waiters:
+            waiter.cancel()
+        return idle, shed.value.retry_after
+
+    idle, busy = asyncio.run(scenario())
+    # One request in service: at least a second. Three in the system: three service times.
+    assert idle == 1.0
+    assert busy == pytest.approx(3.0)
+
+
+def test_single_flight_coalesces_identical_calls():
+    calls = []
+
+    async def scenario():
+        flights = SingleFlight()
+        gate = asyncio.Event()
+
+        async def work():
+            calls.append(1)
+            await gate.wait()
+            return "rows"
+
+        first = asyncio.ensure_future(flights.run("q", work))
+        second = asyncio.ensure_future(flights.run("q", work))
+        await asyncio.sleep(0)
+        gate.set()
+        return await first, await second, flights.stats()
+
+    first, second, stats = asyncio.run(scenario())
+    assert calls == [1]
+    assert first == ("rows", False) and second == ("rows", True)
+    assert stats == {"in_flight": 0, "leaders": 1, "coalesced": 1}
+
+
+def test_single_flight_leader_cancellation_does_not_cancel_followers():
+    async def scenario():
+        flights = SingleFlight()
+        gate = asyncio.Event()
+
+        async def work():
+            await gate.wait()
+            return "rows"
+
+        leader = asyncio.ensure_future(flights.run("q", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.run("q", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        result = await follower
+        return leader.cancelled(), result, flights.stats()
+
+    leader_cancelled, result, stats = asyncio.run(scenario())
+    assert leader_cancelled
+    assert result == ("rows", True)
+    assert stats["in_flight"] == 0
+
+
+def test_stream_slot_is_held_until_the_worker_thread_finishes(monkeypatch):
+    import threading
+
+    from backend import services
+    from tvads_rag.tvads_rag import retrieval
+
+    controller = AdmissionController(1, 0, 1000)
+    monkeypatch.setattr(services, "admission", controller)
+    monkeypatch.setattr(retrieval, "cached_search_page", lambda *args, **kwargs: None)
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_search_page(*args, on_partial=None, **kwargs):
+        started.set()
+        finish.wait(5)
+        return retrieval.SearchPage(results=[])
+
+    monkeypatch.setattr(retrieval, "search_page", slow_search_page)
+
+    async def scenario():
+        stream = services.search_stream("dog food", limit=5)
+        consumer = asyncio.ensure_future(stream.__anext__())
+        while not started.is_set():
+            await asyncio.sleep(0.005)
+        # The client disconnects while the thread is still searching
+        consumer.cancel()
+        await asyncio.sleep(0.01)
+        held = controller.stats()["active"]
+        finish.set()
+        for _ in range(200):
+            if controller.stats()["active"] == 0:
+                break
+            await asyncio.sleep(0.005)
+        return held, controller.stats()["active"]
+
+    try:
+        held, after = asyncio.run(scenario())
+    finally:
+        finish.set()
+        services.shutdown()
+    assert held == 1
+    assert after == 0
@@ -0,0 +1,12 @@
+import pytest
+from pydantic import ValidationError
+
+from backend import main
+
+
+def test_blank_search_queries_are_rejected_before_retrieval():
+    with pytest.raises(ValidationError):
+        main.SearchRequest(query="   ")
+    with pytest.raises(ValidationError):
+        main.BatchSearchRequest(queries=["dogs", " "])
+    assert main.SearchRequest(query="  dog food ").query == "dog food"
@@ -0,0 +1,28 @@
+import asyncio
+
+from backend import services
+
+
+def test_warm_up_retries_until_the_database_is_reachable(monkeypatch):
+    attempts = []
+
+    def flaky_probe(external_id):
+        attempts.append(external_id)
+        if len(attempts) < 3:
+            raise ConnectionError("database is starting up")
+        return False
+
+    async def no_wait(seconds):
+        return None
+
+    monkeypatch.setattr(services, "_warm", False)
+    monkeypatch.setattr(services.db_backend, "ad_exists", flaky_probe)
+    monkeypatch.setattr(services.csv_parser, "warm_up", lambda: None)
+    monkeypatch.setattr(services.suggest.get_suggester(), "rebuild", lambda: 0)
+    monkeypatch.setattr(services.asyncio, "sleep", no_wait)
+    try:
+        asyncio.run(services.warm_up())
+    finally:
+        services.shutdown()
+    assert len(attempts) == 3
+    assert services._warm
@@ -1,18 +1,53 @@
 'use client';
 
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import { useRouter } from 'next/navigation';
 import { Search } from 'lucide-react';
+import type { Suggestion } from '@/lib/types';
+
+const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+// Wait for a pause in typing before asking for suggestions
+const SUGGEST_DEBOUNCE_MS = 120;
 
 export default function SearchBar() {
   const [query, setQuery] = useState('');
+  const [suggestions, setSuggestions] = useState<Suggestion[]>([]);
+  const [open, setOpen] = useState(false);
   const router = useRouter();
 
+  useEffect(() => {
+    const prefix = query.trim();
+    if (!prefix) {
+      setSuggestions([]);
+      return;
+    }
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const res = await fetch(`${API_URL}/api/suggest?q=${encodeURIComponent(prefix)}&limit=8`, {
+          signal: controller.signal,
+        });
+        if (res.ok) setSuggestions(await res.json());
+      } catch {
+        // Aborted by the next keystroke, or suggestions unavailable
+      }
+    }, SUGGEST_DEBOUNCE_MS);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [query]);
+
+  const go = (text: string) => {
+    if (text.trim()) {
+      setOpen(false);
+      router.push(`/search?q=${encodeURIComponent(text)}`);
+    }
+  };
+
   const handleSearch = (e: React.FormEvent) => {
     e.preventDefault();
-    if (query.trim()) {
-      router.push(`/search?q=${encodeURIComponent(query)}`);
-    }
+    go(query);
   };
 
   return (
@@ -21,8 +56,13 @@ export default function SearchBar() {
         <input
           type="text"
           value={query}
-          onChange={(e) => setQuery(e.target.value)}
+          onChange={(e) => {
+            setQuery(e.target.value);
+            setOpen(true);
+          }}
+          onBlur={() => setOpen(false)}
           placeholder="Find ads with nostalgia, car chases, or family dinners..."
+          autoComplete="off"
           className="w-full px-6 py-4 text-lg rounded-full border-2 border-gray-200 focus:border-blue-500 focus:ring-4 focus:ring-blue-100 outline-none transition-all shadow-lg text-gray-800 placeholder:text-gray-400"
         />
         <button
@@ -33,7 +73,27 @@ export default function SearchBar() {
           <Search size={24} />
         </button>
       </div>
+      {open && suggestions.length > 0 && (
+        <ul className="absolute z-10 left-4 right-4 mt-2 bg-white rounded-2xl shadow-lg border border-gray-100 overflow-hidden">
+          {suggestions.map((s) => (
+            <li key={`${s.kind}:${s.text}`}>
+              <button
+                type="button"
+                // mousedown fires before the input's blur closes the list
+                onMouseDown={(e) => {
+                  e.preventDefault();
+                  setQuery(s.text);
+                  go(s.text);
+                }}
+                className="w-full flex justify-between px-5 py-2 text-left text-gray-800 hover:bg-blue-50"
+              >
+                <span>{s.text}</span>
+                <span className="text-xs text-gray-400">{s.kind}</span>
+              </button>
+            </li>
+          ))}
+        </ul>
+      )}
     </form>
   );
 }
-
@@ -0,0 +1,110 @@
+'use client';
+
+import { useEffect, useState } from 'react';
+import AdGrid from '@/components/AdGrid';
+import { SearchFacets, SearchResult, SearchStreamEvent } from '@/lib/types';
+
+interface StreamingSearchResultsProps {
+  query: string;
+  limit?: number;
+}
+
+type Stage = 'loading' | 'lexical' | 'fused' | 'final' | 'error';
+
+const FACET_LABELS: Record<string, string> = {
+  brand: 'Brand',
+  year: 'Year',
+  format_type: 'Format',
+  product_category: 'Category',
+};
+
+// Renders keyword hits as soon as they arrive, then swaps in the fused and
+// reranked orders streamed by /api/search/stream.
+export default function StreamingSearchResults({ query, limit = 50 }: StreamingSearchResultsProps) {
+  const [results, setResults] = useState<SearchResult[]>([]);
+  const [stage, setStage] = useState<Stage>('loading');
+  const [error, setError] = useState<string | null>(null);
+  const [facets, setFacets] = useState<SearchFacets | null>(null);
+
+  useEffect(() => {
+    const controller = new AbortController();
+    setResults([]);
+    setStage('loading');
+    setError(null);
+    setFacets(null);
+
+    const handle = (event: SearchStreamEvent) => {
+      if (event.type === 'error') {
+        setError(event.detail);
+        setStage('error');
+        return;
+      }
+      setResults(event.results);
+      setStage(event.type);
+      if (event.type === 'final') setFacets(event.facets);
+    };
+
+    (async () => {
+      const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/search/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ query, limit, facets: true }),
+        signal: controller.signal,
+      });
+      if (!res.ok || !res.body) {
+        throw new Error('Failed to fetch results');
+      }
+      const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffered = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffered += value;
+        const lines = buffered.split('\n');
+        buffered = lines.pop() ?? '';
+        for (const line of lines) {
+          if (line.trim()) handle(JSON.parse(line) as SearchStreamEvent);
+        }
+      }
+    })().catch((e) => {
+      if (controller.signal.aborted) return;
+      setError(e instanceof Error ? e.message : String(e));
+      setStage('error');
+    });
+
+    return () => controller.abort();
+  }, [query, limit]);
+
+  if (stage === 'error') {
+    return <div className="text-center py-20 text-red-600">{error || 'Search failed.'}</div>;
+  }
+  if (stage === 'loading') {
+    return <div className="text-center py-20 text-slate-400">Searching…</div>;
+  }
+
+  return (
+    <div>
+      <p className="text-slate-500 mb-6">
+        {results.length} commercials found
+        {stage !== 'final' && <span className="ml-2 text-slate-400">(refining…)</span>}
+      </p>
+      {facets && (
+        // Counts come back with the final event, from the same SQL round trip as the results
+        <div className="flex flex-wrap gap-x-6 gap-y-2 mb-6 text-sm text-slate-600">
+          {Object.entries(FACET_LABELS).map(([name, label]) =>
+            facets[name]?.length ? (
+              <div key={name}>
+                <span className="font-medium text-slate-800">{label}:</span>{' '}
+                {facets[name]
+                  .slice(0, 5)
+                  .map((bucket) => `${bucket.value} (${bucket.count})`)
+                  .join(', ')}
+              </div>
+            ) : null,
+          )}
+        </div>
+      )}
+      <AdGrid ads={results} />
+    </div>
+  );
+}
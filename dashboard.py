@@ -518,82 +518,29 @@ with tab_browser:
                 from tvads_rag.tvads_rag.supabase_db import _get_client
                 client = _get_client()
                 
-                # Fetch ads WITHOUT large JSONB fields (load on demand)
-                # Only load essential fields for the list view
+                # Fetch ads WITHOUT large JSONB fields (load on demand).
+                # Child counts are trigger-maintained columns on ads.
                 response = client.table("ads").select(
                     "id, external_id, brand_name, product_name, one_line_summary, "
                     "duration_seconds, format_type, created_at, "
-                    "hero_analysis"  # Keep hero_analysis for hero badge
+                    "hero_analysis, "  # Keep hero_analysis for hero badge
+                    "chunk_count, segment_count, storyboard_count, embedding_count"
                 ).order("created_at", desc=True).execute()
                 
-                ads = response.data if response.data else []
-                
-                if not ads:
-                    return []
-                
-                # Use RPC function for efficient count aggregation (single query instead of 4)
-                try:
-                    counts_resp = client.rpc("get_ad_counts").execute()
-                    counts_data = counts_resp.data or []
-                    
-                    # Build lookup dict by ad_id
-                    counts_by_ad = {row["ad_id"]: row for row in counts_data}
-                    
-                    # Assign counts to ads
-                    for ad in ads:
-                        ad_id = ad["id"]
-                        counts = counts_by_ad.get(ad_id, {})
-                        ad["chunk_count"] = counts.get("chunk_count", 0)
-                        ad["segment_count"] = counts.get("segment_count", 0)
-                        ad["storyboard_count"] = counts.get("storyboard_count", 0)
-                        ad["embedding_count"] = counts.get("embedding_count", 0)
-                        
-                except Exception as count_error:
-                    # Fallback: if RPC fails, set counts to 0
-                    st.warning(f"Could not load counts via RPC: {count_error}. Counts set to 0.")
-                    for ad in ads:
-                        ad["chunk_count"] = 0
-                        ad["segment_count"] = 0
-                        ad["storyboard_count"] = 0
-                        ad["embedding_count"] = 0
-                
-                return ads
+                return response.data if response.data else []
             else:
-                # Postgres direct connection - optimized with JOINs instead of subqueries
+                # Postgres direct connection - counters are columns on ads, no joins needed
                 from tvads_rag.tvads_rag.db import get_connection
                 
                 with get_connection() as conn, conn.cursor() as cur:
-                    # Use LEFT JOINs with GROUP BY for better performance than correlated subqueries
                     cur.execute("""
                         SELECT 
                             a.id, a.external_id, a.brand_name, a.product_name, 
                             a.one_line_summary, a.duration_seconds, a.format_type,
                             a.created_at, a.hero_analysis,
-                            COALESCE(chunk_counts.cnt, 0) as chunk_count,
-                            COALESCE(segment_counts.cnt, 0) as segment_count,
-                            COALESCE(storyboard_counts.cnt, 0) as storyboard_count,
-                            COALESCE(embedding_counts.cnt, 0) as embedding_count
+                            a.chunk_count, a.segment_count,
+                            a.storyboard_count, a.embedding_count
                         FROM ads a
-                        LEFT JOIN (
-                            SELECT ad_id, COUNT(*) as cnt 
-                            FROM ad_chunks 
-                            GROUP BY ad_id
-                        ) chunk_counts ON chunk_counts.ad_id = a.id
-                        LEFT JOIN (
-                            SELECT ad_id, COUNT(*) as cnt 
-                            FROM ad_segments 
-                            GROUP BY ad_id
-                        ) segment_counts ON segment_counts.ad_id = a.id
-                        LEFT JOIN (
-                            SELECT ad_id, COUNT(*) as cnt 
-                            FROM ad_storyboards 
-                            GROUP BY ad_id
-                        ) storyboard_counts ON storyboard_counts.ad_id = a.id
-                        LEFT JOIN (
-                            SELECT ad_id, COUNT(*) as cnt 
-                            FROM embedding_items 
-                            GROUP BY ad_id
-                        ) embedding_counts ON embedding_counts.ad_id = a.id
                         ORDER BY a.created_at DESC
                     """)
                     rows = cur.fetchall()
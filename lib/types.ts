@@ -23,3 +23,26 @@ export interface AdDetail {
     image_url?: string;
 }
 
+
+// Facet name (brand, year, format_type, product_category, item_type) -> buckets, largest first
+export type SearchFacets = Record<string, { value: string; count: number }[]>;
+
+// One line of POST /api/search/stream (NDJSON)
+export type SearchStreamEvent =
+  | { type: 'lexical' | 'fused'; results: SearchResult[] }
+  | {
+      type: 'final';
+      results: SearchResult[];
+      next_cursor: string | null;
+      skipped_stages: string[];
+      elapsed_ms: number | null;
+      facets: SearchFacets | null;
+    }
+  | { type: 'error'; status: number; detail: string; retry_after?: number };
+
+// GET /api/suggest
+export interface Suggestion {
+  text: string;
+  kind: 'brand' | 'product' | 'category' | 'query';
+  weight: number;
+}
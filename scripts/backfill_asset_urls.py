@@ -0,0 +1,40 @@
+"""
+Backfill ads.video_url / ads.image_url from the metadata spreadsheet.
+
+New ingests write these columns directly; run this once for ads indexed
+before the columns existed (or after the spreadsheet links change). The API
+then serves asset URLs from the ads table instead of parsing the CSV.
+
+Usage:
+    python scripts/backfill_asset_urls.py --metadata-csv "TELLY+ADS (2).csv"
+    python scripts/backfill_asset_urls.py --metadata-csv sheet.csv --dry-run
+"""
+import argparse
+
+from tvads_rag.tvads_rag import db_backend, metadata_ingest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--metadata-csv", default="TELLY+ADS (2).csv", help="Spreadsheet with VID/still links")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many ads have links")
+    args = parser.parse_args()
+
+    index = metadata_ingest.load_metadata(args.metadata_csv)
+    # Entries are keyed by external_id, record_id and movie_filename, so
+    # every spelling the ingestion may have used gets an update row.
+    urls = {
+        key: (entry.video_url or None, entry.still_url or None)
+        for key, entry in index.entries.items()
+        if entry.video_url or entry.still_url
+    }
+    print(f"{len(urls)} spreadsheet keys carry asset links")
+    if args.dry_run:
+        return
+
+    updated = db_backend.update_asset_urls(urls)
+    print(f"Updated asset URLs on {updated} ads")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Backfill ads.emotional_arc from ads.emotional_metrics.
+
+New ingests store the resampled arc directly; run this once for ads indexed
+before the column existed. Pass --all after changing EMOTION_ARC_POINTS so
+every arc is resampled to the new length (arcs of another length are ignored
+by the similar-arc search).
+
+Usage:
+    python scripts/backfill_emotional_arcs.py
+    python scripts/backfill_emotional_arcs.py --all --dry-run
+"""
+import argparse
+
+from tvads_rag.tvads_rag import db_backend, emotion_arc
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--all", action="store_true", help="Resample every ad, not only ads without an arc")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many arcs would be written")
+    args = parser.parse_args()
+
+    rows = db_backend.fetch_emotional_timelines(missing_only=not args.all)
+    arcs = {
+        row["id"]: emotion_arc.resample_arc(row["timeline"], row["duration_seconds"])
+        for row in rows
+    }
+    usable = sum(arc is not None for arc in arcs.values())
+    print(f"{len(rows)} ads have an emotional timeline; {usable} produced an arc")
+    if args.dry_run:
+        return
+
+    updated = db_backend.update_emotional_arcs(arcs)
+    print(f"Updated emotional arcs on {updated} ads")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Concurrent load test for the search API.
+
+Fires POST /api/search requests at a fixed concurrency and reports latency
+percentiles (p50/p95/p99), throughput and status codes. Run it against a
+single uvicorn worker at increasing --concurrency values to check that
+throughput scales with I/O concurrency instead of serialising requests.
+
+Usage:
+    python scripts/load_test_api.py --url http://localhost:8000 --requests 200 --concurrency 16
+    python scripts/load_test_api.py --queries-file queries.txt --concurrency 1,8,32
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import Counter
+from typing import List, Tuple
+
+import httpx
+
+DEFAULT_QUERIES = [
+    "christmas ads with dogs",
+    "car adverts featuring celebrities",
+    "supermarket price promise",
+    "funny beer commercials",
+    "emotional charity appeal",
+    "mobile network deals for families",
+    "ads with a jingle",
+    "insurance comparison meerkats",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    queue: "asyncio.Queue[str]",
+    results: List[Tuple[int, float]],
+    limit: int,
+) -> None:
+    while True:
+        try:
+            query = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        started = time.perf_counter()
+        try:
+            resp = await client.post("/api/search", json={"query": query, "limit": limit})
+            status = resp.status_code
+        except httpx.HTTPError:
+            status = 0
+        results.append((status, (time.perf_counter() - started) * 1000.0))
+
+
+async def run_level(url: str, queries: List[str], total: int, concurrency: int, limit: int, timeout: float) -> None:
+    queue: "asyncio.Queue[str]" = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(random.choice(queries))
+    results: List[Tuple[int, float]] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(_worker(client, queue, results, limit) for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    latencies = [ms for status, ms in results if status == 200]
+    statuses = Counter(status for status, _ in results)
+    print(f"\nconcurrency={concurrency} requests={len(results)} wall={wall:.2f}s "
+          f"throughput={len(results) / wall:.1f} req/s")
+    print(f"  status codes: {dict(statuses)}")
+    if latencies:
+        print(
+            "  latency ms: p50={:.0f} p95={:.0f} p99={:.0f} max={:.0f} mean={:.0f}".format(
+                percentile(latencies, 50),
+                percentile(latencies, 95),
+                percentile(latencies, 99),
+                max(latencies),
+                statistics.mean(latencies),
+            )
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--limit", type=int, default=10, help="Results per search")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout (s)")
+    parser.add_argument("--queries-file", help="Optional file with one query per line")
+    args = parser.parse_args()
+
+    queries = DEFAULT_QUERIES
+    if args.queries_file:
+        with open(args.queries_file, encoding="utf-8") as fh:
+            queries = [line.strip() for line in fh if line.strip()]
+
+    for level in (int(value) for value in args.concurrency.split(",")):
+        asyncio.run(run_level(args.url, queries, args.requests, level, args.limit, args.timeout))
+
+
+if __name__ == "__main__":
+    main()
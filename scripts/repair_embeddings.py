@@ -7,7 +7,7 @@ import sys
 os.environ['DB_BACKEND'] = 'http'
 
 from tvads_rag.tvads_rag.supabase_db import _get_client, find_incomplete_ads
-from tvads_rag.tvads_rag import embeddings, db_backend
+from tvads_rag.tvads_rag import embeddings, db_backend, neighbors
 
 def get_ads_missing_embeddings():
     """Find ads that have data but missing embeddings."""
@@ -177,14 +177,23 @@ def main():
     print()
     
     total_embeddings = 0
+    repaired_ids = []
     for ad in ads:
         try:
             count = generate_embeddings_for_ad(ad)
             total_embeddings += count
+            if count:
+                repaired_ids.append(ad['id'])
             print(f"  ✅ {ad['external_id']}: {count} embeddings created")
         except Exception as e:
             print(f"  ❌ {ad['external_id']}: {e}")
     
+    if total_embeddings:
+        # Invalidate cached search results now that new embeddings exist
+        db_backend.bump_corpus_generation()
+        # Link the repaired ads into the precomputed similar-ads graph
+        neighbors.update_for_ads(repaired_ids)
+
     print()
     print(f"Done! Created {total_embeddings} embeddings for {len(ads)} ads.")
 
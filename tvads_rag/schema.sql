@@ -68,6 +68,14 @@ CREATE INDEX IF NOT EXISTS idx_ads_s3_key ON ads (s3_key) WHERE s3_key IS NOT NU
 -- Prevent duplicate ads (same external_id)
 CREATE UNIQUE INDEX IF NOT EXISTS idx_ads_external_id_unique ON ads (external_id) WHERE external_id IS NOT NULL;
 
+-- Keyset pagination for the recent-ads listing: WHERE (created_at, id) < cursor
+CREATE INDEX IF NOT EXISTS idx_ads_created_at_id ON ads (created_at DESC, id DESC);
+
+-- Public video/still URLs from the metadata spreadsheet, written at ingest
+-- (or by scripts/backfill_asset_urls.py) so the API never parses the CSV.
+ALTER TABLE ads ADD COLUMN IF NOT EXISTS video_url text;
+ALTER TABLE ads ADD COLUMN IF NOT EXISTS image_url text;
+
 DO $$
 BEGIN
     IF NOT EXISTS (
@@ -272,6 +280,124 @@ BEGIN
 END;
 $$;
 
+-- Field-weighted full-text vector used by the lexical leg of hybrid search.
+--   A: brand_name + product_name of the parent ad
+--   B: summaries and claims
+--   C: transcript text and every other item type
+-- Maintained at ingest by triggers (a generated column cannot read ads).
+ALTER TABLE embedding_items ADD COLUMN IF NOT EXISTS weighted_search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION embedding_item_weighted_tsvector(
+    item_type text,
+    item_text text,
+    brand_name text,
+    product_name text
+)
+RETURNS tsvector
+LANGUAGE sql
+IMMUTABLE
+AS $$
+SELECT
+    setweight(
+        to_tsvector('english', coalesce(brand_name, '') || ' ' || coalesce(product_name, '')),
+        'A'
+    ) ||
+    setweight(
+        to_tsvector('english', coalesce(item_text, '')),
+        CASE
+            WHEN item_type IN (
+                'segment_summary',
+                'ad_summary',
+                'claim',
+                'implied_claim',
+                'impact_summary',
+                'effectiveness_insight'
+            ) THEN 'B'
+            ELSE 'C'
+        END::"char"
+    );
+$$;
+
+CREATE OR REPLACE FUNCTION embedding_items_set_weighted_search_vector()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_brand text;
+    v_product text;
+BEGIN
+    SELECT brand_name, product_name INTO v_brand, v_product FROM ads WHERE id = NEW.ad_id;
+    NEW.weighted_search_vector := embedding_item_weighted_tsvector(
+        NEW.item_type, NEW.text, v_brand, v_product
+    );
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_embedding_items_weighted_search_vector ON embedding_items;
+CREATE TRIGGER trg_embedding_items_weighted_search_vector
+    BEFORE INSERT OR UPDATE OF text, item_type, ad_id ON embedding_items
+    FOR EACH ROW EXECUTE FUNCTION embedding_items_set_weighted_search_vector();
+
+-- Keep the A-weighted terms in sync when an ad's brand/product is corrected.
+CREATE OR REPLACE FUNCTION ads_refresh_weighted_search_vector()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE embedding_items ei
+    SET weighted_search_vector = embedding_item_weighted_tsvector(
+        ei.item_type, ei.text, NEW.brand_name, NEW.product_name
+    )
+    WHERE ei.ad_id = NEW.id;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_ads_refresh_weighted_search_vector ON ads;
+CREATE TRIGGER trg_ads_refresh_weighted_search_vector
+    AFTER UPDATE OF brand_name, product_name ON ads
+    FOR EACH ROW
+    WHEN (
+        OLD.brand_name IS DISTINCT FROM NEW.brand_name
+        OR OLD.product_name IS DISTINCT FROM NEW.product_name
+    )
+    EXECUTE FUNCTION ads_refresh_weighted_search_vector();
+
+-- Backfill rows written before the trigger existed (no-op once populated).
+UPDATE embedding_items ei
+SET weighted_search_vector = embedding_item_weighted_tsvector(
+    ei.item_type, ei.text, a.brand_name, a.product_name
+)
+FROM ads a
+WHERE a.id = ei.ad_id
+  AND ei.weighted_search_vector IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_embedding_items_weighted_search_vector
+    ON embedding_items USING gin(weighted_search_vector);
+
+-- Btree indexes backing the structured filters of match_embedding_items_hybrid.
+-- Text filters are matched case-insensitively, so index the lowered values.
+CREATE INDEX IF NOT EXISTS idx_ads_brand_name_lower ON ads (lower(brand_name));
+CREATE INDEX IF NOT EXISTS idx_ads_product_category_lower ON ads (lower(product_category));
+CREATE INDEX IF NOT EXISTS idx_ads_format_type_lower ON ads (lower(format_type));
+CREATE INDEX IF NOT EXISTS idx_ads_year ON ads (year);
+CREATE INDEX IF NOT EXISTS idx_ads_has_celeb ON ads (has_celeb) WHERE has_celeb;
+
+-- The filters and lexical_limit arguments changed the signature; drop the old
+-- overloads so calls with fewer arguments stay unambiguous.
+DROP FUNCTION IF EXISTS match_embedding_items_hybrid(vector, text, integer, text[]);
+DROP FUNCTION IF EXISTS match_embedding_items_hybrid(vector, text, integer, text[], jsonb);
+
+-- Hybrid (semantic + lexical) search fused with reciprocal rank fusion.
+--
+-- filters is an optional jsonb object applied inside both legs, before ranking:
+--   brands, product_categories, format_types: text arrays (case-insensitive)
+--   year_from, year_to: inclusive integer bounds on ads.year
+--   has_celeb: boolean
+--   aida_stage, claim_type: matched against embedding_items.meta (GIN index)
+-- lexical_limit: keyword matches kept for fusion, best ts_rank_cd first
+--   (NULL = 4 x limit_count; HYBRID_LEXICAL_LIMIT on the client).
 CREATE OR REPLACE FUNCTION match_embedding_items_hybrid(
     query_embedding vector(1536),
     query_text text,
@@ -291,11 +417,14 @@ CREATE OR REPLACE FUNCTION match_embedding_items_hybrid(
         'emotional_peaks',
         'distinctive_assets',
         'effectiveness_insight'
-    ]
+    ],
+    filters jsonb DEFAULT '{}'::jsonb,
+    lexical_limit integer DEFAULT NULL
 )
 RETURNS TABLE (
     embedding_id uuid,
     ad_id uuid,
+    external_id text,
     item_type text,
     text text,
     meta jsonb,
@@ -303,6 +432,7 @@ RETURNS TABLE (
     product_name text,
     one_line_summary text,
     format_type text,
+    year integer,
     hero_analysis jsonb,
     performance_metrics jsonb,
     rrf_score double precision,
@@ -335,7 +465,44 @@ WITH params AS (
                 'effectiveness_insight'
             ]
             ELSE item_types
-        END AS q_types
+        END AS q_types,
+        GREATEST(COALESCE(lexical_limit, COALESCE(limit_count, 50) * 4), 1) AS q_lex_limit,
+        5000 AS q_lex_scan_cap,
+        ARRAY(SELECT lower(v) FROM jsonb_array_elements_text(COALESCE(filters->'brands', '[]'::jsonb)) v) AS f_brands,
+        ARRAY(SELECT lower(v) FROM jsonb_array_elements_text(COALESCE(filters->'product_categories', '[]'::jsonb)) v) AS f_categories,
+        ARRAY(SELECT lower(v) FROM jsonb_array_elements_text(COALESCE(filters->'format_types', '[]'::jsonb)) v) AS f_formats,
+        (filters->>'year_from')::integer AS f_year_from,
+        (filters->>'year_to')::integer AS f_year_to,
+        (filters->>'has_celeb')::boolean AS f_has_celeb,
+        jsonb_strip_nulls(jsonb_build_object(
+            'aida_stage', filters->'aida_stage',
+            'claim_type', filters->'claim_type'
+        )) AS f_meta
+),
+filter_flags AS (
+    SELECT
+        p.*,
+        (
+            cardinality(p.f_brands) > 0
+            OR cardinality(p.f_categories) > 0
+            OR cardinality(p.f_formats) > 0
+            OR p.f_year_from IS NOT NULL
+            OR p.f_year_to IS NOT NULL
+            OR p.f_has_celeb IS NOT NULL
+        ) AS has_ad_filters
+    FROM params p
+),
+filtered_ads AS (
+    SELECT a.id
+    FROM ads a
+    CROSS JOIN filter_flags f
+    WHERE f.has_ad_filters
+      AND (cardinality(f.f_brands) = 0 OR lower(a.brand_name) = ANY(f.f_brands))
+      AND (cardinality(f.f_categories) = 0 OR lower(a.product_category) = ANY(f.f_categories))
+      AND (cardinality(f.f_formats) = 0 OR lower(a.format_type) = ANY(f.f_formats))
+      AND (f.f_year_from IS NULL OR a.year >= f.f_year_from)
+      AND (f.f_year_to IS NULL OR a.year <= f.f_year_to)
+      AND (f.f_has_celeb IS NULL OR a.has_celeb = f.f_has_celeb)
 ),
 semantic AS (
     SELECT
@@ -344,36 +511,68 @@ semantic AS (
         ei.item_type,
         ei.text,
         ei.meta,
-        ROW_NUMBER() OVER (ORDER BY ei.embedding <-> params.q_embedding) AS rank_sem
-    FROM params
-    JOIN embedding_items ei ON ei.item_type = ANY(params.q_types)
+        ROW_NUMBER() OVER (ORDER BY ei.embedding <-> f.q_embedding) AS rank_sem
+    FROM filter_flags f
+    JOIN embedding_items ei ON ei.item_type = ANY(f.q_types)
+    WHERE f.q_embedding IS NOT NULL
+      AND (NOT f.has_ad_filters OR ei.ad_id IN (SELECT id FROM filtered_ads))
+      AND (f.f_meta = '{}'::jsonb OR ei.meta @> f.f_meta)
 ),
 semantic_trim AS (
     SELECT s.* FROM semantic s
     CROSS JOIN params p
     WHERE s.rank_sem <= p.q_limit * 4
 ),
-lexical AS (
+-- Lexical leg, in two steps. lexical_hits keeps at most q_lex_scan_cap
+-- matching rows, newest first; lexical_top ranks only those with ts_rank_cd
+-- and keeps the best q_lex_limit (a bounded top-N sort). A term matching most
+-- of the archive is scored over its newest 5000 matches, not its whole
+-- posting list. EXPLAIN ANALYZE for a term matching 20000 items: the bitmap
+-- scan returns 20000 rows, a top-N heapsort on created_at passes 5000 on
+-- (Limit rows=5000), and ts_rank_cd runs on those 5000 only.
+lexical_hits AS (
     SELECT
         ei.id,
         ei.ad_id,
         ei.item_type,
         ei.text,
         ei.meta,
-        ROW_NUMBER() OVER (ORDER BY ts_rank_cd(ei.search_vector, ts.ts_query) DESC) AS rank_lex
-    FROM params
+        ei.weighted_search_vector,
+        ts.ts_query
+    FROM filter_flags f
     JOIN LATERAL (
-        SELECT websearch_to_tsquery('english', params.q_text) AS ts_query
-    ) ts ON params.q_text IS NOT NULL
-    JOIN embedding_items ei ON ei.item_type = ANY(params.q_types)
-    WHERE params.q_text IS NOT NULL
+        SELECT websearch_to_tsquery('english', f.q_text) AS ts_query
+    ) ts ON f.q_text IS NOT NULL
+    JOIN embedding_items ei ON ei.item_type = ANY(f.q_types)
+    WHERE f.q_text IS NOT NULL
       AND ts.ts_query <> ''::tsquery
-      AND ei.search_vector @@ ts.ts_query
+      AND ei.weighted_search_vector @@ ts.ts_query
+      AND (NOT f.has_ad_filters OR ei.ad_id IN (SELECT id FROM filtered_ads))
+      AND (f.f_meta = '{}'::jsonb OR ei.meta @> f.f_meta)
+    ORDER BY ei.created_at DESC NULLS LAST, ei.id DESC
+    LIMIT (SELECT GREATEST(q_lex_scan_cap, q_lex_limit) FROM params)
+),
+lexical_top AS (
+    SELECT
+        h.id,
+        h.ad_id,
+        h.item_type,
+        h.text,
+        h.meta,
+        ts_rank_cd(h.weighted_search_vector, h.ts_query) AS lex_score
+    FROM lexical_hits h
+    ORDER BY lex_score DESC, h.id
+    LIMIT (SELECT q_lex_limit FROM params)
 ),
 lexical_trim AS (
-    SELECT l.* FROM lexical l
-    CROSS JOIN params p
-    WHERE l.rank_lex <= p.q_limit * 4
+    SELECT
+        t.id,
+        t.ad_id,
+        t.item_type,
+        t.text,
+        t.meta,
+        ROW_NUMBER() OVER (ORDER BY t.lex_score DESC) AS rank_lex
+    FROM lexical_top t
 ),
 rrf AS (
     SELECT
@@ -393,6 +592,7 @@ ranked AS (
     SELECT
         rrf.embedding_id,
         rrf.ad_id,
+        ads.external_id,
         rrf.item_type,
         rrf.text,
         rrf.meta,
@@ -400,6 +600,7 @@ ranked AS (
         ads.product_name,
         ads.one_line_summary,
         ads.format_type,
+        ads.year,
         ads.hero_analysis,
         ads.performance_metrics,
         rrf.rrf_score,
@@ -413,6 +614,7 @@ ranked AS (
 SELECT
     embedding_id,
     ad_id,
+    external_id,
     item_type,
     text,
     meta,
@@ -420,6 +622,7 @@ SELECT
     product_name,
     one_line_summary,
     format_type,
+    year,
     hero_analysis,
     performance_metrics,
     rrf_score,
@@ -430,8 +633,313 @@ CROSS JOIN params p2
 WHERE rn <= p2.q_limit;
 $$;
 
--- Efficient count aggregation function for dashboard
--- Returns all ad counts in a single query instead of N+1 queries
+-- Batch variant for evaluation and bulk analytics: one round trip runs the
+-- hybrid search for every (embedding, text) pair. Embeddings are passed as
+-- pgvector text literals (NULL = lexical only) and cast per query.
+DROP FUNCTION IF EXISTS match_embedding_items_hybrid_batch(text[], text[], integer, text[], jsonb);
+CREATE OR REPLACE FUNCTION match_embedding_items_hybrid_batch(
+    query_embeddings text[],
+    query_texts text[],
+    limit_count integer DEFAULT 50,
+    item_types text[] DEFAULT NULL,
+    filters jsonb DEFAULT '{}'::jsonb,
+    lexical_limit integer DEFAULT NULL
+)
+RETURNS TABLE (
+    query_index integer,
+    embedding_id uuid,
+    ad_id uuid,
+    external_id text,
+    item_type text,
+    text text,
+    meta jsonb,
+    brand_name text,
+    product_name text,
+    one_line_summary text,
+    format_type text,
+    year integer,
+    hero_analysis jsonb,
+    performance_metrics jsonb,
+    rrf_score double precision,
+    semantic_rank integer,
+    lexical_rank integer
+)
+LANGUAGE sql
+STABLE
+AS $$
+SELECT (q.ord - 1)::integer AS query_index, m.*
+FROM unnest(query_embeddings, query_texts) WITH ORDINALITY AS q(embedding, query_text, ord)
+CROSS JOIN LATERAL match_embedding_items_hybrid(
+    q.embedding::vector(1536),
+    q.query_text,
+    limit_count,
+    item_types,
+    filters,
+    lexical_limit
+) m
+ORDER BY q.ord, m.rrf_score DESC;
+$$;
+
+-- Faceted variant: the same ranked rows plus facet counts over that fused
+-- candidate set, in one round trip. Counts are distinct ads per brand, year,
+-- format_type, product_category and item_type, computed with one GROUPING SETS
+-- aggregate. The facets jsonb is set on the first row only (NULL elsewhere):
+--   {"brand": [{"value": "Tesco", "count": 12}, ...], "year": [...], ...}
+DROP FUNCTION IF EXISTS match_embedding_items_hybrid_faceted(vector, text, integer, text[], jsonb);
+CREATE OR REPLACE FUNCTION match_embedding_items_hybrid_faceted(
+    query_embedding vector(1536),
+    query_text text,
+    limit_count integer DEFAULT 50,
+    item_types text[] DEFAULT NULL,
+    filters jsonb DEFAULT '{}'::jsonb,
+    lexical_limit integer DEFAULT NULL
+)
+RETURNS TABLE (
+    embedding_id uuid,
+    ad_id uuid,
+    external_id text,
+    item_type text,
+    text text,
+    meta jsonb,
+    brand_name text,
+    product_name text,
+    one_line_summary text,
+    format_type text,
+    year integer,
+    hero_analysis jsonb,
+    performance_metrics jsonb,
+    rrf_score double precision,
+    semantic_rank integer,
+    lexical_rank integer,
+    facets jsonb
+)
+LANGUAGE sql
+STABLE
+AS $$
+WITH hits AS MATERIALIZED (
+    SELECT m.*, ROW_NUMBER() OVER (ORDER BY m.rrf_score DESC) AS rn
+    FROM match_embedding_items_hybrid(
+        query_embedding, query_text, limit_count, item_types, filters, lexical_limit
+    ) m
+),
+facet_counts AS (
+    SELECT
+        CASE
+            WHEN GROUPING(a.brand_name) = 0 THEN 'brand'
+            WHEN GROUPING(a.year) = 0 THEN 'year'
+            WHEN GROUPING(a.format_type) = 0 THEN 'format_type'
+            WHEN GROUPING(a.product_category) = 0 THEN 'product_category'
+            ELSE 'item_type'
+        END AS facet,
+        COALESCE(a.brand_name, a.year::text, a.format_type, a.product_category, h.item_type) AS value,
+        count(DISTINCT h.ad_id) AS ad_count
+    FROM hits h
+    JOIN ads a ON a.id = h.ad_id
+    GROUP BY GROUPING SETS ((a.brand_name), (a.year), (a.format_type), (a.product_category), (h.item_type))
+),
+facet_json AS (
+    SELECT jsonb_object_agg(facet, bucket_list) AS facets
+    FROM (
+        SELECT
+            facet,
+            jsonb_agg(
+                jsonb_build_object('value', value, 'count', ad_count)
+                ORDER BY ad_count DESC, value
+            ) AS bucket_list
+        FROM facet_counts
+        -- Ads missing a facet value are not counted under it
+        WHERE value IS NOT NULL AND btrim(value) <> ''
+        GROUP BY facet
+    ) per_facet
+)
+SELECT
+    h.embedding_id,
+    h.ad_id,
+    h.external_id,
+    h.item_type,
+    h.text,
+    h.meta,
+    h.brand_name,
+    h.product_name,
+    h.one_line_summary,
+    h.format_type,
+    h.year,
+    h.hero_analysis,
+    h.performance_metrics,
+    h.rrf_score,
+    h.semantic_rank,
+    h.lexical_rank,
+    CASE WHEN h.rn = 1 THEN COALESCE((SELECT facets FROM facet_json), '{}'::jsonb) END
+FROM hits h
+ORDER BY h.rn;
+$$;
+
+-- Maintained aggregates: per-ad child counters, a brand directory with ad
+-- counts and archive-wide totals. Triggers keep them current on every write
+-- path (Postgres and HTTP backends alike), so the dashboard browse list,
+-- /api/brands and /api/stats are constant-time reads.
+ALTER TABLE ads ADD COLUMN IF NOT EXISTS chunk_count integer NOT NULL DEFAULT 0;
+ALTER TABLE ads ADD COLUMN IF NOT EXISTS segment_count integer NOT NULL DEFAULT 0;
+ALTER TABLE ads ADD COLUMN IF NOT EXISTS storyboard_count integer NOT NULL DEFAULT 0;
+ALTER TABLE ads ADD COLUMN IF NOT EXISTS embedding_count integer NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS brands (
+    brand_name text PRIMARY KEY,
+    ad_count integer NOT NULL DEFAULT 0,
+    updated_at timestamptz DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS archive_stats (
+    id integer PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    total_ads bigint NOT NULL DEFAULT 0,
+    total_brands bigint NOT NULL DEFAULT 0,
+    updated_at timestamptz DEFAULT now()
+);
+
+-- Statement-level: one UPDATE per insert/delete batch, grouped by ad.
+-- TG_ARGV[0] names the ads counter column for the child table.
+CREATE OR REPLACE FUNCTION ads_adjust_child_count()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        EXECUTE format(
+            'UPDATE ads a SET %1$I = a.%1$I + d.n '
+            'FROM (SELECT ad_id, count(*) AS n FROM new_rows GROUP BY ad_id) d '
+            'WHERE a.id = d.ad_id',
+            TG_ARGV[0]
+        );
+    ELSE
+        EXECUTE format(
+            'UPDATE ads a SET %1$I = GREATEST(a.%1$I - d.n, 0) '
+            'FROM (SELECT ad_id, count(*) AS n FROM old_rows GROUP BY ad_id) d '
+            'WHERE a.id = d.ad_id',
+            TG_ARGV[0]
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+    child record;
+BEGIN
+    FOR child IN
+        SELECT * FROM (VALUES
+            ('ad_chunks', 'chunk_count'),
+            ('ad_segments', 'segment_count'),
+            ('ad_storyboards', 'storyboard_count'),
+            ('embedding_items', 'embedding_count')
+        ) AS t(table_name, counter)
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_count_insert ON %I', child.table_name, child.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_count_insert AFTER INSERT ON %I '
+            'REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT '
+            'EXECUTE FUNCTION ads_adjust_child_count(%L)',
+            child.table_name, child.table_name, child.counter
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_count_delete ON %I', child.table_name, child.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_count_delete AFTER DELETE ON %I '
+            'REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT '
+            'EXECUTE FUNCTION ads_adjust_child_count(%L)',
+            child.table_name, child.table_name, child.counter
+        );
+    END LOOP;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION ads_maintain_brand_counts()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.brand_name IS NOT DISTINCT FROM NEW.brand_name THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') AND coalesce(OLD.brand_name, '') <> '' THEN
+        UPDATE brands SET ad_count = ad_count - 1, updated_at = now()
+        WHERE brand_name = OLD.brand_name;
+        DELETE FROM brands WHERE brand_name = OLD.brand_name AND ad_count <= 0;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND coalesce(NEW.brand_name, '') <> '' THEN
+        INSERT INTO brands (brand_name, ad_count) VALUES (NEW.brand_name, 1)
+        ON CONFLICT (brand_name)
+        DO UPDATE SET ad_count = brands.ad_count + 1, updated_at = now();
+    END IF;
+    IF TG_OP <> 'UPDATE' THEN
+        UPDATE archive_stats
+        SET total_ads = total_ads + CASE WHEN TG_OP = 'INSERT' THEN 1 ELSE -1 END,
+            updated_at = now()
+        WHERE id = 1;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_ads_brand_counts ON ads;
+CREATE TRIGGER trg_ads_brand_counts
+    AFTER INSERT OR DELETE OR UPDATE OF brand_name ON ads
+    FOR EACH ROW EXECUTE FUNCTION ads_maintain_brand_counts();
+
+CREATE OR REPLACE FUNCTION brands_maintain_total()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE archive_stats
+    SET total_brands = total_brands + CASE WHEN TG_OP = 'INSERT' THEN 1 ELSE -1 END,
+        updated_at = now()
+    WHERE id = 1;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_brands_total ON brands;
+CREATE TRIGGER trg_brands_total
+    AFTER INSERT OR DELETE ON brands
+    FOR EACH ROW EXECUTE FUNCTION brands_maintain_total();
+
+-- Recompute every aggregate from the base tables (backfill / drift repair).
+CREATE OR REPLACE FUNCTION refresh_ad_aggregates()
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE ads a
+    SET chunk_count = (SELECT count(*) FROM ad_chunks WHERE ad_id = a.id),
+        segment_count = (SELECT count(*) FROM ad_segments WHERE ad_id = a.id),
+        storyboard_count = (SELECT count(*) FROM ad_storyboards WHERE ad_id = a.id),
+        embedding_count = (SELECT count(*) FROM embedding_items WHERE ad_id = a.id);
+
+    DELETE FROM brands;
+    INSERT INTO brands (brand_name, ad_count)
+    SELECT brand_name, count(*) FROM ads
+    WHERE coalesce(brand_name, '') <> ''
+    GROUP BY brand_name;
+
+    INSERT INTO archive_stats (id, total_ads, total_brands)
+    VALUES (1, (SELECT count(*) FROM ads), (SELECT count(*) FROM brands))
+    ON CONFLICT (id) DO UPDATE
+    SET total_ads = EXCLUDED.total_ads,
+        total_brands = EXCLUDED.total_brands,
+        updated_at = now();
+END;
+$$;
+
+-- Backfill on first apply (no-op once archive_stats exists).
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM archive_stats) THEN
+        PERFORM refresh_ad_aggregates();
+    END IF;
+END;
+$$;
+
+-- Per-ad child counts for the dashboard (reads the maintained counters).
 CREATE OR REPLACE FUNCTION get_ad_counts()
 RETURNS TABLE (
     ad_id uuid,
@@ -443,16 +951,520 @@ RETURNS TABLE (
 LANGUAGE sql
 STABLE
 AS $$
-SELECT 
-    a.id as ad_id,
-    COALESCE(c.cnt, 0) as chunk_count,
-    COALESCE(s.cnt, 0) as segment_count,
-    COALESCE(sb.cnt, 0) as storyboard_count,
-    COALESCE(e.cnt, 0) as embedding_count
+SELECT
+    a.id AS ad_id,
+    a.chunk_count::bigint,
+    a.segment_count::bigint,
+    a.storyboard_count::bigint,
+    a.embedding_count::bigint
+FROM ads a;
+$$;
+
+
+-- Shared second tier for the retrieval caches (CACHE_BACKEND=postgres).
+-- Values are opaque bytes written by tvads_rag.cache.PostgresCacheTier.
+CREATE TABLE IF NOT EXISTS query_cache (
+    namespace text NOT NULL,
+    key text NOT NULL,
+    value bytea NOT NULL,
+    expires_at timestamptz,
+    created_at timestamptz DEFAULT now(),
+    PRIMARY KEY (namespace, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_query_cache_expires_at ON query_cache (expires_at) WHERE expires_at IS NOT NULL;
+
+-- Corpus generation counter. The ingestion write path bumps it whenever ads or
+-- embeddings change; retrieval result caches include it in their keys, so a
+-- bump invalidates every cached result at once across all API workers.
+CREATE TABLE IF NOT EXISTS corpus_state (
+    id integer PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    generation bigint NOT NULL DEFAULT 0,
+    updated_at timestamptz DEFAULT now()
+);
+
+INSERT INTO corpus_state (id, generation) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_corpus_generation()
+RETURNS bigint
+LANGUAGE sql
+VOLATILE
+AS $$
+UPDATE corpus_state
+SET generation = generation + 1, updated_at = now()
+WHERE id = 1
+RETURNING generation;
+$$;
+
+-- Deleting ads always bumps the generation, whichever path deletes them
+-- (reset_ads, delete_ad, the SQL editor), so cached results never outlive
+-- the ads they point at.
+CREATE OR REPLACE FUNCTION ads_bump_generation_on_delete()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM old_rows) THEN
+        PERFORM bump_corpus_generation();
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_ads_bump_generation_on_delete ON ads;
+CREATE TRIGGER trg_ads_bump_generation_on_delete
+    AFTER DELETE ON ads
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION ads_bump_generation_on_delete();
+
+-- Precomputed ad-level similarity graph backing /api/ads/{id}/similar.
+-- Rows are written by tvads_rag.neighbors (full rebuild or incremental update
+-- after each ingest); the endpoint is a single indexed lookup.
+CREATE TABLE IF NOT EXISTS ad_neighbors (
+    ad_id uuid NOT NULL REFERENCES ads(id) ON DELETE CASCADE,
+    neighbor_ad_id uuid NOT NULL REFERENCES ads(id) ON DELETE CASCADE,
+    rank smallint NOT NULL,
+    similarity real NOT NULL,
+    computed_at timestamptz DEFAULT now(),
+    PRIMARY KEY (ad_id, neighbor_ad_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ad_neighbors_ad_rank ON ad_neighbors (ad_id, rank);
+
+-- Per-ad centroid of all embedding_items vectors (NULL ad_ids = every ad).
+CREATE OR REPLACE FUNCTION ad_centroids(ad_ids uuid[] DEFAULT NULL)
+RETURNS TABLE (ad_id uuid, centroid real[])
+LANGUAGE sql
+STABLE
+AS $$
+SELECT ei.ad_id, avg(ei.embedding)::real[] AS centroid
+FROM embedding_items ei
+WHERE ad_ids IS NULL OR ei.ad_id = ANY(ad_ids)
+GROUP BY ei.ad_id
+ORDER BY ei.ad_id;
+$$;
+
+-- Stored per-ad centroids. refresh_ad_centroids recomputes only the given ads
+-- (NULL = all), so an incremental neighbour update never re-averages the whole
+-- embedding_items table.
+CREATE TABLE IF NOT EXISTS ad_embedding_centroids (
+    ad_id uuid PRIMARY KEY REFERENCES ads(id) ON DELETE CASCADE,
+    centroid real[] NOT NULL,
+    computed_at timestamptz DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION refresh_ad_centroids(p_ad_ids uuid[] DEFAULT NULL)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    targets uuid[];
+    refreshed integer;
+BEGIN
+    IF p_ad_ids IS NULL THEN
+        DELETE FROM ad_embedding_centroids;
+        INSERT INTO ad_embedding_centroids (ad_id, centroid)
+        SELECT c.ad_id, c.centroid FROM ad_centroids(NULL) c;
+    ELSE
+        -- Also picks up ads embedded while ingest-time updates were disabled
+        SELECT coalesce(array_agg(t.id), '{}') INTO targets
+        FROM (
+            SELECT unnest(p_ad_ids) AS id
+            UNION
+            SELECT a.id
+            FROM ads a
+            WHERE NOT EXISTS (SELECT 1 FROM ad_embedding_centroids s WHERE s.ad_id = a.id)
+              AND EXISTS (SELECT 1 FROM embedding_items ei WHERE ei.ad_id = a.id)
+        ) t;
+        -- Ads that lost all their embeddings drop out of the store
+        DELETE FROM ad_embedding_centroids s WHERE s.ad_id = ANY(targets);
+        INSERT INTO ad_embedding_centroids (ad_id, centroid)
+        SELECT c.ad_id, c.centroid FROM ad_centroids(targets) c;
+    END IF;
+    GET DIAGNOSTICS refreshed = ROW_COUNT;
+    RETURN refreshed;
+END;
+$$;
+
+-- Ads whose stored neighbour list includes any of p_ad_ids. A re-ingested ad
+-- may have moved, so these lists are recomputed rather than trusted.
+CREATE INDEX IF NOT EXISTS idx_ad_neighbors_neighbor ON ad_neighbors (neighbor_ad_id);
+
+CREATE OR REPLACE FUNCTION ad_neighbor_referrers(p_ad_ids uuid[])
+RETURNS TABLE (ad_id uuid)
+LANGUAGE sql
+STABLE
+AS $$
+SELECT DISTINCT n.ad_id
+FROM ad_neighbors n
+WHERE n.neighbor_ad_id = ANY(p_ad_ids)
+ORDER BY n.ad_id;
+$$;
+
+-- Current k-th (lowest stored) similarity per ad, used by the incremental
+-- update to decide which existing ads a newly ingested ad can displace.
+CREATE OR REPLACE FUNCTION ad_neighbor_floors()
+RETURNS TABLE (ad_id uuid, min_similarity real, neighbor_count bigint)
+LANGUAGE sql
+STABLE
+AS $$
+SELECT n.ad_id, min(n.similarity), count(*)
+FROM ad_neighbors n
+GROUP BY n.ad_id
+ORDER BY n.ad_id;
+$$;
+
+CREATE OR REPLACE FUNCTION similar_ads(p_external_id text, p_limit integer DEFAULT 10)
+RETURNS TABLE (
+    id uuid,
+    external_id text,
+    brand_name text,
+    product_name text,
+    one_line_summary text,
+    similarity real
+)
+LANGUAGE sql
+STABLE
+AS $$
+SELECT a.id, a.external_id, a.brand_name, a.product_name, a.one_line_summary, n.similarity
+FROM ads src
+JOIN ad_neighbors n ON n.ad_id = src.id
+JOIN ads a ON a.id = n.neighbor_ad_id
+WHERE src.external_id = p_external_id
+ORDER BY n.rank
+LIMIT p_limit;
+$$;
+
+-- ads.updated_at backs the API's ETags, so bump it on every row change that
+-- does not set it explicitly (corrections, asset-URL backfills, counters).
+CREATE OR REPLACE FUNCTION ads_touch_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_ads_touch_updated_at ON ads;
+CREATE TRIGGER trg_ads_touch_updated_at
+    BEFORE UPDATE ON ads
+    FOR EACH ROW
+    WHEN (OLD.updated_at IS NOT DISTINCT FROM NEW.updated_at)
+    EXECUTE FUNCTION ads_touch_updated_at();
+
+-- Typeahead terms (brand, product, category) with their ad counts. With
+-- p_since, only terms of ads changed after it are returned (recounted over all
+-- ads), so the API can refresh its prefix index incrementally. as_of is the
+-- watermark to pass as p_since next time. Only terms still in use are
+-- returned (weight >= 1): a term an ad was renamed away from is not reported,
+-- so incremental refreshes keep it until the next full rebuild.
+CREATE INDEX IF NOT EXISTS idx_ads_updated_at ON ads (updated_at);
+
+CREATE OR REPLACE FUNCTION suggestion_terms(p_since timestamptz DEFAULT NULL)
+RETURNS TABLE (kind text, term text, weight bigint, as_of timestamptz)
+LANGUAGE sql
+STABLE
+AS $$
+WITH terms AS (
+    SELECT t.kind, btrim(t.term) AS term, a.updated_at
+    FROM ads a
+    CROSS JOIN LATERAL (VALUES
+        ('brand', a.brand_name),
+        ('product', a.product_name),
+        ('category', a.product_category)
+    ) AS t(kind, term)
+    WHERE coalesce(btrim(t.term), '') <> ''
+),
+changed AS (
+    SELECT DISTINCT terms.kind, terms.term
+    FROM terms
+    -- The overlap re-reads writes whose transaction began before the last
+    -- watermark but committed after it; recounting them is idempotent.
+    WHERE p_since IS NULL OR terms.updated_at > p_since - interval '5 minutes'
+)
+SELECT t.kind, t.term, count(*)::bigint, now()
+FROM terms t
+JOIN changed c ON c.kind = t.kind AND c.term = t.term
+GROUP BY t.kind, t.term;
+$$;
+
+-- Sitemap feed: ads in external_id order. The covering index makes both the
+-- shard summary and each shard page index-only scans (no heap reads for
+-- all-visible pages), so crawlers never sort or OFFSET through the table.
+CREATE INDEX IF NOT EXISTS idx_ads_sitemap ON ads (external_id) INCLUDE (updated_at)
+    WHERE external_id IS NOT NULL;
+
+-- One row per sitemap shard of shard_size ads: the first external_id (the
+-- keyset start of the shard page), its size and the newest updated_at in it.
+CREATE OR REPLACE FUNCTION sitemap_shards(shard_size integer DEFAULT 5000)
+RETURNS TABLE (shard integer, first_external_id text, ad_count bigint, last_modified timestamptz)
+LANGUAGE sql
+STABLE
+AS $$
+SELECT
+    ((n.rn - 1) / GREATEST(shard_size, 1))::integer AS shard,
+    min(n.external_id) AS first_external_id,
+    count(*) AS ad_count,
+    max(n.updated_at) AS last_modified
+FROM (
+    SELECT a.external_id, a.updated_at, ROW_NUMBER() OVER (ORDER BY a.external_id) AS rn
+    FROM ads a
+    WHERE a.external_id IS NOT NULL
+) n
+GROUP BY 1
+ORDER BY 1;
+$$;
+
+-- Promoted impact scores for leaderboards. Each score is a STORED generated
+-- column extracted from impact_scores / hero_analysis, so every write path
+-- keeps it current and rankings are btree scans instead of JSONB parsing.
+-- Non-numeric values (the LLM occasionally returns "N/A") and scores outside
+-- 0..max_score (impact scores are 0-10, hero overall_score 0-100) become NULL
+-- rather than failing the write or topping the leaderboard.
+CREATE OR REPLACE FUNCTION safe_score(value text, max_score real)
+RETURNS real
+LANGUAGE sql
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+SELECT CASE
+    WHEN value ~ '^\s*[-+]?[0-9]{1,6}(\.[0-9]+)?\s*$' THEN
+        CASE WHEN value::real BETWEEN 0 AND max_score THEN value::real END
+END;
+$$;
+
+DO $$
+DECLARE
+    score record;
+    add_columns text[] := '{}';
+    create_indexes text[] := '{}';
+    statement text;
+BEGIN
+    FOR score IN
+        SELECT * FROM (VALUES
+            ('impact_overall', 'impact_scores', 'overall_impact', 10),
+            ('impact_pulse', 'impact_scores', 'pulse_score', 10),
+            ('impact_echo', 'impact_scores', 'echo_score', 10),
+            ('impact_hook_power', 'impact_scores', 'hook_power', 10),
+            ('impact_brand_integration', 'impact_scores', 'brand_integration', 10),
+            ('impact_emotional_resonance', 'impact_scores', 'emotional_resonance', 10),
+            ('impact_clarity', 'impact_scores', 'clarity_score', 10),
+            ('impact_distinctiveness', 'impact_scores', 'distinctiveness', 10),
+            ('hero_overall_score', 'hero_analysis', NULL, 100)
+        ) AS t(column_name, source, field, max_score)
+    LOOP
+        add_columns := add_columns || format(
+            'ADD COLUMN IF NOT EXISTS %I real GENERATED ALWAYS AS (safe_score(%s, %s)) STORED',
+            score.column_name,
+            -- hero_analysis.overall_score is a plain number, not {"score": ...}
+            CASE WHEN score.field IS NULL
+                THEN format('%I->>%L', score.source, 'overall_score')
+                ELSE format('%I->%L->>%L', score.source, score.field, 'score')
+            END,
+            score.max_score
+        );
+        -- Archive-wide top-N / threshold scans
+        create_indexes := create_indexes || format(
+            'CREATE INDEX IF NOT EXISTS %I ON ads (%I DESC NULLS LAST, id)',
+            'idx_ads_' || score.column_name, score.column_name
+        );
+        -- Per-category leaderboards ("top hook power in automotive")
+        create_indexes := create_indexes || format(
+            'CREATE INDEX IF NOT EXISTS %I ON ads (lower(product_category), %I DESC NULLS LAST, id)',
+            'idx_ads_category_' || score.column_name, score.column_name
+        );
+    END LOOP;
+    -- One ALTER TABLE, so ads is rewritten once rather than once per column
+    EXECUTE 'ALTER TABLE ads ' || array_to_string(add_columns, ', ');
+    FOREACH statement IN ARRAY create_indexes LOOP
+        EXECUTE statement;
+    END LOOP;
+END;
+$$;
+
+-- Emotional curve per ad, resampled at ingest (tvads_rag/emotion_arc.py) from
+-- emotional_metrics.emotional_timeline.readings: EMOTION_ARC_POINTS intensity
+-- samples followed by the same number of valence samples over normalised ad
+-- time. Arc similarity loads these compact arrays instead of parsing JSONB.
+ALTER TABLE ads ADD COLUMN IF NOT EXISTS emotional_arc real[];
+
+-- Exact-quote transcript search ("because you're worth it").
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- One row per Whisper segment of ads.raw_transcript, so a quote resolves to
+-- the second it is spoken. Maintained from ads by trigger; the app never
+-- writes it.
+CREATE TABLE IF NOT EXISTS ad_transcript_segments (
+    ad_id uuid NOT NULL REFERENCES ads(id) ON DELETE CASCADE,
+    segment_index integer NOT NULL,
+    start_time numeric,
+    end_time numeric,
+    text text NOT NULL,
+    PRIMARY KEY (ad_id, segment_index)
+);
+
+CREATE OR REPLACE FUNCTION transcript_segment_rows(p_ad_id uuid, p_transcript jsonb)
+RETURNS TABLE (
+    ad_id uuid,
+    segment_index integer,
+    start_time numeric,
+    end_time numeric,
+    text text
+)
+LANGUAGE sql
+IMMUTABLE
+AS $$
+SELECT
+    p_ad_id,
+    (s.ord - 1)::integer,
+    CASE WHEN jsonb_typeof(s.seg->'start') = 'number' THEN (s.seg->>'start')::numeric END,
+    CASE WHEN jsonb_typeof(s.seg->'end') = 'number' THEN (s.seg->>'end')::numeric END,
+    btrim(s.seg->>'text')
+FROM jsonb_array_elements(
+    CASE WHEN jsonb_typeof(p_transcript->'segments') = 'array'
+         THEN p_transcript->'segments' ELSE '[]'::jsonb END
+) WITH ORDINALITY AS s(seg, ord)
+WHERE jsonb_typeof(s.seg) = 'object'
+  AND coalesce(btrim(s.seg->>'text'), '') <> '';
+$$;
+
+CREATE OR REPLACE FUNCTION ads_sync_transcript_segments()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    DELETE FROM ad_transcript_segments WHERE ad_id = NEW.id;
+    INSERT INTO ad_transcript_segments (ad_id, segment_index, start_time, end_time, text)
+    SELECT * FROM transcript_segment_rows(NEW.id, NEW.raw_transcript);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_ads_transcript_segments_insert ON ads;
+CREATE TRIGGER trg_ads_transcript_segments_insert
+    AFTER INSERT ON ads
+    FOR EACH ROW
+    WHEN (NEW.raw_transcript IS NOT NULL)
+    EXECUTE FUNCTION ads_sync_transcript_segments();
+
+DROP TRIGGER IF EXISTS trg_ads_transcript_segments_update ON ads;
+CREATE TRIGGER trg_ads_transcript_segments_update
+    AFTER UPDATE OF raw_transcript ON ads
+    FOR EACH ROW
+    WHEN (OLD.raw_transcript IS DISTINCT FROM NEW.raw_transcript)
+    EXECUTE FUNCTION ads_sync_transcript_segments();
+
+-- Backfill ads written before the trigger existed (no-op once populated).
+INSERT INTO ad_transcript_segments (ad_id, segment_index, start_time, end_time, text)
+SELECT r.*
 FROM ads a
-LEFT JOIN (SELECT ad_id, COUNT(*) as cnt FROM ad_chunks GROUP BY ad_id) c ON c.ad_id = a.id
-LEFT JOIN (SELECT ad_id, COUNT(*) as cnt FROM ad_segments GROUP BY ad_id) s ON s.ad_id = a.id
-LEFT JOIN (SELECT ad_id, COUNT(*) as cnt FROM ad_storyboards GROUP BY ad_id) sb ON sb.ad_id = a.id
-LEFT JOIN (SELECT ad_id, COUNT(*) as cnt FROM embedding_items GROUP BY ad_id) e ON e.ad_id = a.id;
+CROSS JOIN LATERAL transcript_segment_rows(a.id, a.raw_transcript) r
+WHERE a.raw_transcript IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM ad_transcript_segments t WHERE t.ad_id = a.id);
+
+-- Trigram indexes answer literal substring matches (ILIKE '%quote%'); the
+-- 'simple' tsvector indexes answer phrase matches that ignore case and
+-- punctuation. 'simple' keeps stop words, so "you're worth it" stays a
+-- five-word phrase rather than collapsing to 'worth'.
+CREATE INDEX IF NOT EXISTS idx_ad_transcript_segments_text_trgm
+    ON ad_transcript_segments USING gin (text gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_ad_transcript_segments_text_fts
+    ON ad_transcript_segments USING gin (to_tsvector('simple', text));
+CREATE INDEX IF NOT EXISTS idx_ad_chunks_text_trgm
+    ON ad_chunks USING gin (text gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_ad_chunks_text_fts
+    ON ad_chunks USING gin (to_tsvector('simple', coalesce(text, '')));
+
+-- ILIKE pattern matching p_phrase literally (escapes \, % and _).
+CREATE OR REPLACE FUNCTION transcript_like_pattern(p_phrase text)
+RETURNS text
+LANGUAGE sql
+IMMUTABLE
+AS $$
+SELECT '%' || replace(replace(replace(p_phrase, '\', '\\'), '%', '\%'), '_', '\_') || '%';
 $$;
 
+-- Spoken lines containing p_phrase, best first: literal matches, then phrase
+-- matches (same words in order, ignoring case and punctuation) unless
+-- p_exact_only. Whisper segments give second-level timestamps; analysis chunks
+-- are searched only for ads with no segment hit (e.g. a quote spanning two
+-- segments). snippet wraps the matched words in <mark>.
+CREATE OR REPLACE FUNCTION search_transcript_phrase(
+    p_phrase text,
+    p_limit integer DEFAULT 20,
+    p_exact_only boolean DEFAULT false
+)
+RETURNS TABLE (
+    ad_id uuid,
+    external_id text,
+    brand_name text,
+    product_name text,
+    one_line_summary text,
+    video_url text,
+    source text,
+    start_time numeric,
+    end_time numeric,
+    snippet text,
+    exact boolean,
+    rank real
+)
+LANGUAGE sql
+STABLE
+AS $$
+WITH segment_hits AS (
+    SELECT s.ad_id, 'segment'::text AS source, s.start_time, s.end_time, s.text
+    FROM ad_transcript_segments s
+    WHERE s.text ILIKE transcript_like_pattern(p_phrase)
+       OR (
+           NOT p_exact_only
+           AND numnode(phraseto_tsquery('simple', p_phrase)) > 0
+           AND to_tsvector('simple', s.text) @@ phraseto_tsquery('simple', p_phrase)
+       )
+),
+chunk_hits AS (
+    SELECT c.ad_id, 'chunk'::text AS source, c.start_time, c.end_time, c.text
+    FROM ad_chunks c
+    WHERE (
+        c.text ILIKE transcript_like_pattern(p_phrase)
+        OR (
+            NOT p_exact_only
+            AND numnode(phraseto_tsquery('simple', p_phrase)) > 0
+            AND to_tsvector('simple', coalesce(c.text, '')) @@ phraseto_tsquery('simple', p_phrase)
+        )
+    )
+      AND NOT EXISTS (SELECT 1 FROM segment_hits h WHERE h.ad_id = c.ad_id)
+),
+hits AS (
+    SELECT * FROM segment_hits
+    UNION ALL
+    SELECT * FROM chunk_hits
+)
+SELECT
+    a.id,
+    a.external_id,
+    a.brand_name,
+    a.product_name,
+    a.one_line_summary,
+    a.video_url,
+    h.source,
+    h.start_time,
+    h.end_time,
+    CASE WHEN numnode(phraseto_tsquery('simple', p_phrase)) > 0
+         THEN ts_headline(
+             'simple', h.text, phraseto_tsquery('simple', p_phrase),
+             'StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=12, MaxFragments=1'
+         )
+         ELSE left(h.text, 240)
+    END,
+    h.text ILIKE transcript_like_pattern(p_phrase),
+    CASE WHEN numnode(phraseto_tsquery('simple', p_phrase)) > 0
+         THEN ts_rank_cd(to_tsvector('simple', h.text), phraseto_tsquery('simple', p_phrase))
+         ELSE 0
+    END::real
+FROM hits h
+JOIN ads a ON a.id = h.ad_id
+ORDER BY 11 DESC, 12 DESC, a.external_id, h.start_time NULLS LAST
+LIMIT p_limit;
+$$;
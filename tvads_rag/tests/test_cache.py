@@ -0,0 +1,84 @@
+import pytest
+
+from tvads_rag import cache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    lru = cache.LRUCache(maxsize=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    assert lru.stats.evictions == 1
+    assert lru.stats.hits == 2
+
+
+def test_lru_cache_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    lru = cache.LRUCache(maxsize=4, ttl_seconds=10)
+    lru.set("a", 1)
+    now[0] = 111.0
+    assert lru.get("a") is None
+
+
+def test_tiered_cache_promotes_from_sqlite_tier(tmp_path):
+    tier = cache.SQLiteCacheTier(str(tmp_path / "cache.sqlite"))
+    writer = cache.TieredCache(
+        "ns", cache.LRUCache(maxsize=4), tier, encode=str.encode, decode=bytes.decode
+    )
+    writer.set("k", "value")
+
+    reader = cache.TieredCache(
+        "ns", cache.LRUCache(maxsize=4), tier, encode=str.encode, decode=bytes.decode
+    )
+    assert reader.get("k") == "value"
+    assert reader.tier_stats.hits == 1
+    assert reader.get("k") == "value"
+    assert reader.memory.stats.hits == 1
+
+
+def test_postgres_tier_purges_expired_rows_at_most_once_per_interval(monkeypatch):
+    from contextlib import contextmanager
+
+    db = pytest.importorskip("tvads_rag.db")
+
+    statements = []
+
+    class Cursor:
+        rowcount = 3
+
+        def execute(self, sql, params=None):
+            statements.append(" ".join(sql.split()))
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    class Connection:
+        def cursor(self):
+            return Cursor()
+
+    @contextmanager
+    def fake_get_connection():
+        yield Connection()
+
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(db, "get_connection", fake_get_connection)
+    tier = cache.PostgresCacheTier(purge_interval_seconds=60)
+
+    tier.set("ns", "a", b"1", 10)
+    tier.set("ns", "b", b"2", 10)
+    now[0] += 61
+    tier.set("ns", "c", b"3", 10)
+
+    purges = [sql for sql in statements if sql.startswith("DELETE FROM query_cache")]
+    assert len(purges) == 2
+    assert "expires_at <= now()" in purges[0]
+    assert sum(sql.startswith("INSERT INTO query_cache") for sql in statements) == 3
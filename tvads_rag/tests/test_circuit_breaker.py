@@ -0,0 +1,170 @@
+import pytest
+
+from tvads_rag import circuit_breaker
+from tvads_rag.config import CircuitBreakerConfig
+
+
+def _config(**overrides):
+    values = dict(
+        enabled=True,
+        window_size=4,
+        min_calls=2,
+        error_rate_threshold=0.5,
+        slow_rate_threshold=1.0,
+        open_seconds=30.0,
+    )
+    values.update(overrides)
+    return CircuitBreakerConfig(**values)
+
+
+def _fail():
+    raise RuntimeError("provider down")
+
+
+def test_breaker_opens_on_error_rate_and_fails_fast():
+    breaker = circuit_breaker.CircuitBreaker("test", _config(), slow_call_seconds=10.0)
+    calls = []
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            breaker.call(_fail)
+    assert breaker.state == circuit_breaker.OPEN
+
+    with pytest.raises(circuit_breaker.CircuitOpenError) as exc_info:
+        breaker.call(lambda: calls.append("called"))
+    assert calls == []
+    assert exc_info.value.retry_after > 0
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_breaker_half_open_probe_closes_on_success(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = circuit_breaker.CircuitBreaker("test", _config(), slow_call_seconds=10.0)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            breaker.call(_fail)
+
+    now[0] += 31.0
+    assert breaker.state == circuit_breaker.HALF_OPEN
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == circuit_breaker.CLOSED
+
+
+def test_breaker_trips_on_slow_calls(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = circuit_breaker.CircuitBreaker(
+        "test", _config(slow_rate_threshold=0.5), slow_call_seconds=1.0
+    )
+
+    def slow():
+        now[0] += 2.0
+        return "late"
+
+    breaker.call(slow)
+    breaker.call(slow)
+    assert breaker.state == circuit_breaker.OPEN
+
+
+def test_ignored_exceptions_do_not_count_as_failures():
+    breaker = circuit_breaker.CircuitBreaker(
+        "test", _config(), slow_call_seconds=10.0, ignore_exceptions=(ValueError,)
+    )
+
+    def bad_input():
+        raise ValueError("bad input")
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            breaker.call(bad_input)
+    assert breaker.state == circuit_breaker.CLOSED
+
+
+def _open_then_half_open(breaker, now):
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            breaker.call(_fail)
+    now[0] += 31.0
+    assert breaker.state == circuit_breaker.HALF_OPEN
+
+
+def test_interrupted_or_ignored_probe_frees_the_slot_without_closing(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = circuit_breaker.CircuitBreaker(
+        "test",
+        _config(),
+        slow_call_seconds=10.0,
+        ignore_exceptions=(ValueError,),
+        is_failure=lambda exc: not isinstance(exc, LookupError),
+    )
+    _open_then_half_open(breaker, now)
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    def bad_input():
+        raise ValueError("bad input")
+
+    def not_found():
+        raise KeyError("missing")
+
+    for func, error in ((interrupted, KeyboardInterrupt), (bad_input, ValueError), (not_found, KeyError)):
+        with pytest.raises(error):
+            breaker.call(func)
+        assert breaker.state == circuit_breaker.HALF_OPEN
+
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == circuit_breaker.CLOSED
+
+
+def test_supabase_breaker_counts_outages_not_request_errors():
+    supabase_db = pytest.importorskip("tvads_rag.supabase_db")
+    from postgrest.exceptions import APIError
+
+    assert not supabase_db._is_outage(APIError({"code": "23505", "message": "duplicate key"}))
+    assert not supabase_db._is_outage(APIError({"code": "PGRST204", "message": "unknown column"}))
+    assert not supabase_db._is_outage(APIError({"code": 404, "message": "not JSON"}))
+    assert supabase_db._is_outage(APIError({"code": "57014", "message": "statement timeout"}))
+    assert supabase_db._is_outage(APIError({"code": "PGRST001", "message": "no connection"}))
+    assert supabase_db._is_outage(APIError({"code": 503, "message": "not JSON"}))
+    assert supabase_db._is_outage(ConnectionError("reset"))
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class APITimeoutError(Exception):
+    """Stands in for the SDK timeout errors, which carry no status."""
+
+
+def test_provider_breakers_count_outages_but_not_client_errors():
+    assert not circuit_breaker.is_outage(_StatusError(400))
+    assert not circuit_breaker.is_outage(ValueError("bad input"))
+    assert circuit_breaker.is_outage(_StatusError(429))
+    assert circuit_breaker.is_outage(_StatusError(503))
+    assert circuit_breaker.is_outage(APITimeoutError())
+    assert circuit_breaker.is_outage(ConnectionResetError())
+    assert circuit_breaker.is_client_error(_StatusError(422))
+    assert not circuit_breaker.is_client_error(_StatusError(429))
+
+    circuit_breaker.reset_breakers()
+    calls = []
+
+    @circuit_breaker.protected("test.provider")
+    def rejected():
+        calls.append(1)
+        raise _StatusError(400)
+
+    try:
+        for _ in range(25):
+            with pytest.raises(_StatusError):
+                rejected()
+        assert circuit_breaker.get_breaker("test.provider").state == circuit_breaker.CLOSED
+        assert len(calls) == 25
+    finally:
+        circuit_breaker.reset_breakers()
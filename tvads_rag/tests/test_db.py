@@ -53,4 +53,257 @@ def test_hybrid_search_calls_rpc(monkeypatch):
     assert cursor.params[0].startswith("[0.1")
     assert cursor.params[2] == 5
     assert cursor.params[3] == ["claim"]
+    # Unset HYBRID_LEXICAL_LIMIT lets SQL keep 4 x limit keyword matches
+    assert cursor.params[5] is None
 
+
+def test_hybrid_search_passes_configured_lexical_limit(monkeypatch):
+    cursor = FakeCursor([])
+    conn = FakeConnection(cursor)
+
+    @contextmanager
+    def fake_get_connection():
+        yield conn
+
+    monkeypatch.setenv("HYBRID_LEXICAL_LIMIT", "500")
+    db.get_search_budget_config.cache_clear()
+    monkeypatch.setattr(db, "get_connection", fake_get_connection)
+    try:
+        db.hybrid_search(None, "tesco", limit=10)
+    finally:
+        db.get_search_budget_config.cache_clear()
+
+    assert "%s::jsonb,\n            %s::int" in cursor.sql
+    assert cursor.params[5] == 500
+
+
+
+def test_hybrid_search_passes_normalised_filters(monkeypatch):
+    cursor = FakeCursor([])
+    conn = FakeConnection(cursor)
+
+    @contextmanager
+    def fake_get_connection():
+        yield conn
+
+    monkeypatch.setattr(db, "get_connection", fake_get_connection)
+
+    db.hybrid_search([0.1], "offer", filters={"brand": "Tesco", "year": 2023, "claim_type": "price"})
+
+    assert cursor.params[4].adapted == {
+        "brands": ["tesco"],
+        "year_from": 2023,
+        "year_to": 2023,
+        "claim_type": "price",
+    }
+
+
+def test_normalise_search_filters_drops_empty_and_rejects_unknown():
+    assert db.normalise_search_filters({"brands": [], "has_celeb": None}) == {}
+    assert db.normalise_search_filters({"format_types": ["Spot", "spot"]}) == {"format_types": ["spot"]}
+    with pytest.raises(ValueError):
+        db.normalise_search_filters({"colour": "red"})
+    with pytest.raises(ValueError):
+        db.normalise_search_filters({"year_from": 2024, "year_to": 2020})
+
+
+def test_get_connection_reuses_pooled_connections(monkeypatch):
+    opened = []
+
+    class PooledConnection:
+        closed = 0
+
+        def commit(self):
+            pass
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            self.closed = 1
+
+    def fake_connect(url, cursor_factory=None):
+        conn = PooledConnection()
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setenv("SUPABASE_DB_URL", "postgresql://example/db")
+    monkeypatch.setenv("DB_POOL_MAX_SIZE", "2")
+    db.get_db_config.cache_clear()
+    db.close_pool()
+    monkeypatch.setattr(db.psycopg2, "connect", fake_connect)
+    try:
+        for _ in range(3):
+            with db.get_connection():
+                pass
+        with pytest.raises(db.psycopg2.OperationalError):
+            with db.get_connection():
+                raise db.psycopg2.OperationalError("server closed the connection")
+        with db.get_connection() as conn:
+            assert conn is opened[-1]
+    finally:
+        db.close_pool()
+        db.get_db_config.cache_clear()
+
+    # One connection served the first three calls; the broken one was replaced.
+    assert len(opened) == 2
+    assert opened[0].closed
+
+
+def test_pool_acquire_times_out_and_replaces_dead_idle_connections(monkeypatch):
+    opened = []
+
+    class PooledConnection:
+        closed = 0
+        dead = False
+
+        def cursor(self):
+            conn = self
+
+            class Cursor:
+                def __enter__(self):
+                    return self
+
+                def __exit__(self, *exc):
+                    return False
+
+                def execute(self, query, params=None):
+                    if conn.dead:
+                        raise db.psycopg2.OperationalError("SSL connection has been closed unexpectedly")
+
+            return Cursor()
+
+        def commit(self):
+            pass
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            self.closed = 1
+
+    def fake_connect(url, cursor_factory=None):
+        conn = PooledConnection()
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setenv("SUPABASE_DB_URL", "postgresql://example/db")
+    monkeypatch.setenv("DB_POOL_MAX_SIZE", "1")
+    monkeypatch.setenv("DB_POOL_ACQUIRE_TIMEOUT_SECONDS", "0.05")
+    monkeypatch.setenv("DB_POOL_PING_AFTER_SECONDS", "0.01")
+    db.get_db_config.cache_clear()
+    db.close_pool()
+    monkeypatch.setattr(db.psycopg2, "connect", fake_connect)
+    try:
+        with db.get_connection():
+            with pytest.raises(db.PoolTimeout):
+                with db.get_connection():
+                    pass
+        opened[0].dead = True
+        db.time.sleep(0.02)
+        with db.get_connection() as conn:
+            assert conn is opened[1]
+    finally:
+        db.close_pool()
+        db.get_db_config.cache_clear()
+
+    assert opened[0].closed
+
+
+class RecordingCursor(FakeCursor):
+    """FakeCursor that keeps every ``(sql, params)`` it is asked to execute."""
+
+    def __init__(self, rows, one=None):
+        super().__init__(rows)
+        self.one = one
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+    def fetchone(self):
+        return self.one
+
+
+@pytest.fixture
+def recording_db(monkeypatch):
+    """
+    Route ``db.get_connection`` to a RecordingCursor. Returns a factory taking
+    the ``fetchall`` rows, the ``fetchone`` row and whether statements are
+    prepared; it returns the list the executed statements are recorded in.
+    """
+    monkeypatch.setenv("SUPABASE_DB_URL", "postgresql://example/db")
+
+    def install(rows=(), one=None, *, prepared=False):
+        monkeypatch.setenv("DB_PREPARED_STATEMENTS", "1" if prepared else "0")
+        db.get_db_config.cache_clear()
+        conn = FakeConnection(RecordingCursor(list(rows), one))
+
+        @contextmanager
+        def fake_get_connection():
+            yield conn
+
+        monkeypatch.setattr(db, "get_connection", fake_get_connection)
+        return conn._cursor.statements
+
+    yield install
+    db.get_db_config.cache_clear()
+
+
+def test_get_ad_by_external_id_projects_columns_and_prepares_once(recording_db):
+    statements = recording_db(one={"id": "ad-1", "external_id": "TA1"}, prepared=True)
+
+    for _ in range(2):
+        assert db.get_ad_by_external_id("TA1", include=["impact_scores"])["id"] == "ad-1"
+    with pytest.raises(ValueError):
+        db.get_ad_by_external_id("TA1", include=["not_a_column"])
+
+    prepares = [sql for sql, _ in statements if sql.startswith("PREPARE")]
+    assert len(prepares) == 1
+    assert "SELECT *" not in prepares[0]
+    assert "impact_scores" in prepares[0] and "raw_transcript" not in prepares[0]
+    executes = [(sql, params) for sql, params in statements if sql.startswith("EXECUTE")]
+    assert len(executes) == 2 and executes[0][1] == ("TA1",)
+
+
+def test_stats_and_brands_read_maintained_aggregates(recording_db):
+    statements = recording_db(
+        [{"brand_name": "Acme", "ad_count": 3}], one={"total_ads": 42, "total_brands": 7}
+    )
+
+    assert db.stats() == {"total_ads": 42, "total_brands": 7}
+    assert db.list_brands() == ["Acme"]
+    assert db.list_brand_counts() == [{"brand_name": "Acme", "ad_count": 3}]
+
+    sqls = [sql for sql, _ in statements]
+    assert all("count(" not in sql.lower() and "distinct" not in sql.lower() for sql in sqls)
+    assert "archive_stats" in sqls[0] and "FROM brands" in sqls[1]
+
+
+def test_impact_leaderboard_filters_and_orders_by_promoted_column(recording_db):
+    statements = recording_db([{"external_id": "TA1", "score": 9.1}])
+
+    rows = db.impact_leaderboard("hook_power", 50, category="Automotive", year_from=2022)
+    with pytest.raises(ValueError):
+        db.impact_leaderboard("not_a_metric")
+
+    assert rows == [{"external_id": "TA1", "score": 9.1}]
+    sql, params = statements[0]
+    assert "impact_scores" not in sql
+    assert "ORDER BY impact_hook_power DESC NULLS LAST, id" in sql
+    assert "lower(product_category) = lower(%s)" in sql and "brand_name)" not in sql
+    assert params == ["Automotive", 2022, 50]
+
+
+def test_search_transcript_phrase_cleans_quote_before_querying(recording_db):
+    statements = recording_db([{"external_id": "TA1", "start_time": 4.2}])
+
+    rows = db.search_transcript_phrase('  "because  you\'re worth it" ', 10, exact_only=True)
+    with pytest.raises(ValueError):
+        db.search_transcript_phrase(' "ok" ')
+
+    assert rows == [{"external_id": "TA1", "start_time": 4.2}]
+    assert len(statements) == 1
+    sql, params = statements[0]
+    assert "search_transcript_phrase(%s, %s, %s)" in sql
+    assert params == ("because you're worth it", 10, True)
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from tvads_rag.config import EmotionArcConfig
+from tvads_rag.emotion_arc import ArcSearch, arc_from_metrics, resample_arc
+
+POINTS = 16
+
+
+def _config(**overrides):
+    values = dict(points=POINTS, shortlist=10, dtw_window=0.2, refresh_seconds=600)
+    values.update(overrides)
+    return EmotionArcConfig(**values)
+
+
+def _peak_arc(centre):
+    """Intensity spike at ``centre`` (0..1), flat valence."""
+    grid = np.linspace(0.0, 1.0, POINTS)
+    intensity = np.exp(-(((grid - centre) / 0.08) ** 2))
+    return [float(v) for v in np.concatenate([intensity, np.full(POINTS, 0.2)])]
+
+
+def test_resample_arc_normalises_time_and_clips_ranges():
+    timeline = {
+        "readings": [
+            {"t_s": 15, "intensity": 1.5, "valence": 1.0},
+            {"t_s": 0, "intensity": 0.2, "valence": -2},
+            {"t_s": "bad", "intensity": 0.9},
+        ]
+    }
+    assert resample_arc(timeline, 30, 5) == [0.2, 0.6, 1.0, 1.0, 1.0, -1.0, 0.0, 1.0, 1.0, 1.0]
+    # Without a duration the last reading marks the end of the ad
+    assert resample_arc(timeline, None, 3) == [0.2, 0.6, 1.0, -1.0, 0.0, 1.0]
+    assert resample_arc({"readings": []}, 30, 5) is None
+    assert arc_from_metrics(None) is None
+    assert len(arc_from_metrics({"emotional_timeline": timeline}, 30)) == 2 * 32
+
+
+def test_similar_to_prefers_time_shifted_peak_with_dtw():
+    rows = [
+        {"id": "1", "external_id": "TA1", "emotional_arc": _peak_arc(0.3)},
+        {"id": "2", "external_id": "TA2", "emotional_arc": _peak_arc(0.4)},
+        {"id": "3", "external_id": "TA3", "emotional_arc": [0.2] * POINTS + [0.2] * POINTS},
+        {"id": "4", "external_id": "TA4", "emotional_arc": [0.0] * 10},
+    ]
+    search = ArcSearch(_config(), fetch=lambda: rows)
+
+    # Point-by-point, the flat arc is closer than the same peak a little later...
+    plain = search.similar_to("TA1", 5, dtw=False)
+    assert [r["external_id"] for r in plain] == ["TA3", "TA2"]
+    # ...while warping aligns the peaks
+    warped = search.similar_to("TA1", 5)
+    assert [r["external_id"] for r in warped] == ["TA2", "TA3"]
+    assert warped[0]["distance"] < plain[1]["distance"]
+    assert "emotional_arc" not in warped[0]
+
+    # Wrong-length arcs are skipped, so TA4 has no arc to search with
+    assert search.similar_to("TA4") is None
+    assert search.stats() == {"ads": 3, "points": POINTS}
+
+
+def test_requests_reuse_the_index_until_refresh_swaps_in_a_new_one():
+    loads = []
+
+    def fetch():
+        loads.append(1)
+        return [{"external_id": f"TA{n}", "emotional_arc": [0.0] * (2 * POINTS)} for n in range(len(loads))]
+
+    search = ArcSearch(_config(refresh_seconds=0.001), fetch=fetch)
+    first = search.index()
+    assert search.index() is first and len(loads) == 1
+
+    assert search.refresh() == 2
+    assert search.index() is not first and len(search.index()) == 2
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from tvads_rag import neighbors
+
+
+def _centroids():
+    return [
+        {"ad_id": "a", "centroid": [1.0, 0.0, 0.0]},
+        {"ad_id": "b", "centroid": [0.9, 0.1, 0.0]},
+        {"ad_id": "c", "centroid": [0.0, 1.0, 0.0]},
+        {"ad_id": "d", "centroid": [0.0, 0.9, 0.2]},
+        {"ad_id": "zero", "centroid": [0.0, 0.0, 0.0]},
+    ]
+
+
+def test_top_k_matches_brute_force_and_excludes_self():
+    ids, matrix = neighbors.build_matrix(_centroids())
+    assert ids == ["a", "b", "c", "d"]
+
+    ranked = neighbors.top_k(matrix, range(len(ids)), 2, batch_size=3)
+
+    sims = matrix @ matrix.T
+    for row, pairs in ranked.items():
+        expected = [col for col in np.argsort(-sims[row]) if col != row][:2]
+        assert [col for col, _ in pairs] == expected
+        assert pairs[0][1] == pytest.approx(float(sims[row, expected[0]]))
+        assert pairs[0][1] >= pairs[1][1]
+
+
+def test_affected_rows_only_includes_ads_a_new_ad_can_displace():
+    ids, matrix = neighbors.build_matrix(_centroids())
+    floors = {
+        "a": {"min_similarity": 0.5, "neighbor_count": 1},
+        "c": {"min_similarity": 0.99, "neighbor_count": 1},
+        "d": {"min_similarity": 0.2, "neighbor_count": 1},
+    }
+
+    # "b" is new: it beats a's current K-th similarity but not c's or d's.
+    rows = neighbors.affected_rows(matrix, ids, [ids.index("b")], floors, k=1)
+
+    assert [ids[row] for row in rows] == ["a", "b"]
+
+
+def _stub_store(monkeypatch, referrers=()):
+    refreshed = []
+    monkeypatch.setattr(neighbors.db_backend, "refresh_ad_centroids", lambda ad_ids: refreshed.append(ad_ids) or 0)
+    monkeypatch.setattr(neighbors.db_backend, "fetch_stored_centroids", _centroids)
+    monkeypatch.setattr(neighbors.db_backend, "get_neighbor_referrers", lambda ad_ids: list(referrers))
+
+    def full_recompute(ad_ids=None):
+        raise AssertionError("incremental updates must not recompute every centroid")
+
+    monkeypatch.setattr(neighbors.db_backend, "fetch_ad_centroids", full_recompute)
+    return refreshed
+
+
+def test_update_for_ads_writes_new_and_displaced_lists(monkeypatch):
+    written = {}
+    refreshed = _stub_store(monkeypatch)
+    monkeypatch.setattr(
+        neighbors.db_backend,
+        "get_neighbor_floors",
+        lambda: {
+            "a": {"min_similarity": 0.0, "neighbor_count": 1},
+            "c": {"min_similarity": 0.98, "neighbor_count": 1},
+            "d": {"min_similarity": 0.98, "neighbor_count": 1},
+        },
+    )
+    monkeypatch.setattr(neighbors.db_backend, "replace_ad_neighbors", lambda rows: written.update(rows) or 0)
+
+    assert neighbors.update_for_ads(["b"], k=1) == 2
+    assert written["b"][0][0] == "a"
+    assert written["a"][0][0] == "b"
+    assert set(written) == {"a", "b"}
+    assert refreshed == [["b"]]
+
+
+def test_update_for_ads_recomputes_lists_that_include_a_reingested_ad(monkeypatch):
+    written = {}
+    _stub_store(monkeypatch, referrers=["d", "gone"])
+    monkeypatch.setattr(
+        neighbors.db_backend,
+        "get_neighbor_floors",
+        lambda: {ad_id: {"min_similarity": 0.99, "neighbor_count": 1} for ad_id in "abcd"},
+    )
+    monkeypatch.setattr(neighbors.db_backend, "replace_ad_neighbors", lambda rows: written.update(rows) or 0)
+
+    # "c" moved; "d" lists it but no floor trips, so only the stale check catches it.
+    # "gone" no longer has embeddings: its list is cleared.
+    assert neighbors.update_for_ads(["c", "gone"], k=1) == 3
+    assert set(written) == {"c", "d", "gone"}
+    assert written["gone"] == []
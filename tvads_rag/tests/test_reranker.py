@@ -4,6 +4,13 @@ from tvads_rag import reranker
 from tvads_rag.config import RerankConfig
 
 
+@pytest.fixture(autouse=True)
+def _fresh_rerank_state():
+    reranker.reset_rerank_state()
+    yield
+    reranker.reset_rerank_state()
+
+
 def test_rerank_candidates_no_provider_returns_slice():
     cfg = RerankConfig(provider="none", model_name=None, api_key=None)
     candidates = [{"text": "a"}, {"text": "b"}, {"text": "c"}]
@@ -39,3 +46,75 @@ def test_cohere_rerank_orders_by_scores(monkeypatch):
     assert [row["text"] for row in ranked] == ["third", "first", "second"]
     assert ranked[0]["rerank_score"] == pytest.approx(0.9)
 
+
+
+def test_local_rerank_orders_by_cross_encoder_scores(monkeypatch):
+    cfg = RerankConfig(
+        provider="local", model_name="minilm", api_key=None, model_path="/models/minilm", batch_size=2
+    )
+    candidates = [{"text": "first"}, {"text": "second"}, {"text": "third"}]
+
+    class FakeEncoder:
+        def score(self, query_text, documents, batch_size):
+            assert batch_size == 2
+            return [{"first": 0.2, "second": 0.7, "third": 0.4}[doc] for doc in documents]
+
+    monkeypatch.setattr(reranker, "_get_local_cross_encoder", lambda *args: FakeEncoder())
+
+    ranked = reranker.rerank_candidates("query", candidates, top_n=2, config=cfg)
+    assert [row["text"] for row in ranked] == ["second", "third"]
+    assert ranked[0]["rerank_score"] == pytest.approx(0.7)
+
+
+def test_prune_candidates_drops_low_rrf_duplicates_and_empty_text():
+    cfg = RerankConfig(provider="cohere", model_name="m", api_key="k", max_per_ad=1, prune_rrf_ratio=0.5)
+    candidates = [
+        {"embedding_id": "e1", "ad_id": "a", "text": "alpha one", "rrf_score": 0.032},
+        {"embedding_id": "e2", "ad_id": "a", "text": "alpha two", "rrf_score": 0.030},
+        {"embedding_id": "e3", "ad_id": "b", "text": "", "rrf_score": 0.029},
+        {"embedding_id": "e4", "ad_id": "c", "text": "gamma", "rrf_score": 0.025},
+        {"embedding_id": "e5", "ad_id": "d", "text": "delta", "rrf_score": 0.009},
+    ]
+    kept, pruned = reranker.prune_candidates(candidates, top_n=2, config=cfg)
+    assert [c["embedding_id"] for c in kept] == ["e1", "e4"]
+    assert [c["embedding_id"] for c in pruned] == ["e2", "e3", "e5"]
+
+
+def test_rerank_candidates_returns_only_scored_rows(monkeypatch):
+    cfg = RerankConfig(provider="cohere", model_name="m", api_key="k", prune_rrf_ratio=0.5)
+    monkeypatch.setattr(reranker, "_cohere_scores", lambda query, docs, config: [0.1] * len(docs))
+    candidates = [
+        {"embedding_id": "e1", "text": "alpha", "rrf_score": 0.03},
+        {"embedding_id": "e2", "text": "beta", "rrf_score": 0.02},
+        {"embedding_id": "e3", "text": "", "rrf_score": 0.02},
+        {"embedding_id": "e4", "text": "delta", "rrf_score": 0.001},
+    ]
+
+    ranked = reranker.rerank_candidates("query", candidates, top_n=4, config=cfg)
+
+    # e4 is refilled to reach top_n and scored; the empty e3 is dropped
+    assert [row["embedding_id"] for row in ranked] == ["e1", "e2", "e4"]
+    assert all(row["rerank_score"] == 0.1 for row in ranked)
+
+
+def test_rerank_scores_are_cached_per_query_and_embedding(monkeypatch):
+    cfg = RerankConfig(provider="cohere", model_name="m", api_key="k")
+    sent = []
+
+    def fake_scores(query_text, documents, config):
+        sent.append(list(documents))
+        return [len(doc) / 10 for doc in documents]
+
+    monkeypatch.setattr(reranker, "_cohere_scores", fake_scores)
+    page_one = [{"embedding_id": "e1", "text": "short"}, {"embedding_id": "e2", "text": "much longer"}]
+    page_two = page_one + [{"embedding_id": "e3", "text": "medium"}]
+
+    first = reranker.rerank_candidates("EV ads", page_one, top_n=2, config=cfg)
+    second = reranker.rerank_candidates("  ev ADS ", page_two, top_n=3, config=cfg)
+
+    assert [row["embedding_id"] for row in first] == ["e2", "e1"]
+    assert [row["embedding_id"] for row in second] == ["e2", "e3", "e1"]
+    assert sent == [["short", "much longer"], ["medium"]]
+    stats = reranker.rerank_stats()
+    assert stats["documents_sent"] == 3
+    assert stats["score_cache"]["hits"] == 2
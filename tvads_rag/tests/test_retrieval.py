@@ -6,6 +6,18 @@ from tvads_rag import retrieval, reranker
 from tvads_rag.config import RerankConfig
 
 
+@pytest.fixture(autouse=True)
+def _isolated_caches(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.delenv("CACHE_BACKEND", raising=False)
+    retrieval.get_openai_config.cache_clear()
+    retrieval.get_cache_config.cache_clear()
+    retrieval.get_search_budget_config.cache_clear()
+    retrieval.reset_caches()
+    yield
+    retrieval.reset_caches()
+
+
 def test_retrieve_with_rerank_invokes_reranker(monkeypatch):
     monkeypatch.setattr(retrieval.embeddings, "embed_texts", lambda texts: [[0.1, 0.2]])
     candidates = [{"text": "one"}, {"text": "two"}]
@@ -29,3 +41,362 @@ def test_retrieve_with_rerank_validates_limits():
     with pytest.raises(ValueError):
         retrieval.retrieve_with_rerank("query", candidate_k=0)
 
+
+
+def test_embed_query_caches_normalised_queries(monkeypatch):
+    calls = []
+
+    def fake_embed(texts):
+        calls.append(texts)
+        return [[0.5, 0.25]]
+
+    monkeypatch.setattr(retrieval.embeddings, "embed_texts", fake_embed)
+
+    first = retrieval.embed_query("Car ads  with dogs")
+    second = retrieval.embed_query("car ads with DOGS ")
+
+    assert first == second == [0.5, 0.25]
+    assert calls == [["car ads with dogs"]]
+    stats = retrieval.cache_stats()["query_embedding"]["memory"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_retrieve_with_rerank_caches_results_per_corpus_generation(monkeypatch):
+    generation = [7]
+    searches = []
+    monkeypatch.setattr(retrieval.embeddings, "embed_texts", lambda texts: [[0.1, 0.2]])
+    monkeypatch.setattr(retrieval.db_helpers, "get_corpus_generation", lambda: generation[0])
+
+    def fake_search(*args, **kwargs):
+        searches.append(args)
+        return [{"text": "one", "rrf_score": 0.5}]
+
+    monkeypatch.setattr(retrieval.db_helpers, "hybrid_search", fake_search)
+    monkeypatch.setattr(retrieval, "is_rerank_enabled", lambda _: False)
+
+    first = retrieval.retrieve_with_rerank("Christmas ads", final_k=1)
+    second = retrieval.retrieve_with_rerank("christmas  ads", final_k=1)
+    assert first == second
+    assert len(searches) == 1
+
+    # An ingest bump changes the key; force a re-read of the generation.
+    generation[0] = 8
+    retrieval._corpus_generation = None
+    retrieval.retrieve_with_rerank("Christmas ads", final_k=1)
+    assert len(searches) == 2
+
+
+def test_semantic_cache_is_opt_in_and_never_fills_the_exact_cache(monkeypatch):
+    searches = []
+    monkeypatch.setattr(retrieval.embeddings, "embed_texts", lambda texts: [[0.1, 0.2]])
+    monkeypatch.setattr(retrieval.db_helpers, "get_corpus_generation", lambda: 1)
+    monkeypatch.setattr(retrieval, "is_rerank_enabled", lambda _: False)
+
+    def fake_search(*args, **kwargs):
+        searches.append(args[1])
+        return [{"text": args[1]}]
+
+    monkeypatch.setattr(retrieval.db_helpers, "hybrid_search", fake_search)
+
+    assert retrieval.get_cache_config().semantic_cache_enabled is False
+    retrieval.retrieve_with_rerank("tesco ads 2019", final_k=1)
+    retrieval.retrieve_with_rerank("tesco ads 2020", final_k=1)
+    assert searches == ["tesco ads 2019", "tesco ads 2020"]
+
+    monkeypatch.setenv("SEMANTIC_CACHE_ENABLED", "1")
+    retrieval.get_cache_config.cache_clear()
+    retrieval.reset_caches()
+    searches.clear()
+    retrieval.retrieve_with_rerank("tesco ads 2019", final_k=1)
+    borrowed = retrieval.retrieve_with_rerank("tesco ads 2020", final_k=1)
+    assert borrowed == [{"text": "tesco ads 2019"}]
+    assert searches == ["tesco ads 2019"]
+    # Only the query that actually ran is in the exact result cache
+    assert len(retrieval._get_result_cache().memory) == 1
+
+
+def test_retrieve_with_budget_falls_back_to_lexical_when_embedding_fails(monkeypatch):
+    def failing_embed(texts):
+        raise RuntimeError("embedding provider down")
+
+    seen = {}
+
+    def fake_search(embedding, query_text, limit, item_types, **kwargs):
+        seen["embedding"] = embedding
+        seen["timeout_ms"] = kwargs["timeout_ms"]
+        return [{"text": "lexical hit", "rrf_score": 0.1}]
+
+    monkeypatch.setattr(retrieval.embeddings, "embed_texts", failing_embed)
+    monkeypatch.setattr(retrieval.db_helpers, "get_corpus_generation", lambda: 1)
+    monkeypatch.setattr(retrieval.db_helpers, "hybrid_search", fake_search)
+    monkeypatch.setattr(retrieval, "is_rerank_enabled", lambda _: False)
+
+    outcome = retrieval.retrieve_with_budget("meerkat ads", budget_ms=1000, final_k=1)
+
+    assert seen["embedding"] is None
+    assert 0 < seen["timeout_ms"] <= 1000
+    assert outcome.skipped_stages == ["embedding"]
+    assert outcome.hedged
+    assert outcome.results == [{"text": "lexical hit", "rrf_score": 0.1}]
+    # Degraded results are not cached.
+    assert retrieval.cache_stats()["results"]["memory_size"] == 0
+
+
+def test_rejected_embedding_is_not_hedged(monkeypatch):
+    class BadRequest(Exception):
+        status_code = 400
+
+    calls = []
+
+    def rejecting_embed(texts):
+        calls.append(texts)
+        raise BadRequest("input is empty")
+
+    monkeypatch.setattr(retrieval.embeddings, "embed_texts", rejecting_embed)
+    monkeypatch.setattr(retrieval.db_helpers, "get_corpus_generation", lambda: 1)
+    monkeypatch.setattr(retrieval.db_helpers, "hybrid_search", lambda *args, **kwargs: [])
+    monkeypatch.setattr(retrieval, "is_rerank_enabled", lambda _: False)
+
+    outcome = retrieval.retrieve_with_budget("meerkat deals", budget_ms=1000, final_k=1)
+
+    assert len(calls) == 1 and not outcome.hedged
+    assert outcome.skipped_stages == ["embedding"]
+
+
+def test_retrieve_with_budget_skips_rerank_when_budget_is_low(monkeypatch):
+    monkeypatch.setenv("SEARCH_RERANK_MIN_REMAINING_MS", "60000")
+    monkeypatch.setattr(retrieval.embeddings, "embed_texts", lambda texts: [[0.1, 0.2]])
+    monkeypatch.setattr(retrieval.db_helpers, "get_corpus_generation", lambda: 1)
+    candidates = [{"text": "one", "rrf_score": 0.2}, {"text": "two", "rrf_score": 0.1}]
+    monkeypatch.setattr(retrieval.db_helpers, "hybrid_search", lambda *args, **kwargs: candidates)
+    monkeypatch.setattr(retrieval, "is_rerank_enabled", lambda _: True)
+
+    def unexpected_rerank(*args, **kwargs):
+        raise AssertionError("rerank should be skipped")
+
+    monkeypatch.setattr(reranker, "rerank_candidates", unexpected_rerank)
+
+    outcome = retrieval.retrieve_with_budget("brand offer", budget_ms=1000, final_k=1)
+    assert outcome.skipped_stages == ["rerank"]
+    assert [row["text"] for row in outcome.results] == ["one"]
+
+
+def test_stage_pools_are_separate_and_skip_work_queued_past_its_deadline():
+    assert retrieval._get_executor("embed") is not retrieval._get_executor("rerank")
+    calls = []
+
+    expired = retrieval._submit("search", retrieval.time.monotonic() - 1, calls.append, "late")
+    assert isinstance(expired.exception(timeout=5), retrieval.DeadlineExceeded)
+    live = retrieval._submit("search", retrieval.time.monotonic() + 5, calls.append, "on time")
+    live.result(timeout=5)
+    assert calls == ["on time"]
+
+
+def test_search_page_serves_later_pages_from_search_token(monkeypatch):
+    calls = []
+
+    def fake_retrieve(query_text, **kwargs):
+        calls.append(kwargs)
+        return retrieval.BudgetedRetrieval(results=[{"text": f"r{idx}"} for idx in range(5)])
+
+    monkeypatch.setattr(retrieval, "retrieve_with_budget", fake_retrieve)
+
+    first = retrieval.search_page("dog ads", limit=2)
+    second = retrieval.search_page("Dog  ads", limit=2, cursor=first.next_cursor)
+    third = retrieval.search_page("dog ads", limit=2, cursor=second.next_cursor)
+
+    assert [row["text"] for row in first.results + second.results + third.results] == [
+        "r0", "r1", "r2", "r3", "r4"
+    ]
+    assert third.next_cursor is None
+    assert second.retrieval is None
+    assert len(calls) == 1 and calls[0]["final_k"] >= 2
+    with pytest.raises(retrieval.pagination.InvalidCursor):
+        retrieval.search_page("cat ads", limit=2, cursor=first.next_cursor)
+
+
+def test_degraded_first_page_is_not_stored_under_a_search_token(monkeypatch):
+    monkeypatch.setattr(
+        retrieval,
+        "retrieve_with_budget",
+        lambda query_text, **kwargs: retrieval.BudgetedRetrieval(
+            results=[{"text": f"r{idx}"} for idx in range(5)], skipped_stages=["rerank"]
+        ),
+    )
+
+    page = retrieval.search_page("dog ads", limit=2)
+
+    assert [row["text"] for row in page.results] == ["r0", "r1"]
+    assert page.next_cursor is None
+
+
+def test_retrieve_with_budget_reports_lexical_then_fused_results(monkeypatch):
+    import threading
+
+    lexical_reported = threading.Event()
+
+    def slow_embed(texts):
+        lexical_reported.wait(5)
+        return [[0.1, 0.2]]
+
+    def fake_search(embedding, query_text, limit, item_types, filters=None, timeout_ms=None):
+        if embedding is None:
+            return [{"text": "keyword", "rrf_score": 0.3}]
+        return [{"text": "one", "rrf_score": 0.2}, {"text": "two", "rrf_score": 0.1}]
+
+    monkeypatch.setattr(retrieval.embeddings, "embed_texts", slow_embed)
+    monkeypatch.setattr(retrieval.db_helpers, "get_corpus_generation", lambda: 1)
+    monkeypatch.setattr(retrieval.db_helpers, "hybrid_search", fake_search)
+    monkeypatch.setattr(retrieval, "is_rerank_enabled", lambda _: True)
+    monkeypatch.setattr(
+        reranker,
+        "rerank_candidates",
+        lambda query, docs, top_n, config: [{"text": "two", "rerank_score": 0.9}],
+    )
+
+    events = []
+
+    def on_partial(stage, rows):
+        events.append((stage, [row["text"] for row in rows]))
+        lexical_reported.set()
+
+    outcome = retrieval.retrieve_with_budget(
+        "brand offer", budget_ms=5000, final_k=1, on_partial=on_partial
+    )
+
+    assert events == [("lexical", ["keyword"]), ("fused", ["one"])]
+    assert [row["text"] for row in outcome.results] == ["two"]
+
+    # The embedding is cached now, so a repeat streamed search skips the preview
+    events.clear()
+    retrieval.retrieve_with_budget(
+        "Brand  offer", budget_ms=5000, final_k=1, on_partial=on_partial, use_cache=False
+    )
+    assert events == [("fused", ["one"])]
+
+
+def test_retrieve_batch_shares_embedding_and_sql_round_trip(monkeypatch):
+    embed_calls = []
+    sql_calls = []
+
+    def fake_embed(texts):
+        embed_calls.append(list(texts))
+        return [[float(len(text)), 0.0] for text in texts]
+
+    def fake_batch(vectors, texts, limit, item_types, filters=None, timeout_ms=None):
+        sql_calls.append(list(texts))
+        return [[{"text": f"{text}-{rank}", "rrf_score": 1.0 / (rank + 1)} for rank in range(3)] for text in texts]
+
+    monkeypatch.setattr(retrieval.embeddings, "embed_texts", fake_embed)
+    monkeypatch.setattr(retrieval.db_helpers, "get_corpus_generation", lambda: 1)
+    monkeypatch.setattr(retrieval.db_helpers, "hybrid_search_batch", fake_batch)
+    monkeypatch.setattr(retrieval, "is_rerank_enabled", lambda _: True)
+
+    def fake_rerank(query, docs, top_n, config):
+        if query == "bad":
+            raise RuntimeError("provider down")
+        return list(reversed(docs))[:top_n]
+
+    monkeypatch.setattr(reranker, "rerank_candidates", fake_rerank)
+
+    first = retrieval.retrieve_batch(["dog", "Dog ", "bad"], final_k=2)
+
+    assert embed_calls == [["dog", "bad"]]
+    assert len(sql_calls) == 1
+    assert [row["text"] for row in first[0]] == ["dog-2", "dog-1"]
+    assert [row["text"] for row in first[2]] == ["bad-0", "bad-1"]
+
+    # Reranked queries are cached; the failed rerank is retried.
+    retrieval.retrieve_batch(["dog", "bad"], final_k=2)
+    assert sql_calls[-1] == ["bad"]
+
+
+def test_retrieve_batch_bounds_rerank_concurrency_and_passes_timeout(monkeypatch):
+    import threading
+
+    monkeypatch.setenv("SEARCH_BATCH_RERANK_CONCURRENCY", "2")
+    retrieval.get_search_budget_config.cache_clear()
+    seen = {}
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def fake_batch(vectors, texts, limit, item_types, filters=None, timeout_ms=None):
+        seen["timeout_ms"] = timeout_ms
+        return [[{"text": text, "rrf_score": 0.1}] for text in texts]
+
+    def slow_rerank(query, docs, top_n, config):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        retrieval.time.sleep(0.02)
+        with lock:
+            running["now"] -= 1
+        return docs
+
+    monkeypatch.setattr(retrieval.embeddings, "embed_texts", lambda texts: [[0.1] for _ in texts])
+    monkeypatch.setattr(retrieval.db_helpers, "get_corpus_generation", lambda: 1)
+    monkeypatch.setattr(retrieval.db_helpers, "hybrid_search_batch", fake_batch)
+    monkeypatch.setattr(retrieval, "is_rerank_enabled", lambda _: True)
+    monkeypatch.setattr(reranker, "rerank_candidates", slow_rerank)
+
+    results = retrieval.retrieve_batch([f"q{i}" for i in range(6)], final_k=1, timeout_ms=5000)
+
+    assert [rows[0]["text"] for rows in results] == [f"q{i}" for i in range(6)]
+    assert running["peak"] <= 2
+    assert 0 < seen["timeout_ms"] <= 5000
+
+
+def test_search_page_returns_facets_from_the_same_round_trip(monkeypatch):
+    monkeypatch.setattr(retrieval.embeddings, "embed_texts", lambda texts: [[0.1, 0.2]])
+    monkeypatch.setattr(retrieval.db_helpers, "get_corpus_generation", lambda: 1)
+    monkeypatch.setattr(retrieval, "is_rerank_enabled", lambda _: False)
+    facets = {"brand": [{"value": "Tesco", "count": 2}]}
+    calls = []
+
+    def fake_faceted(*args, **kwargs):
+        calls.append(args)
+        return [{"text": "one", "rrf_score": 0.5}, {"text": "two", "rrf_score": 0.4}], facets
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError("faceted searches must not make a second query")
+
+    monkeypatch.setattr(retrieval.db_helpers, "hybrid_search_faceted", fake_faceted)
+    monkeypatch.setattr(retrieval.db_helpers, "hybrid_search", unexpected)
+
+    first = retrieval.search_page("tesco ads", limit=1, facets=True)
+    assert first.facets == facets
+    assert [row["text"] for row in first.results] == ["one"]
+
+    # Facets are cached alongside the rows; cursor pages carry none
+    again = retrieval.search_page("Tesco  ads", limit=1, facets=True)
+    assert again.facets == facets and again.retrieval.from_cache
+    assert len(calls) == 1
+    assert retrieval.search_page("tesco ads", limit=1, cursor=first.next_cursor).facets is None
+
+
+def test_search_page_reranks_only_the_requested_page(monkeypatch):
+    monkeypatch.setattr(retrieval.embeddings, "embed_texts", lambda texts: [[0.1, 0.2]])
+    monkeypatch.setattr(retrieval.db_helpers, "get_corpus_generation", lambda: 1)
+    monkeypatch.setattr(retrieval, "is_rerank_enabled", lambda _: True)
+    candidates = [
+        {"embedding_id": f"e{idx}", "text": f"row {idx}", "rrf_score": 1.0 / (60 + idx)} for idx in range(6)
+    ]
+    monkeypatch.setattr(retrieval.db_helpers, "hybrid_search", lambda *args, **kwargs: candidates)
+    seen = {}
+
+    def fake_rerank(query_text, rows, *, top_n, config):
+        seen["top_n"] = top_n
+        # Reverse the best two, as a cross-encoder might
+        return [{**rows[1], "rerank_score": 0.9}, {**rows[0], "rerank_score": 0.8}][:top_n]
+
+    monkeypatch.setattr(reranker, "rerank_candidates", fake_rerank)
+
+    first = retrieval.search_page("pension ads", limit=2)
+    second = retrieval.search_page("pension ads", limit=2, cursor=first.next_cursor)
+
+    assert seen["top_n"] == 2
+    assert [row["embedding_id"] for row in first.results] == ["e1", "e0"]
+    # Deeper rows keep RRF order and carry no cross-encoder score
+    assert [row["embedding_id"] for row in second.results] == ["e2", "e3"]
+    assert all("rerank_score" not in row for row in second.results)
@@ -0,0 +1,40 @@
+import pytest
+
+from tvads_rag.semantic_cache import SemanticQueryCache
+
+
+def test_lookup_reuses_results_for_near_duplicate_query():
+    cache = SemanticQueryCache(maxsize=4, threshold=0.9)
+    cache.add("ads with celebrities driving EVs", [1.0, 0.0, 0.1], "ctx", [{"text": "hit"}])
+
+    match = cache.lookup([0.98, 0.05, 0.12], "ctx")
+
+    assert match is not None
+    assert match.results == [{"text": "hit"}]
+    assert match.matched_query == "ads with celebrities driving EVs"
+    assert match.similarity == pytest.approx(0.998, abs=1e-2)
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["entries"][0]["hits"] == 1
+
+
+def test_lookup_respects_threshold_and_context():
+    cache = SemanticQueryCache(maxsize=4, threshold=0.95)
+    cache.add("q", [1.0, 0.0], "ctx", [{"text": "a"}])
+
+    assert cache.lookup([0.0, 1.0], "ctx") is None
+    assert cache.lookup([1.0, 0.0], "other-ctx") is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_add_evicts_least_recently_used_entry():
+    cache = SemanticQueryCache(maxsize=2, threshold=0.99)
+    cache.add("a", [1.0, 0.0, 0.0], "ctx", [{"text": "a"}])
+    cache.add("b", [0.0, 1.0, 0.0], "ctx", [{"text": "b"}])
+    assert cache.lookup([1.0, 0.0, 0.0], "ctx") is not None
+
+    cache.add("c", [0.0, 0.0, 1.0], "ctx", [{"text": "c"}])
+
+    assert cache.lookup([0.0, 1.0, 0.0], "ctx") is None
+    assert cache.lookup([1.0, 0.0, 0.0], "ctx") is not None
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from tvads_rag.config import SuggestConfig
+from tvads_rag.suggest import PrefixIndex, Suggester, Suggestion
+
+
+def _config(**overrides):
+    values = dict(refresh_seconds=60, rebuild_seconds=3600, max_results=10, popular_queries=50, query_min_count=2)
+    values.update(overrides)
+    return SuggestConfig(**values)
+
+
+def test_prefix_index_ranks_full_matches_before_mid_word():
+    index = PrefixIndex(
+        [
+            Suggestion("Coca-Cola", "brand", 40),
+            Suggestion("Cola Cubes", "product", 2),
+            Suggestion("Colgate", "brand", 10),
+            Suggestion("Pepsi", "brand", 90),
+        ]
+    )
+    assert [s.text for s in index.lookup("col")] == ["Colgate", "Cola Cubes", "Coca-Cola"]
+    assert [s.text for s in index.lookup("coca cola")] == ["Coca-Cola"]
+    assert [s.text for s in index.lookup("c", kinds=["product"])] == ["Cola Cubes"]
+    assert index.lookup("xyz") == []
+
+
+def test_suggester_refresh_applies_changed_terms_and_popular_queries():
+    t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    calls = []
+    batches = [
+        [
+            {"kind": "brand", "term": "Heinz", "weight": 3, "as_of": t0},
+            {"kind": "brand", "term": "Hovis", "weight": 1, "as_of": t0},
+        ],
+        [
+            {"kind": "brand", "term": "Heinz", "weight": 4, "as_of": t0 + timedelta(minutes=1)},
+            {"kind": "category", "term": "Household", "weight": 2, "as_of": t0 + timedelta(minutes=1)},
+        ],
+    ]
+
+    def fetch(since):
+        calls.append(since)
+        return batches[len(calls) - 1]
+
+    suggester = Suggester(_config(), fetch)
+    suggester.rebuild()
+    assert [s.text for s in suggester.suggest("h")] == ["Heinz", "Hovis"]
+
+    suggester.record_query("home  insurance")
+    suggester.record_query("Home insurance")
+    assert suggester.refresh() == 2
+    assert calls == [None, t0]
+    assert [s.text for s in suggester.suggest("ho")] == ["Household", "home insurance", "Hovis"]
+    assert [(s.text, s.weight) for s in suggester.suggest("hei")] == [("Heinz", 4)]
+    assert suggester.stats()["watermark"] == str(t0 + timedelta(minutes=1))
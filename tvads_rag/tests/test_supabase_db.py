@@ -155,3 +155,61 @@ def test_hybrid_search_calls_rpc(monkeypatch):
 
 
 
+
+
+def test_hybrid_search_batch_chunks_queries_under_the_row_cap(monkeypatch):
+    payloads = []
+
+    class BatchClient:
+        def rpc(self, fn_name, params):
+            assert fn_name == "match_embedding_items_hybrid_batch"
+            payloads.append(params)
+
+            class _RPC:
+                def execute(self_inner):
+                    rows = [
+                        {"query_index": i, "text": text}
+                        for i, text in enumerate(params["query_texts"])
+                        for _ in range(params["limit_count"])
+                    ]
+                    return FakeResponse(rows)
+
+            return _RPC()
+
+    monkeypatch.setattr(supabase_db, "_get_client", lambda: BatchClient())
+
+    texts = [f"q{i}" for i in range(5)]
+    grouped = supabase_db.hybrid_search_batch([None] * 5, texts, limit=4, page_size=10)
+
+    # 10-row pages fit two queries of 4 rows each
+    assert [p["query_texts"] for p in payloads] == [["q0", "q1"], ["q2", "q3"], ["q4"]]
+    assert [[row["text"] for row in rows] for rows in grouped] == [[t] * 4 for t in texts]
+
+
+def test_list_recent_quotes_keyset_values_in_the_or_filter(monkeypatch):
+    class RecordingQuery:
+        def __init__(self):
+            self.filters = []
+
+        def __getattr__(self, name):
+            def record(*args, **kwargs):
+                self.filters.append((name, args))
+                return self
+
+            return record
+
+        def execute(self):
+            return FakeResponse([])
+
+    query = RecordingQuery()
+    fake_client = FakeClient()
+    fake_client.table = lambda name: query
+    monkeypatch.setattr(supabase_db, "_get_client", lambda: fake_client)
+
+    supabase_db.list_recent(5, after=('2024-01-01T00:00:00+00:00', 'x),id.gt.("0'))
+
+    (or_filter,) = [args[0] for name, args in query.filters if name == "or_"]
+    assert or_filter == (
+        'created_at.lt."2024-01-01T00:00:00+00:00",'
+        'and(created_at.eq."2024-01-01T00:00:00+00:00",id.lt."x),id.gt.(\\"0")'
+    )
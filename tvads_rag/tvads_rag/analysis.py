@@ -16,6 +16,7 @@ from typing import Any, Dict, List, Optional
 
 from openai import OpenAI
 
+from .circuit_breaker import protected
 from .config import get_openai_config
 from .prompts.extraction_v2 import (
     EXTRACTION_V2_SYSTEM_PROMPT,
@@ -36,6 +37,7 @@ def _get_openai_client() -> OpenAI:
     return OpenAI(api_key=cfg.api_key, base_url=cfg.api_base)
 
 
+@protected("openai.chat")
 def _call_analysis_model(transcript_text: str, segments: List[Dict[str, Any]]) -> str:
     """Call the LLM with the v2 extraction prompt."""
     client = _get_openai_client()
@@ -75,6 +77,7 @@ def _strip_markdown_fences(text: str) -> str:
     return cleaned
 
 
+@protected("openai.chat")
 def _repair_json_with_model(bad_output: str) -> Optional[str]:
     """Ask the LLM to repair malformed JSON."""
     client = _get_openai_client()
@@ -13,6 +13,7 @@ from typing import Dict, List, Optional
 
 from openai import OpenAI
 
+from .circuit_breaker import protected
 from .config import get_openai_config
 
 DEFAULT_ASR_MODEL = os.getenv("ASR_MODEL_NAME", "whisper-1")
@@ -25,6 +26,7 @@ def _get_openai_client() -> OpenAI:
     return OpenAI(api_key=cfg.api_key, base_url=cfg.api_base)
 
 
+@protected("openai.asr")
 def _call_whisper(audio_path: str, model: Optional[str] = None) -> Dict[str, object]:
     """Invoke the OpenAI Whisper transcription API with verbose segments."""
     client = _get_openai_client()
@@ -0,0 +1,321 @@
+"""
+Small caching primitives shared by the retrieval stack.
+
+``LRUCache`` is a thread-safe in-process cache with optional TTL. A
+``TieredCache`` puts one in front of an optional persistent ``CacheTier`` so
+several API workers can share entries:
+
+- ``SQLiteCacheTier``: a local file, shared by workers on the same host.
+- ``PostgresCacheTier``: the ``query_cache`` table, shared by every worker
+  that can reach SUPABASE_DB_URL.
+
+Tiers store opaque bytes; callers supply ``encode``/``decode`` functions.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Protocol, Tuple, TypeVar
+
+from .config import CACHE_BACKEND_CHOICES
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for one cache layer."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe LRU cache with an optional per-entry TTL (seconds)."""
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: Optional[float] = None):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive.")
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._data: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._data[key]
+                self.stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: K, value: V, ttl_seconds: Optional[float] = None) -> None:
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl else 0.0
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheTier(Protocol):
+    """Persistent second tier storing raw bytes under a namespaced string key."""
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        ...
+
+    def set(self, namespace: str, key: str, value: bytes, ttl_seconds: Optional[float]) -> None:
+        ...
+
+
+class SQLiteCacheTier:
+    """File-backed tier; safe for several processes on one host (WAL mode)."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connect().execute(
+            """
+            CREATE TABLE IF NOT EXISTS query_cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM query_cache WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            return None
+        return bytes(value)
+
+    def set(self, namespace: str, key: str, value: bytes, ttl_seconds: Optional[float]) -> None:
+        expires_at = time.time() + ttl_seconds if ttl_seconds else None
+        self._connect().execute(
+            "INSERT OR REPLACE INTO query_cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, sqlite3.Binary(value), expires_at),
+        )
+
+
+class PostgresCacheTier:
+    """
+    Tier backed by the ``query_cache`` table (see schema.sql).
+
+    Reads ignore expired rows. ``set`` also deletes up to ``purge_batch_size``
+    of them at most every ``purge_interval_seconds`` per process, so the table
+    does not grow without bound.
+    """
+
+    purge_batch_size = 1000
+
+    def __init__(self, purge_interval_seconds: float = 300.0):
+        self.purge_interval_seconds = purge_interval_seconds
+        self._next_purge = 0.0
+        self._purge_lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        from . import db
+
+        with db.get_connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT value FROM query_cache
+                WHERE namespace = %s AND key = %s
+                  AND (expires_at IS NULL OR expires_at > now())
+                """,
+                (namespace, key),
+            )
+            row = cur.fetchone()
+        return bytes(row["value"]) if row else None
+
+    def set(self, namespace: str, key: str, value: bytes, ttl_seconds: Optional[float]) -> None:
+        from . import db
+
+        with db.get_connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO query_cache (namespace, key, value, expires_at)
+                VALUES (%s, %s, %s, CASE WHEN %s::float8 IS NULL THEN NULL
+                                         ELSE now() + make_interval(secs => %s::float8) END)
+                ON CONFLICT (namespace, key)
+                DO UPDATE SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at
+                """,
+                (namespace, key, value, ttl_seconds, ttl_seconds),
+            )
+        self._maybe_purge()
+
+    def purge_expired(self) -> int:
+        """Delete one batch of expired rows; returns how many were removed."""
+        from . import db
+
+        with db.get_connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                DELETE FROM query_cache
+                WHERE (namespace, key) IN (
+                    SELECT namespace, key FROM query_cache
+                    WHERE expires_at <= now()
+                    LIMIT %s
+                )
+                """,
+                (self.purge_batch_size,),
+            )
+            return cur.rowcount
+
+    def _maybe_purge(self) -> None:
+        now = time.monotonic()
+        if now < self._next_purge or not self._purge_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_purge = now + self.purge_interval_seconds
+            removed = self.purge_expired()
+            if removed:
+                logger.debug("Purged %d expired query_cache rows", removed)
+        except Exception as exc:  # pragma: no cover - depends on external storage
+            logger.warning("query_cache purge failed: %s", str(exc)[:100])
+        finally:
+            self._purge_lock.release()
+
+
+def build_cache_tier(backend: str, path: Optional[str] = None) -> Optional[CacheTier]:
+    """Return the persistent tier for CACHE_BACKEND, or None when disabled."""
+    if backend not in CACHE_BACKEND_CHOICES:
+        raise ValueError(f"Cache backend must be one of {sorted(CACHE_BACKEND_CHOICES)}, got '{backend}'.")
+    if backend == "disk":
+        return SQLiteCacheTier(path or ".cache/tvads_rag_cache.sqlite")
+    if backend == "postgres":
+        return PostgresCacheTier()
+    return None
+
+
+class TieredCache(Generic[V]):
+    """
+    In-memory LRU in front of an optional persistent tier.
+
+    Persistent-tier errors are logged and treated as misses so a broken cache
+    never fails a search.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        memory: LRUCache[str, V],
+        tier: Optional[CacheTier] = None,
+        *,
+        encode: Callable[[V], bytes],
+        decode: Callable[[bytes], V],
+        ttl_seconds: Optional[float] = None,
+    ):
+        self.namespace = namespace
+        self.memory = memory
+        self.tier = tier
+        self.tier_stats = CacheStats()
+        self._encode = encode
+        self._decode = decode
+        self._ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[V]:
+        value = self.memory.get(key)
+        if value is not None or self.tier is None:
+            return value
+        try:
+            raw = self.tier.get(self.namespace, key)
+        except Exception as exc:  # pragma: no cover - depends on external storage
+            logger.warning("Cache tier read failed for %s: %s", self.namespace, str(exc)[:100])
+            raw = None
+        if raw is None:
+            self.tier_stats.misses += 1
+            return None
+        self.tier_stats.hits += 1
+        value = self._decode(raw)
+        self.memory.set(key, value, self._ttl_seconds)
+        return value
+
+    def set(self, key: str, value: V) -> None:
+        self.memory.set(key, value, self._ttl_seconds)
+        if self.tier is None:
+            return
+        try:
+            self.tier.set(self.namespace, key, self._encode(value), self._ttl_seconds)
+        except Exception as exc:  # pragma: no cover - depends on external storage
+            logger.warning("Cache tier write failed for %s: %s", self.namespace, str(exc)[:100])
+
+    def clear(self) -> None:
+        self.memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory": self.memory.stats.as_dict(),
+            "memory_size": len(self.memory),
+            "persistent": self.tier_stats.as_dict() if self.tier is not None else None,
+        }
+
+
+__all__ = [
+    "CACHE_BACKEND_CHOICES",
+    "CacheStats",
+    "CacheTier",
+    "LRUCache",
+    "PostgresCacheTier",
+    "SQLiteCacheTier",
+    "TieredCache",
+    "build_cache_tier",
+]
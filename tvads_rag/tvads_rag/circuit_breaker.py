@@ -0,0 +1,294 @@
+"""
+Circuit breakers for external providers (OpenAI, Gemini, Cohere, Supabase).
+
+Each provider call site runs through a named ``CircuitBreaker``. Breakers track
+a rolling window of recent calls and trip from ``closed`` to ``open`` when the
+error rate, or the share of calls slower than the breaker's latency threshold,
+crosses the configured limit. While open, calls fail immediately with
+``CircuitOpenError`` instead of waiting out timeouts and retries. After
+CIRCUIT_OPEN_SECONDS a single ``half_open`` probe is let through; success
+closes the breaker, failure re-opens it.
+
+Errors that say nothing about the provider's health (``ignore_exceptions``, or
+anything ``is_failure`` rejects, such as a 4xx from bad input) are not recorded
+at all: they neither count towards the error rate nor close a half-open
+breaker, and a probe that ends that way frees the slot for the next caller.
+Provider breakers use ``is_outage``, which counts only timeouts, connection
+errors, 408/429 and 5xx responses.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, Type, TypeVar
+
+from .config import CircuitBreakerConfig, get_circuit_breaker_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Calls slower than this (seconds) count towards the slow-call rate.
+DEFAULT_SLOW_CALL_SECONDS: Dict[str, float] = {
+    "openai.embeddings": 10.0,
+    "openai.asr": 120.0,
+    "openai.chat": 120.0,
+    "gemini": 180.0,
+    "cohere.rerank": 5.0,
+    "supabase": 15.0,
+}
+
+
+# HTTP statuses that say the provider, not the request, is the problem
+_RETRYABLE_STATUSES = (408, 429)
+_TRANSPORT_ERRORS = frozenset({"APIConnectionError", "TransportError", "ConnectionError"})
+
+
+def _http_status(exc: BaseException) -> Optional[int]:
+    """HTTP status carried by an SDK error (OpenAI, Cohere, Gemini, httpx), if any."""
+    for candidate in (exc, getattr(exc, "response", None)):
+        for attr in ("status_code", "code"):
+            status = getattr(candidate, attr, None)
+            if isinstance(status, int) and 100 <= status < 600:
+                return status
+    return None
+
+
+def is_client_error(exc: BaseException) -> bool:
+    """A 4xx other than 408/429: the request itself is wrong, so retrying cannot help."""
+    status = _http_status(exc)
+    return status is not None and 400 <= status < 500 and status not in _RETRYABLE_STATUSES
+
+
+def is_outage(exc: BaseException) -> bool:
+    """
+    Whether ``exc`` says the provider is unavailable: a timeout, a connection
+    error, a 408/429 or a 5xx. Client errors (400 for an empty input, 401, 404,
+    422, local ``ValueError``s) cannot succeed on retry and do not count.
+    """
+    status = _http_status(exc)
+    if status is not None:
+        return status >= 500 or status in _RETRYABLE_STATUSES
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    # SDK transport errors carry no status (openai.APIConnectionError and
+    # APITimeoutError, httpx.TransportError, requests' ConnectionError)
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    return bool(names & _TRANSPORT_ERRORS) or any("Timeout" in name for name in names)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_after:.1f}s.")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a rolling window of call outcomes."""
+
+    def __init__(
+        self,
+        name: str,
+        config: CircuitBreakerConfig,
+        *,
+        slow_call_seconds: float,
+        ignore_exceptions: Tuple[Type[BaseException], ...] = (),
+        is_failure: Optional[Callable[[BaseException], bool]] = None,
+    ):
+        self.name = name
+        self.config = config
+        self.slow_call_seconds = slow_call_seconds
+        self.ignore_exceptions = ignore_exceptions
+        self.is_failure = is_failure
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        # (failed, slow) per call
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=config.window_size)
+        self._counters = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "opened": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.config.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def _acquire(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self._counters["rejected"] += 1
+            retry_after = max(self.config.open_seconds - (now - self._opened_at), 0.0)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def _record(self, failed: bool, duration: float) -> None:
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            self._counters["calls"] += 1
+            self._counters["failures"] += int(failed)
+            self._counters["slow_calls"] += int(slow)
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                if failed or slow:
+                    self._trip()
+                else:
+                    self._state = CLOSED
+                    self._window.clear()
+                    logger.info("Circuit '%s' closed after successful probe", self.name)
+                return
+            self._window.append((failed, slow))
+            if len(self._window) < self.config.min_calls:
+                return
+            total = len(self._window)
+            error_rate = sum(1 for f, _ in self._window if f) / total
+            slow_rate = sum(1 for _, s in self._window if s) / total
+            if error_rate >= self.config.error_rate_threshold or slow_rate >= self.config.slow_rate_threshold:
+                self._trip()
+
+    def _release_probe(self) -> None:
+        """Free the half-open probe slot without recording an outcome."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def _trip(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._counters["opened"] += 1
+        self._window.clear()
+        logger.warning(
+            "Circuit '%s' opened; failing fast for %.0fs", self.name, self.config.open_seconds
+        )
+
+    def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``func`` under the breaker (raises CircuitOpenError when open)."""
+        if not self.config.enabled:
+            return func(*args, **kwargs)
+        self._acquire()
+        started = time.monotonic()
+        failed: Optional[bool] = None  # None: nothing to record (ignored or interrupted)
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        except self.ignore_exceptions:
+            raise
+        except Exception as exc:
+            if self.is_failure is None or self.is_failure(exc):
+                failed = True
+            raise
+        finally:
+            if failed is None:
+                self._release_probe()
+            else:
+                self._record(failed, time.monotonic() - started)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            return {"state": state, "window": len(self._window), **self._counters}
+
+
+_registry: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(
+    name: str,
+    *,
+    ignore_exceptions: Tuple[Type[BaseException], ...] = (),
+    is_failure: Optional[Callable[[BaseException], bool]] = None,
+) -> CircuitBreaker:
+    """Return the process-wide breaker for ``name`` (created on first use)."""
+    with _registry_lock:
+        breaker = _registry.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                get_circuit_breaker_config(),
+                slow_call_seconds=DEFAULT_SLOW_CALL_SECONDS.get(name, 30.0),
+                ignore_exceptions=ignore_exceptions,
+                is_failure=is_failure,
+            )
+            _registry[name] = breaker
+        return breaker
+
+
+def protected(
+    name: str,
+    *,
+    ignore_exceptions: Tuple[Type[BaseException], ...] = (),
+    is_failure: Optional[Callable[[BaseException], bool]] = is_outage,
+) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Decorator running the wrapped provider call through breaker ``name``.
+    By default only ``is_outage`` errors count against it.
+    """
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            breaker = get_breaker(name, ignore_exceptions=ignore_exceptions, is_failure=is_failure)
+            return breaker.call(func, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every breaker for status endpoints and logs."""
+    with _registry_lock:
+        breakers = list(_registry.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+
+def is_open(name: str) -> bool:
+    """True when calls to ``name`` would currently fail fast."""
+    with _registry_lock:
+        breaker = _registry.get(name)
+    return breaker is not None and breaker.state == OPEN
+
+
+def reset_breakers() -> None:
+    """Forget all breakers (tests, config reloads)."""
+    with _registry_lock:
+        _registry.clear()
+
+
+__all__ = [
+    "CLOSED",
+    "OPEN",
+    "HALF_OPEN",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "breaker_states",
+    "get_breaker",
+    "is_client_error",
+    "is_open",
+    "is_outage",
+    "protected",
+    "reset_breakers",
+]
@@ -8,9 +8,11 @@ can depend on typed config objects instead of sprinkling os.getenv calls.
 from __future__ import annotations
 
 import os
+import re
 from dataclasses import dataclass
 from functools import lru_cache
 from typing import Optional
+from urllib.parse import urlsplit
 
 from dotenv import load_dotenv
 
@@ -19,7 +21,9 @@ load_dotenv()
 VIDEO_SOURCE_CHOICES = {"local", "s3"}
 VISION_PROVIDER_CHOICES = {"none", "google"}
 VISION_TIER_CHOICES = {"fast", "quality"}
-RERANK_PROVIDER_CHOICES = {"none", "cohere"}
+RERANK_PROVIDER_CHOICES = {"none", "cohere", "local"}
+DEFAULT_LOCAL_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+CACHE_BACKEND_CHOICES = {"none", "disk", "postgres"}
 DEFAULT_VISION_FAST_MODEL = "gemini-2.5-flash"  # Used for regular storyboard analysis
 DEFAULT_VISION_QUALITY_MODEL = "gemini-3-pro-preview"  # Used for hero ads (top 10% by views) - deep analysis
 
@@ -31,6 +35,17 @@ class DBConfig:
     url: str
     supabase_url: Optional[str]
     service_key: Optional[str]
+    # Process-wide psycopg2 connection pool (see db.get_connection)
+    pool_enabled: bool = True
+    pool_min_size: int = 1
+    pool_max_size: int = 10
+    # Longest wait for a free pooled connection before PoolTimeout
+    pool_acquire_timeout_seconds: float = 30.0
+    # Idle connections older than this are pinged (SELECT 1) before reuse
+    pool_ping_after_seconds: float = 30.0
+    # Off by default behind a transaction-mode pooler (pgbouncer/Supavisor, port
+    # 6543), which hands each transaction a different server connection
+    prepared_statements: bool = True
 
 
 @dataclass(frozen=True)
@@ -50,6 +65,18 @@ class RerankConfig:
     provider: str
     model_name: Optional[str]
     api_key: Optional[str]
+    # Local (ONNX cross-encoder) provider settings
+    model_path: Optional[str] = None
+    threads: int = 2
+    max_seq_length: int = 256
+    batch_size: int = 16
+    # Score cache + pre-pruning applied before either provider is called
+    score_cache_size: int = 8192
+    score_cache_ttl_seconds: int = 3600
+    prune_rrf_ratio: float = 0.25
+    max_per_ad: int = 3
+    min_text_chars: int = 3
+    max_text_chars: int = 1500
 
 
 @dataclass(frozen=True)
@@ -86,6 +113,82 @@ class VisionConfig:
     frame_sample_seconds: float
 
 
+@dataclass(frozen=True)
+class CacheConfig:
+    """Retrieval caches: in-memory sizes plus the optional shared tier."""
+
+    backend: str
+    path: Optional[str]
+    query_embedding_cache_size: int
+    result_cache_size: int
+    result_cache_ttl_seconds: float
+    corpus_generation_poll_seconds: float
+    semantic_cache_enabled: bool
+    semantic_cache_size: int
+    semantic_cache_threshold: float
+    search_page_depth: int
+    search_page_cache_size: int
+    search_page_ttl_seconds: float
+
+
+@dataclass(frozen=True)
+class CircuitBreakerConfig:
+    """Thresholds shared by the provider circuit breakers."""
+
+    enabled: bool
+    window_size: int
+    min_calls: int
+    error_rate_threshold: float
+    slow_rate_threshold: float
+    open_seconds: float
+
+
+@dataclass(frozen=True)
+class SearchBudgetConfig:
+    """Latency budget for deadline-aware retrieval (milliseconds) and per-search work bounds."""
+
+    default_budget_ms: int
+    embed_hedge_ms: int
+    embed_budget_fraction: float
+    rerank_min_remaining_ms: int
+    worker_threads: int
+    # Keyword matches kept for fusion, best ts_rank_cd first (None: 4 x limit)
+    lexical_limit: Optional[int] = None
+    # /api/search/batch: time allowed for the whole batch, and reranks in flight at once
+    batch_timeout_ms: int = 30000
+    batch_rerank_concurrency: int = 4
+
+
+@dataclass(frozen=True)
+class NeighborConfig:
+    """Settings for the precomputed ad-level similarity graph (ad_neighbors)."""
+
+    k: int
+    batch_size: int
+    update_on_ingest: bool
+
+
+@dataclass(frozen=True)
+class SuggestConfig:
+    """Settings for the in-memory typeahead index behind /api/suggest."""
+
+    refresh_seconds: float
+    rebuild_seconds: float
+    max_results: int
+    popular_queries: int
+    query_min_count: int
+
+
+@dataclass(frozen=True)
+class EmotionArcConfig:
+    """Settings for emotional-arc resampling and similarity search."""
+
+    points: int
+    shortlist: int
+    dtw_window: float
+    refresh_seconds: float
+
+
 def _get_env(name: str, default: Optional[str] = None) -> Optional[str]:
     """Wrapper around os.getenv that trims whitespace."""
     value = os.getenv(name, default)
@@ -125,6 +228,41 @@ def _get_float_env(name: str, default: float) -> float:
     return value
 
 
+def _get_bool_env(name: str, default: bool) -> bool:
+    raw = _get_env(name)
+    if raw is None or raw == "":
+        return default
+    return raw.lower() in {"1", "true", "yes", "on"}
+
+
+def _get_int_env(name: str, default: int) -> int:
+    raw = _get_env(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise ValueError(f"{name} must be an integer, got '{raw}'.") from exc
+    if value <= 0:
+        raise ValueError(f"{name} must be positive, got {value}.")
+    return value
+
+
+# Supabase's transaction-mode pooler port
+_TRANSACTION_POOLER_PORT = 6543
+
+
+def _uses_transaction_pooler(url: str) -> bool:
+    """True when ``url`` (URI or key=value DSN) targets the transaction-mode pooler port."""
+    try:
+        if urlsplit(url).port == _TRANSACTION_POOLER_PORT:
+            return True
+    except ValueError:
+        # Unparseable URI (e.g. an unfilled "[PASSWORD]" placeholder): match the text
+        pass
+    return re.search(rf"(?::|\bport=){_TRANSACTION_POOLER_PORT}\b", url) is not None
+
+
 @lru_cache(maxsize=1)
 def get_db_config() -> DBConfig:
     """Return Supabase/Postgres connection info."""
@@ -133,6 +271,12 @@ def get_db_config() -> DBConfig:
         url=url,
         supabase_url=_get_env("SUPABASE_URL"),
         service_key=_get_env("SUPABASE_SERVICE_KEY"),
+        pool_enabled=_get_bool_env("DB_POOL_ENABLED", True),
+        pool_min_size=_get_int_env("DB_POOL_MIN_SIZE", 1),
+        pool_max_size=_get_int_env("DB_POOL_MAX_SIZE", 10),
+        pool_acquire_timeout_seconds=_get_float_env("DB_POOL_ACQUIRE_TIMEOUT_SECONDS", 30.0),
+        pool_ping_after_seconds=_get_float_env("DB_POOL_PING_AFTER_SECONDS", 30.0),
+        prepared_statements=_get_bool_env("DB_PREPARED_STATEMENTS", not _uses_transaction_pooler(url)),
     )
 
 
@@ -279,6 +423,7 @@ def get_rerank_config() -> RerankConfig:
         )
     model_name = _get_env("RERANK_MODEL")
     api_key: Optional[str] = None
+    model_path: Optional[str] = None
 
     if provider == "cohere":
         api_key = _get_env("COHERE_API_KEY")
@@ -286,8 +431,127 @@ def get_rerank_config() -> RerankConfig:
             raise RuntimeError("COHERE_API_KEY must be set when RERANK_PROVIDER=cohere.")
         if not model_name:
             model_name = "rerank-english-v3.0"
+    elif provider == "local":
+        model_path = _get_env("RERANK_LOCAL_MODEL_PATH")
+        if not model_path:
+            raise RuntimeError(
+                "RERANK_LOCAL_MODEL_PATH must point at an exported ONNX cross-encoder "
+                "(model.onnx + tokenizer.json) when RERANK_PROVIDER=local."
+            )
+        if not model_name:
+            model_name = DEFAULT_LOCAL_RERANK_MODEL
+
+    return RerankConfig(
+        provider=provider,
+        model_name=model_name,
+        api_key=api_key,
+        model_path=model_path,
+        threads=_get_int_env("RERANK_LOCAL_THREADS", 2),
+        max_seq_length=_get_int_env("RERANK_MAX_SEQ_LEN", 256),
+        batch_size=_get_int_env("RERANK_BATCH_SIZE", 16),
+        score_cache_size=_get_int_env("RERANK_SCORE_CACHE_SIZE", 8192),
+        score_cache_ttl_seconds=_get_int_env("RERANK_SCORE_CACHE_TTL_SECONDS", 3600),
+        prune_rrf_ratio=_get_float_env("RERANK_PRUNE_RRF_RATIO", 0.25),
+        max_per_ad=_get_int_env("RERANK_MAX_PER_AD", 3),
+        min_text_chars=_get_int_env("RERANK_MIN_TEXT_CHARS", 3),
+        max_text_chars=_get_int_env("RERANK_MAX_TEXT_CHARS", 1500),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_cache_config() -> CacheConfig:
+    """Return configuration for the retrieval caches."""
+    backend = (_get_env("CACHE_BACKEND") or "none").lower()
+    if backend not in CACHE_BACKEND_CHOICES:
+        raise ValueError(
+            f"CACHE_BACKEND must be one of {sorted(CACHE_BACKEND_CHOICES)}, got '{backend}'."
+        )
+    threshold = _get_float_env("SEMANTIC_CACHE_THRESHOLD", 0.95)
+    if threshold > 1.0:
+        raise ValueError(f"SEMANTIC_CACHE_THRESHOLD must be <= 1.0, got {threshold}.")
+    return CacheConfig(
+        backend=backend,
+        path=_get_env("CACHE_PATH") or ".cache/tvads_rag_cache.sqlite",
+        query_embedding_cache_size=_get_int_env("QUERY_EMBED_CACHE_SIZE", 1024),
+        result_cache_size=_get_int_env("RESULT_CACHE_SIZE", 256),
+        result_cache_ttl_seconds=_get_float_env("RESULT_CACHE_TTL_SECONDS", 300.0),
+        corpus_generation_poll_seconds=_get_float_env("CORPUS_GENERATION_POLL_SECONDS", 5.0),
+        # Opt-in: "tesco ads 2019" and "tesco ads 2020" embed above 0.95
+        semantic_cache_enabled=_get_bool_env("SEMANTIC_CACHE_ENABLED", False),
+        semantic_cache_size=_get_int_env("SEMANTIC_CACHE_SIZE", 256),
+        semantic_cache_threshold=threshold,
+        search_page_depth=_get_int_env("SEARCH_PAGE_DEPTH", 50),
+        search_page_cache_size=_get_int_env("SEARCH_PAGE_CACHE_SIZE", 1024),
+        search_page_ttl_seconds=_get_float_env("SEARCH_PAGE_TTL_SECONDS", 600.0),
+    )
+
 
-    return RerankConfig(provider=provider, model_name=model_name, api_key=api_key)
+@lru_cache(maxsize=1)
+def get_circuit_breaker_config() -> CircuitBreakerConfig:
+    """Return circuit-breaker thresholds for provider calls."""
+    error_rate = _get_float_env("CIRCUIT_ERROR_RATE", 0.5)
+    slow_rate = _get_float_env("CIRCUIT_SLOW_CALL_RATE", 0.8)
+    if error_rate > 1.0 or slow_rate > 1.0:
+        raise ValueError("CIRCUIT_ERROR_RATE and CIRCUIT_SLOW_CALL_RATE must be <= 1.0.")
+    return CircuitBreakerConfig(
+        enabled=_get_bool_env("CIRCUIT_BREAKER_ENABLED", True),
+        window_size=_get_int_env("CIRCUIT_WINDOW_SIZE", 20),
+        min_calls=_get_int_env("CIRCUIT_MIN_CALLS", 5),
+        error_rate_threshold=error_rate,
+        slow_rate_threshold=slow_rate,
+        open_seconds=_get_float_env("CIRCUIT_OPEN_SECONDS", 30.0),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_search_budget_config() -> SearchBudgetConfig:
+    """Return latency-budget settings for retrieve_with_budget."""
+    fraction = _get_float_env("SEARCH_EMBED_BUDGET_FRACTION", 0.4)
+    if fraction >= 1.0:
+        raise ValueError(f"SEARCH_EMBED_BUDGET_FRACTION must be < 1.0, got {fraction}.")
+    return SearchBudgetConfig(
+        default_budget_ms=_get_int_env("SEARCH_BUDGET_MS", 1500),
+        embed_hedge_ms=_get_int_env("SEARCH_EMBED_HEDGE_MS", 250),
+        embed_budget_fraction=fraction,
+        rerank_min_remaining_ms=_get_int_env("SEARCH_RERANK_MIN_REMAINING_MS", 300),
+        worker_threads=_get_int_env("SEARCH_WORKER_THREADS", 32),
+        lexical_limit=_get_int_env("HYBRID_LEXICAL_LIMIT", 0) or None,
+        batch_timeout_ms=_get_int_env("SEARCH_BATCH_TIMEOUT_MS", 30000),
+        batch_rerank_concurrency=max(1, _get_int_env("SEARCH_BATCH_RERANK_CONCURRENCY", 4)),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_neighbor_config() -> NeighborConfig:
+    """Return settings for the ad_neighbors rebuild/incremental update."""
+    return NeighborConfig(
+        k=_get_int_env("NEIGHBORS_K", 20),
+        batch_size=_get_int_env("NEIGHBORS_BATCH_SIZE", 512),
+        update_on_ingest=_get_bool_env("NEIGHBORS_UPDATE_ON_INGEST", True),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_suggest_config() -> SuggestConfig:
+    """Return settings for the typeahead prefix index."""
+    return SuggestConfig(
+        refresh_seconds=_get_float_env("SUGGEST_REFRESH_SECONDS", 60.0),
+        rebuild_seconds=_get_float_env("SUGGEST_REBUILD_SECONDS", 3600.0),
+        max_results=_get_int_env("SUGGEST_MAX_RESULTS", 10),
+        popular_queries=_get_int_env("SUGGEST_POPULAR_QUERIES", 500),
+        query_min_count=_get_int_env("SUGGEST_QUERY_MIN_COUNT", 3),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_emotion_arc_config() -> EmotionArcConfig:
+    """Return settings for the emotional-arc similarity engine."""
+    return EmotionArcConfig(
+        points=_get_int_env("EMOTION_ARC_POINTS", 32),
+        shortlist=_get_int_env("EMOTION_ARC_SHORTLIST", 100),
+        dtw_window=_get_float_env("EMOTION_ARC_DTW_WINDOW", 0.1),
+        refresh_seconds=_get_float_env("EMOTION_ARC_REFRESH_SECONDS", 600.0),
+    )
 
 
 def is_vision_enabled(config: Optional[VisionConfig] = None) -> bool:
@@ -349,7 +613,19 @@ __all__ = [
     "StorageConfig",
     "PipelineConfig",
     "VisionConfig",
+    "CacheConfig",
+    "SearchBudgetConfig",
+    "CircuitBreakerConfig",
+    "NeighborConfig",
+    "SuggestConfig",
+    "EmotionArcConfig",
     "resolve_vision_model",
+    "get_cache_config",
+    "get_circuit_breaker_config",
+    "get_search_budget_config",
+    "get_neighbor_config",
+    "get_suggest_config",
+    "get_emotion_arc_config",
     "get_db_config",
     "get_openai_config",
     "get_rerank_config",
@@ -7,15 +7,20 @@ idempotent when inserting ads + related child records.
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import os
+import threading
+import time
+import weakref
 from contextlib import contextmanager
-from typing import Any, Iterable, Mapping, MutableSequence, Optional, Sequence
+from typing import Any, Dict, Iterable, List, Mapping, MutableSequence, Optional, Sequence, Tuple
 
 import psycopg2
 from psycopg2 import sql
 from psycopg2.extras import Json, RealDictCursor, execute_values
 
-from .config import get_db_config
+from .config import DBConfig, get_db_config, get_search_budget_config
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +75,11 @@ AD_COLUMNS = [
     "emotional_metrics",
     "effectiveness",
     "extraction_version",
+    # Public asset URLs from the metadata spreadsheet (filled at ingest)
+    "video_url",
+    "image_url",
+    # Resampled emotional curve (real[]; see emotion_arc.py)
+    "emotional_arc",
     # Note: processing_notes is NOT in this list - it's updated separately after insert
     # when storyboard errors occur (safety blocks, timeouts, etc.)
 ]
@@ -151,19 +161,215 @@ DEFAULT_HYBRID_ITEM_TYPES = (
 )
 
 
+# Structured filters accepted by hybrid_search. Singular aliases are folded into
+# the list-valued keys expected by match_embedding_items_hybrid(filters jsonb).
+_LIST_FILTER_ALIASES = {
+    "brand": "brands",
+    "brands": "brands",
+    "brand_name": "brands",
+    "product_category": "product_categories",
+    "product_categories": "product_categories",
+    "format_type": "format_types",
+    "format_types": "format_types",
+}
+_META_FILTER_KEYS = ("aida_stage", "claim_type")
+SEARCH_FILTER_KEYS = frozenset(
+    set(_LIST_FILTER_ALIASES)
+    | set(_META_FILTER_KEYS)
+    | {"year", "year_from", "year_to", "has_celeb"}
+)
+
+
+def normalise_search_filters(filters: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    """
+    Validate hybrid-search filters and convert them to the jsonb shape used by SQL.
+
+    Empty values are dropped so an all-empty mapping means "no filtering".
+    """
+    if not filters:
+        return {}
+    unknown = set(filters) - SEARCH_FILTER_KEYS
+    if unknown:
+        raise ValueError(
+            f"Unsupported search filters {sorted(unknown)}; expected any of {sorted(SEARCH_FILTER_KEYS)}."
+        )
+
+    normalised: Dict[str, Any] = {}
+    for key, value in filters.items():
+        if value is None or value == "" or value == []:
+            continue
+        if key in _LIST_FILTER_ALIASES:
+            values: List[str] = [value] if isinstance(value, str) else list(value)
+            target = normalised.setdefault(_LIST_FILTER_ALIASES[key], [])
+            for item in values:
+                cleaned = str(item).strip().lower()
+                if cleaned and cleaned not in target:
+                    target.append(cleaned)
+        elif key in _META_FILTER_KEYS:
+            normalised[key] = str(value).strip()
+        elif key == "has_celeb":
+            normalised[key] = bool(value)
+        elif key == "year":
+            normalised["year_from"] = normalised["year_to"] = int(value)
+        else:
+            normalised[key] = int(value)
+
+    for key in ("brands", "product_categories", "format_types"):
+        if key in normalised and not normalised[key]:
+            del normalised[key]
+    if (
+        "year_from" in normalised
+        and "year_to" in normalised
+        and normalised["year_from"] > normalised["year_to"]
+    ):
+        raise ValueError("year_from must not be greater than year_to.")
+    return normalised
+
+
+class PoolTimeout(TimeoutError):
+    """Raised when no pooled connection frees up within DB_POOL_ACQUIRE_TIMEOUT_SECONDS."""
+
+
+class _BlockingPool:
+    """
+    Thread-safe psycopg2 connection pool.
+
+    Up to ``pool_max_size`` connections are open at once; callers wait up to
+    ``pool_acquire_timeout_seconds`` for a free one, then get ``PoolTimeout``.
+    Returned connections stay open for reuse (psycopg2's own pools close
+    anything above ``minconn``); one idle for ``pool_ping_after_seconds`` is
+    checked with ``SELECT 1`` first, so a connection the server or a NAT
+    dropped is replaced instead of failing the caller's query.
+    """
+
+    def __init__(self, cfg: DBConfig):
+        self._url = cfg.url
+        self._max_size = cfg.pool_max_size
+        self._acquire_timeout = cfg.pool_acquire_timeout_seconds
+        self._ping_after = cfg.pool_ping_after_seconds
+        # (connection, monotonic time it was returned)
+        self._idle: List[Tuple[Any, float]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(cfg.pool_max_size)
+        for _ in range(cfg.pool_min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+
+    def _connect(self):
+        return psycopg2.connect(self._url, cursor_factory=RealDictCursor)
+
+    def _alive(self, conn, idle_since: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self._ping_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            conn.close()
+            return False
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self._acquire_timeout):
+            raise PoolTimeout(
+                f"No database connection became free within {self._acquire_timeout:g}s "
+                f"(all DB_POOL_MAX_SIZE={self._max_size} in use)."
+            )
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    conn, idle_since = self._idle.pop()
+                # Pinged outside the lock so other threads can take connections meanwhile
+                if self._alive(conn, idle_since):
+                    return conn
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn, *, close: bool = False) -> None:
+        try:
+            if close or conn.closed:
+                conn.close()
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+
+_pool: Optional[_BlockingPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(cfg: DBConfig) -> _BlockingPool:
+    global _pool, _pool_pid
+    with _pool_lock:
+        # Connections must not be shared across fork(); rebuild in children.
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = _BlockingPool(cfg)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def close_pool() -> None:
+    """Close every pooled connection (API shutdown, tests)."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.close()
+        _pool = None
+        _pool_pid = None
+
+
 @contextmanager
 def get_connection():
-    """Yield a psycopg2 connection with sensible defaults."""
+    """
+    Yield a psycopg2 connection with sensible defaults.
+
+    Connections come from a process-wide pool (DB_POOL_MAX_SIZE) unless
+    DB_POOL_ENABLED=0, in which case each call opens its own connection.
+    """
     cfg = get_db_config()
-    conn = psycopg2.connect(cfg.url, cursor_factory=RealDictCursor)
+    if not cfg.pool_enabled:
+        conn = psycopg2.connect(cfg.url, cursor_factory=RealDictCursor)
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return
+
+    pool = _get_pool(cfg)
+    conn = pool.acquire()
+    broken = False
     try:
         yield conn
         conn.commit()
-    except Exception:
-        conn.rollback()
+    except Exception as exc:
+        broken = isinstance(exc, (psycopg2.OperationalError, psycopg2.InterfaceError))
+        if not broken:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
         raise
     finally:
-        conn.close()
+        pool.release(conn, close=broken)
 
 
 def _vector_literal(values: Sequence[float]) -> str:
@@ -385,15 +591,24 @@ def insert_embedding_items(
 
 
 def hybrid_search(
-    query_embedding: Sequence[float],
+    query_embedding: Optional[Sequence[float]],
     query_text: str,
     limit: int = 50,
     item_types: Optional[Sequence[str]] = None,
+    filters: Optional[Mapping[str, Any]] = None,
+    timeout_ms: Optional[int] = None,
 ) -> Sequence[Mapping[str, Any]]:
-    """Call the match_embedding_items_hybrid Postgres function."""
+    """
+    Call the match_embedding_items_hybrid Postgres function.
+
+    ``filters`` (see ``normalise_search_filters``) are pushed into both the
+    semantic and lexical legs so filtered searches still return full pages.
+    A ``None`` embedding runs the lexical leg only. ``timeout_ms`` sets a
+    transaction-local statement_timeout so Postgres cancels slow searches.
+    """
     if limit <= 0:
         raise ValueError("limit must be positive for hybrid search.")
-    vector = _vector_literal(query_embedding)
+    vector = _vector_literal(query_embedding) if query_embedding is not None else None
     search_types = list(item_types or DEFAULT_HYBRID_ITEM_TYPES)
     sql_query = """
         SELECT *
@@ -401,17 +616,689 @@ def hybrid_search(
             %s::vector,
             %s::text,
             %s::int,
-            %s::text[]
+            %s::text[],
+            %s::jsonb,
+            %s::int
         )
     """
-    params = (vector, query_text, limit, search_types)
+    params = (
+        vector,
+        query_text,
+        limit,
+        search_types,
+        Json(normalise_search_filters(filters)),
+        get_search_budget_config().lexical_limit,
+    )
     with get_connection() as conn, conn.cursor() as cur:
+        if timeout_ms:
+            cur.execute("SELECT set_config('statement_timeout', %s, true)", (f"{int(timeout_ms)}ms",))
         cur.execute(sql_query, params)
         return cur.fetchall()
 
 
+def _split_facets(rows: Sequence[Mapping[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Pop the ``facets`` column (set on the first row only) off faceted hybrid rows."""
+    facets: Dict[str, Any] = {}
+    candidates: List[Dict[str, Any]] = []
+    for row in rows:
+        row = dict(row)
+        facets = row.pop("facets", None) or facets
+        candidates.append(row)
+    return candidates, facets
+
+
+def hybrid_search_faceted(
+    query_embedding: Optional[Sequence[float]],
+    query_text: str,
+    limit: int = 50,
+    item_types: Optional[Sequence[str]] = None,
+    filters: Optional[Mapping[str, Any]] = None,
+    timeout_ms: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    ``hybrid_search`` plus facet counts over the fused candidates, in one round trip.
+
+    Returns ``(candidates, facets)``. ``facets`` maps brand, year, format_type,
+    product_category and item_type to ``[{"value", "count"}]`` buckets (distinct
+    ads, largest first). It is computed by match_embedding_items_hybrid_faceted.
+    """
+    if limit <= 0:
+        raise ValueError("limit must be positive for hybrid search.")
+    vector = _vector_literal(query_embedding) if query_embedding is not None else None
+    search_types = list(item_types or DEFAULT_HYBRID_ITEM_TYPES)
+    sql_query = """
+        SELECT *
+        FROM match_embedding_items_hybrid_faceted(
+            %s::vector,
+            %s::text,
+            %s::int,
+            %s::text[],
+            %s::jsonb,
+            %s::int
+        )
+    """
+    params = (
+        vector,
+        query_text,
+        limit,
+        search_types,
+        Json(normalise_search_filters(filters)),
+        get_search_budget_config().lexical_limit,
+    )
+    with get_connection() as conn, conn.cursor() as cur:
+        if timeout_ms:
+            cur.execute("SELECT set_config('statement_timeout', %s, true)", (f"{int(timeout_ms)}ms",))
+        cur.execute(sql_query, params)
+        return _split_facets(cur.fetchall())
+
+
+def hybrid_search_batch(
+    query_embeddings: Sequence[Optional[Sequence[float]]],
+    query_texts: Sequence[str],
+    limit: int = 50,
+    item_types: Optional[Sequence[str]] = None,
+    filters: Optional[Mapping[str, Any]] = None,
+    timeout_ms: Optional[int] = None,
+) -> List[List[Mapping[str, Any]]]:
+    """
+    Run ``hybrid_search`` for many queries in one round trip.
+
+    Calls match_embedding_items_hybrid_batch (a LATERAL join over the query
+    arrays) and returns one candidate list per query, in input order. ``None``
+    embeddings run the lexical leg only for that query.
+    """
+    if limit <= 0:
+        raise ValueError("limit must be positive for hybrid search.")
+    if len(query_embeddings) != len(query_texts):
+        raise ValueError("query_embeddings and query_texts must have the same length.")
+    grouped: List[List[Mapping[str, Any]]] = [[] for _ in query_texts]
+    if not query_texts:
+        return grouped
+    vectors = [_vector_literal(vec) if vec is not None else None for vec in query_embeddings]
+    search_types = list(item_types or DEFAULT_HYBRID_ITEM_TYPES)
+    sql_query = """
+        SELECT *
+        FROM match_embedding_items_hybrid_batch(
+            %s::text[],
+            %s::text[],
+            %s::int,
+            %s::text[],
+            %s::jsonb,
+            %s::int
+        )
+    """
+    params = (
+        vectors,
+        list(query_texts),
+        limit,
+        search_types,
+        Json(normalise_search_filters(filters)),
+        get_search_budget_config().lexical_limit,
+    )
+    with get_connection() as conn, conn.cursor() as cur:
+        if timeout_ms:
+            cur.execute("SELECT set_config('statement_timeout', %s, true)", (f"{int(timeout_ms)}ms",))
+        cur.execute(sql_query, params)
+        for row in cur.fetchall():
+            row = dict(row)
+            grouped[row.pop("query_index")].append(row)
+    return grouped
+
+
+def get_corpus_generation() -> int:
+    """Return the corpus generation counter used to invalidate result caches."""
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT generation FROM corpus_state WHERE id = 1")
+        row = cur.fetchone()
+        return int(row["generation"]) if row else 0
+
+
+def bump_corpus_generation() -> int:
+    """Advance the corpus generation after ads/embeddings were written or removed."""
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT bump_corpus_generation() AS generation")
+        row = cur.fetchone()
+        generation = int(row["generation"]) if row and row["generation"] is not None else 0
+        logger.debug("Corpus generation bumped to %d", generation)
+        return generation
+
+
+# --- Read repository (API pages) ---
+
+# Columns always returned by get_ad_by_external_id; cheap scalars only.
+AD_DETAIL_COLUMNS = (
+    "id",
+    "external_id",
+    "brand_name",
+    "product_name",
+    "product_category",
+    "one_line_summary",
+    "duration_seconds",
+    "year",
+    "format_type",
+    "video_url",
+    "image_url",
+    "created_at",
+    "updated_at",
+)
+# Heavy JSONB columns, returned only when requested via ``include``.
+AD_DETAIL_OPTIONAL_FIELDS = frozenset(
+    {
+        "analysis_json",
+        "impact_scores",
+        "raw_transcript",
+        "emotional_metrics",
+        "effectiveness",
+        "hero_analysis",
+        "performance_metrics",
+        "creative_dna",
+        "cta_offer",
+        "brand_asset_timeline",
+        "audio_fingerprint",
+        "claims_compliance",
+    }
+)
+RECENT_AD_COLUMNS = (
+    "id",
+    "external_id",
+    "brand_name",
+    "product_name",
+    "one_line_summary",
+    "video_url",
+    "image_url",
+    "created_at",
+)
+
+# Statement names already PREPAREd on each pooled connection.
+_prepared: "weakref.WeakKeyDictionary[Any, set]" = weakref.WeakKeyDictionary()
+
+
+def ad_detail_columns(include: Optional[Iterable[str]] = None) -> List[str]:
+    """Validate ``include`` against AD_DETAIL_OPTIONAL_FIELDS and return the projection."""
+    extra = sorted(set(include or ()))
+    unknown = [field for field in extra if field not in AD_DETAIL_OPTIONAL_FIELDS]
+    if unknown:
+        raise ValueError(
+            f"Unknown ad fields {unknown}; choose from {sorted(AD_DETAIL_OPTIONAL_FIELDS)}."
+        )
+    return list(AD_DETAIL_COLUMNS) + extra
+
+
+def _execute_prepared(cur, conn, statement: str, query: str, params: Sequence[Any]) -> None:
+    """
+    Run ``query`` (``$n`` placeholders) as a server-side prepared statement,
+    preparing it once per pooled connection. Falls back to a plain execute
+    when DB_PREPARED_STATEMENTS=0 (e.g. behind a transaction-mode pooler).
+    """
+    if not get_db_config().prepared_statements:
+        cur.execute(_to_pyformat(query, len(params)), params)
+        return
+    names = _prepared.setdefault(conn, set())
+    if statement not in names:
+        cur.execute(f"PREPARE {statement} AS {query}")
+        names.add(statement)
+    placeholders = ", ".join(["%s"] * len(params))
+    cur.execute(f"EXECUTE {statement} ({placeholders})" if params else f"EXECUTE {statement}", params)
+
+
+def _to_pyformat(query: str, param_count: int) -> str:
+    """Rewrite ``$1..$n`` placeholders to psycopg2's ``%s`` (highest first)."""
+    for idx in range(param_count, 0, -1):
+        query = query.replace(f"${idx}", "%s")
+    return query
+
+
+def _statement_name(prefix: str, columns: Sequence[str]) -> str:
+    digest = hashlib.sha1(",".join(columns).encode("utf-8")).hexdigest()[:10]
+    return f"{prefix}_{digest}"
+
+
+def get_ad_by_external_id(
+    external_id: str, *, include: Optional[Iterable[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Fetch one ad for the detail page.
+
+    Only AD_DETAIL_COLUMNS are read unless heavy JSONB fields are requested
+    through ``include`` (subset of AD_DETAIL_OPTIONAL_FIELDS).
+    """
+    columns = ad_detail_columns(include)
+    query = f"SELECT {', '.join(columns)} FROM ads WHERE external_id = $1 LIMIT 1"
+    with get_connection() as conn, conn.cursor() as cur:
+        _execute_prepared(cur, conn, _statement_name("ad_by_external_id", columns), query, (external_id,))
+        row = cur.fetchone()
+        return dict(row) if row else None
+
+
+def get_ad_version(external_id: str) -> Optional[str]:
+    """
+    ``updated_at`` of one ad as an ISO string, or None if it does not exist.
+
+    Lets the API answer conditional requests (If-None-Match) with a 304
+    without reading the JSONB payload.
+    """
+    query = "SELECT updated_at FROM ads WHERE external_id = $1 LIMIT 1"
+    with get_connection() as conn, conn.cursor() as cur:
+        _execute_prepared(cur, conn, "ad_version", query, (external_id,))
+        row = cur.fetchone()
+        if not row or row["updated_at"] is None:
+            return None
+        return row["updated_at"].isoformat()
+
+
+def list_recent(
+    limit: int = 20,
+    offset: int = 0,
+    *,
+    after: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Most recently indexed ads (RECENT_AD_COLUMNS only).
+
+    ``after`` is a ``(created_at, id)`` keyset position from
+    ``pagination.decode_recent_cursor``; it replaces ``offset`` so deep pages
+    are an index range scan instead of skipping rows.
+    """
+    if limit <= 0 or offset < 0:
+        raise ValueError("limit must be positive and offset non-negative.")
+    columns = ", ".join(RECENT_AD_COLUMNS)
+    with get_connection() as conn, conn.cursor() as cur:
+        if after is not None:
+            created_at, ad_id = after
+            query = (
+                f"SELECT {columns} FROM ads "
+                "WHERE (created_at, id) < ($1::timestamptz, $2::uuid) "
+                "ORDER BY created_at DESC, id DESC LIMIT $3"
+            )
+            _execute_prepared(cur, conn, "list_recent_ads_after", query, (created_at, ad_id, int(limit)))
+        else:
+            query = f"SELECT {columns} FROM ads ORDER BY created_at DESC, id DESC LIMIT $1 OFFSET $2"
+            _execute_prepared(cur, conn, "list_recent_ads", query, (int(limit), int(offset)))
+        return [dict(row) for row in cur.fetchall()]
+
+
+def list_brands(limit: Optional[int] = None, after: Optional[str] = None) -> List[str]:
+    """Brand names from the trigger-maintained brands table, alphabetically."""
+    return [row["brand_name"] for row in list_brand_counts(limit, after)]
+
+
+def list_brand_counts(limit: Optional[int] = None, after: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Brand directory rows ``{brand_name, ad_count}``, alphabetically.
+
+    ``limit=None`` returns every brand; ``after`` resumes after that brand name.
+    """
+    if limit is not None and limit <= 0:
+        raise ValueError("limit must be positive.")
+    with get_connection() as conn, conn.cursor() as cur:
+        if after is not None:
+            query = "SELECT brand_name, ad_count FROM brands WHERE brand_name > $1 ORDER BY brand_name LIMIT $2"
+            _execute_prepared(cur, conn, "list_brands_after", query, (after, limit))
+        else:
+            query = "SELECT brand_name, ad_count FROM brands ORDER BY brand_name LIMIT $1"
+            _execute_prepared(cur, conn, "list_brands", query, (limit,))
+        return [dict(row) for row in cur.fetchall()]
+
+
+def list_sitemap_shards(shard_size: int = 5000) -> List[Dict[str, Any]]:
+    """
+    Sitemap shard summary ``{shard, first_external_id, ad_count, last_modified}``.
+
+    One index-only scan of ``idx_ads_sitemap`` (see ``sitemap_shards``).
+    """
+    if shard_size <= 0:
+        raise ValueError("shard_size must be positive.")
+    query = "SELECT shard, first_external_id, ad_count, last_modified FROM sitemap_shards($1)"
+    with get_connection() as conn, conn.cursor() as cur:
+        _execute_prepared(cur, conn, "sitemap_shards", query, (int(shard_size),))
+        return [dict(row) for row in cur.fetchall()]
+
+
+def list_sitemap_page(start: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    ``{external_id, updated_at}`` rows from ``start`` (inclusive) in external_id order.
+
+    A keyset range scan over ``idx_ads_sitemap``; ``start`` is a shard's
+    ``first_external_id``.
+    """
+    if limit <= 0:
+        raise ValueError("limit must be positive.")
+    query = (
+        "SELECT external_id, updated_at FROM ads "
+        "WHERE external_id IS NOT NULL AND external_id >= $1 "
+        "ORDER BY external_id LIMIT $2"
+    )
+    with get_connection() as conn, conn.cursor() as cur:
+        _execute_prepared(cur, conn, "sitemap_page", query, (start, int(limit)))
+        return [dict(row) for row in cur.fetchall()]
+
+
+# Leaderboard metric -> promoted score column (generated from impact_scores /
+# hero_analysis and indexed; see schema.sql). Impact scores are 0-10, the hero
+# score 0-100.
+LEADERBOARD_METRICS = {
+    "overall_impact": "impact_overall",
+    "pulse_score": "impact_pulse",
+    "echo_score": "impact_echo",
+    "hook_power": "impact_hook_power",
+    "brand_integration": "impact_brand_integration",
+    "emotional_resonance": "impact_emotional_resonance",
+    "clarity_score": "impact_clarity",
+    "distinctiveness": "impact_distinctiveness",
+    "hero_score": "hero_overall_score",
+}
+
+LEADERBOARD_COLUMNS = (
+    "id",
+    "external_id",
+    "brand_name",
+    "product_name",
+    "product_category",
+    "year",
+    "one_line_summary",
+    "image_url",
+)
+
+
+def leaderboard_column(metric: str) -> str:
+    """Validate a leaderboard metric name and return its score column."""
+    try:
+        return LEADERBOARD_METRICS[metric]
+    except KeyError:
+        raise ValueError(
+            f"Unknown leaderboard metric {metric!r}; expected one of {', '.join(LEADERBOARD_METRICS)}."
+        ) from None
+
+
+def impact_leaderboard(
+    metric: str = "overall_impact",
+    limit: int = 50,
+    *,
+    category: Optional[str] = None,
+    brand: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    min_score: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Top ads by one promoted score (LEADERBOARD_COLUMNS plus ``score``), best first.
+
+    Only the given filters are added to the SQL, so an unfiltered or
+    per-category ranking is an index scan over ``idx_ads_<column>`` or
+    ``idx_ads_category_<column>`` that stops after ``limit`` rows. Ads without
+    the score are left out. ``category`` and ``brand`` match case-insensitively.
+    """
+    if limit <= 0:
+        raise ValueError("limit must be positive.")
+    column = leaderboard_column(metric)
+    conditions = [f"{column} IS NOT NULL"]
+    params: List[Any] = []
+    for key, clause, value in (
+        ("category", "lower(product_category) = lower(${n})", category),
+        ("brand", "lower(brand_name) = lower(${n})", brand),
+        ("year_from", "year >= ${n}::int", year_from),
+        ("year_to", "year <= ${n}::int", year_to),
+        ("min_score", f"{column} >= ${{n}}::real", min_score),
+    ):
+        if value is not None:
+            params.append(value)
+            conditions.append(clause.format(n=len(params)))
+    params.append(int(limit))
+    query = (
+        f"SELECT {', '.join(LEADERBOARD_COLUMNS)}, {column} AS score FROM ads "
+        f"WHERE {' AND '.join(conditions)} "
+        f"ORDER BY {column} DESC NULLS LAST, id LIMIT ${len(params)}"
+    )
+    # One prepared statement per metric and filter combination
+    statement = _statement_name("leaderboard", [column, *conditions])
+    with get_connection() as conn, conn.cursor() as cur:
+        _execute_prepared(cur, conn, statement, query, params)
+        return [dict(row) for row in cur.fetchall()]
+
+
+def stats() -> Dict[str, int]:
+    """Public archive counters from the single-row archive_stats table."""
+    query = "SELECT total_ads, total_brands FROM archive_stats WHERE id = 1"
+    with get_connection() as conn, conn.cursor() as cur:
+        _execute_prepared(cur, conn, "ad_stats", query, ())
+        row = cur.fetchone()
+        if not row:
+            return {"total_ads": 0, "total_brands": 0}
+        return {"total_ads": int(row["total_ads"]), "total_brands": int(row["total_brands"])}
+
+
+def update_asset_urls(urls: Mapping[str, Sequence[Optional[str]]], batch_size: int = 500) -> int:
+    """
+    Write ``external_id -> (video_url, image_url)`` onto matching ads.
+
+    ``None`` keeps the stored value; unchanged rows are not rewritten.
+    Returns the number of ads updated.
+    """
+    items = [(ext_id, video, image) for ext_id, (video, image) in urls.items() if video or image]
+    updated = 0
+    with get_connection() as conn, conn.cursor() as cur:
+        for start in range(0, len(items), batch_size):
+            batch = items[start : start + batch_size]
+            execute_values(
+                cur,
+                """
+                UPDATE ads a
+                SET video_url = COALESCE(v.video_url, a.video_url),
+                    image_url = COALESCE(v.image_url, a.image_url)
+                FROM (VALUES %s) AS v(external_id, video_url, image_url)
+                WHERE a.external_id = v.external_id
+                  AND (a.video_url IS DISTINCT FROM COALESCE(v.video_url, a.video_url)
+                       OR a.image_url IS DISTINCT FROM COALESCE(v.image_url, a.image_url))
+                """,
+                batch,
+                page_size=len(batch),
+            )
+            updated += cur.rowcount
+    return updated
+
+
+# --- Ad neighbour graph (similar ads) ---
+
+
+def fetch_ad_centroids(ad_ids: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """Per-ad embedding centroids ``{ad_id, centroid}`` (all ads when ``ad_ids`` is None)."""
+    ids = [str(ad_id) for ad_id in ad_ids] if ad_ids is not None else None
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT ad_id, centroid FROM ad_centroids(%s::uuid[])", (ids,))
+        return [{"ad_id": str(row["ad_id"]), "centroid": row["centroid"]} for row in cur.fetchall()]
+
+
+def refresh_ad_centroids(ad_ids: Optional[Sequence[str]] = None) -> int:
+    """
+    Recompute the stored centroids of ``ad_ids`` (every ad when None), plus any
+    embedded ad with no stored centroid yet. Returns the number stored.
+    """
+    ids = [str(ad_id) for ad_id in ad_ids] if ad_ids is not None else None
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT refresh_ad_centroids(%s::uuid[]) AS refreshed", (ids,))
+        return int(cur.fetchone()["refreshed"])
+
+
+def fetch_stored_centroids() -> List[Dict[str, Any]]:
+    """Every stored ad centroid ``{ad_id, centroid}`` (see ``refresh_ad_centroids``)."""
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT ad_id, centroid FROM ad_embedding_centroids ORDER BY ad_id")
+        return [{"ad_id": str(row["ad_id"]), "centroid": row["centroid"]} for row in cur.fetchall()]
+
+
+def get_neighbor_referrers(ad_ids: Sequence[str]) -> List[str]:
+    """Ads whose stored neighbour list includes any of ``ad_ids``."""
+    if not ad_ids:
+        return []
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT ad_id FROM ad_neighbor_referrers(%s::uuid[])", ([str(ad_id) for ad_id in ad_ids],))
+        return [str(row["ad_id"]) for row in cur.fetchall()]
+
+
+def get_neighbor_floors() -> Dict[str, Dict[str, Any]]:
+    """Map ad_id -> {min_similarity, neighbor_count} for ads with stored neighbours."""
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT ad_id, min_similarity, neighbor_count FROM ad_neighbor_floors()")
+        return {
+            str(row["ad_id"]): {
+                "min_similarity": float(row["min_similarity"]),
+                "neighbor_count": int(row["neighbor_count"]),
+            }
+            for row in cur.fetchall()
+        }
+
+
+def replace_ad_neighbors(neighbors: Mapping[str, Sequence[Sequence[Any]]]) -> int:
+    """
+    Replace the stored neighbour lists of the given ads in one transaction.
+
+    ``neighbors`` maps ad_id -> ranked ``(neighbor_ad_id, similarity)`` pairs.
+    Returns the number of rows written.
+    """
+    if not neighbors:
+        return 0
+    rows = [
+        (ad_id, neighbor_id, rank, float(similarity))
+        for ad_id, ranked in neighbors.items()
+        for rank, (neighbor_id, similarity) in enumerate(ranked, start=1)
+    ]
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM ad_neighbors WHERE ad_id = ANY(%s::uuid[])",
+            ([str(ad_id) for ad_id in neighbors],),
+        )
+        if rows:
+            execute_values(
+                cur,
+                "INSERT INTO ad_neighbors (ad_id, neighbor_ad_id, rank, similarity) VALUES %s",
+                rows,
+            )
+    return len(rows)
+
+
+def get_similar_ads(external_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Precomputed nearest ads for ``external_id`` (one indexed lookup, best first)."""
+    if limit <= 0:
+        raise ValueError("limit must be positive.")
+    query = "SELECT * FROM similar_ads($1, $2)"
+    with get_connection() as conn, conn.cursor() as cur:
+        _execute_prepared(cur, conn, "similar_ads", query, (external_id, int(limit)))
+        return [dict(row) for row in cur.fetchall()]
+
+
+def fetch_suggestion_terms(since: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Typeahead terms as ``{kind, term, weight, as_of}`` rows (suggestion_terms).
+
+    ``since`` (an earlier ``as_of``) limits the result to terms of ads changed
+    after it, recounted over the whole table.
+    """
+    query = "SELECT kind, term, weight, as_of FROM suggestion_terms($1::timestamptz)"
+    with get_connection() as conn, conn.cursor() as cur:
+        _execute_prepared(cur, conn, "suggestion_terms", query, (since,))
+        return [dict(row) for row in cur.fetchall()]
+
+
+# --- Emotional arcs (see emotion_arc.py) ---
+
+
+def fetch_emotional_timelines(missing_only: bool = True) -> List[Dict[str, Any]]:
+    """
+    ``{id, duration_seconds, timeline}`` for ads with an emotional timeline, where
+    ``timeline`` is ``emotional_metrics.emotional_timeline``. ``missing_only``
+    skips ads that already have ``emotional_arc``.
+    """
+    query = (
+        "SELECT id, duration_seconds, emotional_metrics->'emotional_timeline' AS timeline FROM ads "
+        "WHERE emotional_metrics ? 'emotional_timeline'"
+    )
+    if missing_only:
+        query += " AND emotional_arc IS NULL"
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute(query)
+        return [
+            {
+                "id": str(row["id"]),
+                "duration_seconds": float(row["duration_seconds"]) if row["duration_seconds"] is not None else None,
+                "timeline": row["timeline"],
+            }
+            for row in cur.fetchall()
+        ]
+
+
+def update_emotional_arcs(arcs: Mapping[str, Optional[Sequence[float]]], batch_size: int = 500) -> int:
+    """Write ``ad_id -> emotional_arc`` (None clears it). Returns the number of ads updated."""
+    items = [(str(ad_id), list(arc) if arc is not None else None) for ad_id, arc in arcs.items()]
+    updated = 0
+    with get_connection() as conn, conn.cursor() as cur:
+        for start in range(0, len(items), batch_size):
+            batch = items[start : start + batch_size]
+            execute_values(
+                cur,
+                """
+                UPDATE ads a
+                SET emotional_arc = v.arc
+                FROM (VALUES %s) AS v(id, arc)
+                WHERE a.id = v.id::uuid
+                  AND a.emotional_arc IS DISTINCT FROM v.arc
+                """,
+                batch,
+                template="(%s, %s::real[])",
+                page_size=len(batch),
+            )
+            updated += cur.rowcount
+    return updated
+
+
+def fetch_emotional_arcs() -> List[Dict[str, Any]]:
+    """Every stored arc with the columns the similar-arc results show."""
+    query = (
+        "SELECT id, external_id, brand_name, product_name, one_line_summary, emotional_arc "
+        "FROM ads WHERE emotional_arc IS NOT NULL AND external_id IS NOT NULL"
+    )
+    with get_connection() as conn, conn.cursor() as cur:
+        _execute_prepared(cur, conn, "emotional_arcs", query, ())
+        return [dict(row) for row in cur.fetchall()]
+
+
+# --- Transcript quote search (search_transcript_phrase in schema.sql) ---
+
+# Trigram indexes need at least three characters to narrow anything down
+TRANSCRIPT_PHRASE_MIN_LENGTH = 3
+_QUOTE_CHARS = "\"'\u201c\u201d\u2018\u2019"
+
+
+def clean_transcript_phrase(phrase: str) -> str:
+    """Collapse whitespace and drop surrounding quote marks; reject phrases too short to index."""
+    cleaned = " ".join((phrase or "").split()).strip(_QUOTE_CHARS).strip()
+    if len(cleaned) < TRANSCRIPT_PHRASE_MIN_LENGTH:
+        raise ValueError(f"Quote must be at least {TRANSCRIPT_PHRASE_MIN_LENGTH} characters.")
+    return cleaned
+
+
+def search_transcript_phrase(phrase: str, limit: int = 20, *, exact_only: bool = False) -> List[Dict[str, Any]]:
+    """
+    Spoken lines containing ``phrase``, with ``start_time``/``end_time`` and a
+    ``<mark>``-highlighted ``snippet``.
+
+    Literal matches (``exact``) rank first, then the same words in order
+    ignoring case and punctuation (skipped when ``exact_only``). Both paths are
+    GIN index scans, not embedding lookups.
+    """
+    if limit <= 0:
+        raise ValueError("limit must be positive.")
+    query = "SELECT * FROM search_transcript_phrase($1, $2, $3)"
+    with get_connection() as conn, conn.cursor() as cur:
+        _execute_prepared(
+            cur, conn, "transcript_phrase", query, (clean_transcript_phrase(phrase), int(limit), bool(exact_only))
+        )
+        return [dict(row) for row in cur.fetchall()]
+
+
 __all__ = [
+    "PoolTimeout",
     "get_connection",
+    "close_pool",
     "ad_exists",
     "insert_ad",
     "insert_segments",
@@ -421,6 +1308,41 @@ __all__ = [
     "insert_storyboards",
     "insert_embedding_items",
     "hybrid_search",
+    "hybrid_search_batch",
+    "hybrid_search_faceted",
+    "normalise_search_filters",
+    "SEARCH_FILTER_KEYS",
+    "get_corpus_generation",
+    "bump_corpus_generation",
+    "get_ad_by_external_id",
+    "get_ad_version",
+    "list_recent",
+    "list_brands",
+    "list_brand_counts",
+    "list_sitemap_shards",
+    "list_sitemap_page",
+    "LEADERBOARD_METRICS",
+    "leaderboard_column",
+    "impact_leaderboard",
+    "stats",
+    "update_asset_urls",
+    "fetch_ad_centroids",
+    "refresh_ad_centroids",
+    "fetch_stored_centroids",
+    "get_neighbor_referrers",
+    "get_neighbor_floors",
+    "replace_ad_neighbors",
+    "get_similar_ads",
+    "fetch_suggestion_terms",
+    "fetch_emotional_timelines",
+    "update_emotional_arcs",
+    "fetch_emotional_arcs",
+    "TRANSCRIPT_PHRASE_MIN_LENGTH",
+    "clean_transcript_phrase",
+    "search_transcript_phrase",
+    "ad_detail_columns",
+    "AD_DETAIL_COLUMNS",
+    "AD_DETAIL_OPTIONAL_FIELDS",
     "find_incomplete_ads",
     "delete_ad",
 ]
@@ -454,8 +1376,8 @@ def find_incomplete_ads(
                     a.s3_key,
                     a.extraction_version,
                     a.impact_scores,
-                    (SELECT COUNT(*) FROM ad_storyboards WHERE ad_id = a.id) as storyboard_count,
-                    (SELECT COUNT(*) FROM embedding_items WHERE ad_id = a.id) as embedding_count
+                    a.storyboard_count,
+                    a.embedding_count
                 FROM ads a
                 ORDER BY a.created_at DESC
                 LIMIT %s
@@ -530,6 +1452,7 @@ def delete_ad(ad_id: str) -> bool:
             
             # Delete the ad itself
             try:
+                # trg_ads_bump_generation_on_delete invalidates cached results
                 cur.execute("DELETE FROM ads WHERE id = %s", (ad_id,))
                 conn.commit()
                 logger.info("Deleted ad %s and all child records", ad_id)
@@ -61,11 +61,21 @@ def _get_impl():
 
 
 def get_connection():
-    """Get database connection (postgres backend only)."""
+    """
+    Return the backend's ``get_connection`` context-manager factory (postgres
+    backend only; None for HTTP). Prefer the read helpers below in API code.
+    """
     impl = _get_impl()
     return getattr(impl, "get_connection", None)
 
 
+def close_pool():
+    """Release pooled connections (no-op for the HTTP backend)."""
+    close = getattr(_get_impl(), "close_pool", None)
+    if close is not None:
+        close()
+
+
 def ad_exists(*, external_id=None, s3_key=None):
     """Check if ad exists."""
     return _get_impl().ad_exists(external_id=external_id, s3_key=s3_key)
@@ -106,9 +116,162 @@ def insert_embedding_items(ad_id, items):
     return _get_impl().insert_embedding_items(ad_id, items)
 
 
-def hybrid_search(query_embedding, query_text, limit=50, item_types=None):
-    """Run hybrid search."""
-    return _get_impl().hybrid_search(query_embedding, query_text, limit, item_types)
+def hybrid_search(query_embedding, query_text, limit=50, item_types=None, filters=None, timeout_ms=None):
+    """Run hybrid search with optional structured filters (None embedding = lexical only)."""
+    return _get_impl().hybrid_search(
+        query_embedding, query_text, limit, item_types, filters=filters, timeout_ms=timeout_ms
+    )
+
+
+def hybrid_search_faceted(query_embedding, query_text, limit=50, item_types=None, filters=None, timeout_ms=None):
+    """Hybrid search plus facet counts over the candidates; returns (candidates, facets)."""
+    return _get_impl().hybrid_search_faceted(
+        query_embedding, query_text, limit, item_types, filters=filters, timeout_ms=timeout_ms
+    )
+
+
+def hybrid_search_batch(query_embeddings, query_texts, limit=50, item_types=None, filters=None, timeout_ms=None):
+    """Run hybrid search for many queries in one round trip; one candidate list per query."""
+    return _get_impl().hybrid_search_batch(
+        query_embeddings, query_texts, limit, item_types, filters=filters, timeout_ms=timeout_ms
+    )
+
+
+def get_ad_by_external_id(external_id, include=None):
+    """Fetch one ad; heavy JSONB columns only when listed in ``include``."""
+    return _get_impl().get_ad_by_external_id(external_id, include=include)
+
+
+def get_ad_version(external_id):
+    """Return an ad's ``updated_at`` (ISO string) for ETag checks, or None."""
+    return _get_impl().get_ad_version(external_id)
+
+
+def list_recent(limit=20, offset=0, after=None):
+    """List most recently indexed ads (``after`` = (created_at, id) keyset position)."""
+    return _get_impl().list_recent(limit, offset, after=after)
+
+
+def list_brands(limit=None, after=None):
+    """List distinct brand names (keyset-paged by name when ``after`` is given)."""
+    return _get_impl().list_brands(limit, after)
+
+
+def list_brand_counts(limit=None, after=None):
+    """List brands with their ad counts."""
+    return _get_impl().list_brand_counts(limit, after)
+
+
+def list_sitemap_shards(shard_size=5000):
+    """Sitemap shards ``{shard, first_external_id, ad_count, last_modified}`` in external_id order."""
+    return _get_impl().list_sitemap_shards(shard_size)
+
+
+def list_sitemap_page(start, limit):
+    """``{external_id, updated_at}`` rows of one sitemap shard (keyset scan from ``start``)."""
+    return _get_impl().list_sitemap_page(start, limit)
+
+
+def impact_leaderboard(
+    metric="overall_impact",
+    limit=50,
+    *,
+    category=None,
+    brand=None,
+    year_from=None,
+    year_to=None,
+    min_score=None,
+):
+    """Top ads by a promoted impact score (``db.LEADERBOARD_METRICS``), best first."""
+    return _get_impl().impact_leaderboard(
+        metric,
+        limit,
+        category=category,
+        brand=brand,
+        year_from=year_from,
+        year_to=year_to,
+        min_score=min_score,
+    )
+
+
+def stats():
+    """Return total ad and brand counts."""
+    return _get_impl().stats()
+
+
+def update_asset_urls(urls):
+    """Write external_id -> (video_url, image_url) onto matching ads."""
+    return _get_impl().update_asset_urls(urls)
+
+
+def fetch_ad_centroids(ad_ids=None):
+    """Per-ad embedding centroids (all ads when ``ad_ids`` is None)."""
+    return _get_impl().fetch_ad_centroids(ad_ids)
+
+
+def refresh_ad_centroids(ad_ids=None):
+    """Recompute stored centroids for ``ad_ids`` (all ads when None); returns the count stored."""
+    return _get_impl().refresh_ad_centroids(ad_ids)
+
+
+def fetch_stored_centroids():
+    """Every stored per-ad centroid ``{ad_id, centroid}``."""
+    return _get_impl().fetch_stored_centroids()
+
+
+def get_neighbor_referrers(ad_ids):
+    """Ads whose stored neighbour list includes any of ``ad_ids``."""
+    return _get_impl().get_neighbor_referrers(ad_ids)
+
+
+def get_neighbor_floors():
+    """Lowest stored neighbour similarity and neighbour count per ad."""
+    return _get_impl().get_neighbor_floors()
+
+
+def replace_ad_neighbors(neighbors):
+    """Replace the stored neighbour lists for the given ads."""
+    return _get_impl().replace_ad_neighbors(neighbors)
+
+
+def get_similar_ads(external_id, limit=10):
+    """Precomputed nearest ads for an ad."""
+    return _get_impl().get_similar_ads(external_id, limit)
+
+
+def fetch_suggestion_terms(since=None):
+    """Typeahead terms with ad counts (only terms of ads changed after ``since`` when given)."""
+    return _get_impl().fetch_suggestion_terms(since)
+
+
+def fetch_emotional_timelines(missing_only=True):
+    """``{id, duration_seconds, timeline}`` for ads with an emotional timeline (arc backfill)."""
+    return _get_impl().fetch_emotional_timelines(missing_only)
+
+
+def update_emotional_arcs(arcs):
+    """Write ``ad_id -> emotional_arc`` (resampled curve, or None to clear)."""
+    return _get_impl().update_emotional_arcs(arcs)
+
+
+def fetch_emotional_arcs():
+    """Every stored emotional arc with ``external_id``, brand and summary columns."""
+    return _get_impl().fetch_emotional_arcs()
+
+
+def search_transcript_phrase(phrase, limit=20, *, exact_only=False):
+    """Spoken lines quoting ``phrase`` with timestamps and highlighted snippets."""
+    return _get_impl().search_transcript_phrase(phrase, limit, exact_only=exact_only)
+
+
+def get_corpus_generation():
+    """Return the corpus generation counter (bumped on every ingest write)."""
+    return _get_impl().get_corpus_generation()
+
+
+def bump_corpus_generation():
+    """Advance the corpus generation so cached retrieval results are invalidated."""
+    return _get_impl().bump_corpus_generation()
 
 
 def find_incomplete_ads(
@@ -140,6 +303,7 @@ def update_processing_notes(ad_id, notes):
 
 __all__ = [
     "get_connection",
+    "close_pool",
     "ad_exists",
     "insert_ad",
     "insert_segments",
@@ -149,6 +313,32 @@ __all__ = [
     "insert_storyboards",
     "insert_embedding_items",
     "hybrid_search",
+    "hybrid_search_batch",
+    "hybrid_search_faceted",
+    "get_ad_by_external_id",
+    "get_ad_version",
+    "list_recent",
+    "list_brands",
+    "list_brand_counts",
+    "list_sitemap_shards",
+    "list_sitemap_page",
+    "impact_leaderboard",
+    "stats",
+    "update_asset_urls",
+    "fetch_ad_centroids",
+    "refresh_ad_centroids",
+    "fetch_stored_centroids",
+    "get_neighbor_referrers",
+    "get_neighbor_floors",
+    "replace_ad_neighbors",
+    "get_similar_ads",
+    "fetch_suggestion_terms",
+    "fetch_emotional_timelines",
+    "update_emotional_arcs",
+    "fetch_emotional_arcs",
+    "search_transcript_phrase",
+    "get_corpus_generation",
+    "bump_corpus_generation",
     "find_incomplete_ads",
     "delete_ad",
     "update_processing_notes",
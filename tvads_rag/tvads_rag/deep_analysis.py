@@ -222,10 +222,7 @@ def analyse_hero_ad(
         )
         client = _get_gemini_client(vision_cfg)
         content_parts = _build_content_parts(HERO_ANALYSIS_PROMPT, transcript_text, samples[:MAX_FRAMES])
-        response = client.models.generate_content(
-            model=model_name,
-            contents=content_parts,
-        )
+        response = visual_analysis.generate_gemini_content(client, model_name, content_parts)
         raw_text = getattr(response, "text", None)
         if not raw_text:
             raise RuntimeError("Gemini hero analysis returned empty response.")
@@ -10,9 +10,12 @@ from typing import Iterable, List, Sequence
 
 from openai import OpenAI
 
+from .circuit_breaker import protected
 from .config import get_openai_config
 
 DEFAULT_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# Always request 1536 dimensions to match schema (vector(1536))
+EMBEDDING_DIMENSIONS = 1536
 
 
 @lru_cache(maxsize=1)
@@ -21,6 +24,11 @@ def _get_openai_client() -> OpenAI:
     return OpenAI(api_key=cfg.api_key, base_url=cfg.api_base)
 
 
+@protected("openai.embeddings")
+def _create_embeddings(client: OpenAI, model: str, batch: List[str]):
+    return client.embeddings.create(model=model, input=batch, dimensions=EMBEDDING_DIMENSIONS)
+
+
 def embed_texts(texts: Sequence[str], batch_size: int = DEFAULT_BATCH_SIZE) -> List[List[float]]:
     """
     Embed a list of texts and return vectors in the same order.
@@ -36,27 +44,17 @@ def embed_texts(texts: Sequence[str], batch_size: int = DEFAULT_BATCH_SIZE) -> L
     for text in texts:
         batch.append(text)
         if len(batch) >= batch_size:
-            # Always request 1536 dimensions to match schema (vector(1536))
             # text-embedding-3-large supports dimensions parameter for size reduction
-            response = client.embeddings.create(
-                model=cfg.embedding_model_name,
-                input=batch,
-                dimensions=1536
-            )
+            response = _create_embeddings(client, cfg.embedding_model_name, batch)
             vectors.extend([data.embedding for data in response.data])
             batch.clear()
 
     if batch:
-        # Always request 1536 dimensions to match schema (vector(1536))
-        response = client.embeddings.create(
-            model=cfg.embedding_model_name,
-            input=batch,
-            dimensions=1536
-        )
+        response = _create_embeddings(client, cfg.embedding_model_name, batch)
         vectors.extend([data.embedding for data in response.data])
 
     return vectors
 
 
-__all__ = ["embed_texts"]
+__all__ = ["embed_texts", "EMBEDDING_DIMENSIONS"]
 
@@ -0,0 +1,247 @@
+"""
+Emotional-arc similarity ("find ads with a similar emotional arc").
+
+At ingest, ``emotional_metrics.emotional_timeline.readings`` is resampled onto
+EMOTION_ARC_POINTS evenly spaced positions of normalised ad time. The result is
+stored as ``ads.emotional_arc``: the intensity samples followed by the valence
+samples, one flat ``real[]``. Ads of different lengths therefore compare
+directly.
+
+``ArcIndex`` stacks every stored arc into one float32 matrix. A query is a
+vectorised RMS distance against all ads, which narrows the field to the
+EMOTION_ARC_SHORTLIST nearest. The shortlist is then re-ranked with a banded
+dynamic time warping distance, so an ad whose emotional peak lands a few
+seconds later still matches. The DTW runs in NumPy across the whole shortlist
+at once.
+
+Backfill ads indexed before the column existed:
+    python scripts/backfill_emotional_arcs.py
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import db_backend
+from .config import EmotionArcConfig, get_emotion_arc_config
+
+logger = logging.getLogger(__name__)
+
+# Channels stored in ads.emotional_arc, in order
+CHANNELS = ("intensity", "valence")
+_CHANNEL_RANGES = {"intensity": (0.0, 1.0), "valence": (-1.0, 1.0)}
+
+
+def _as_float(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if np.isfinite(number) else None
+
+
+def resample_arc(
+    timeline: Optional[Mapping[str, Any]],
+    duration_seconds: Optional[float] = None,
+    points: Optional[int] = None,
+) -> Optional[List[float]]:
+    """
+    Resample an emotional timeline to ``points`` samples per channel.
+
+    Readings are placed at ``t_s / duration`` (the last reading's time when the
+    duration is unknown) and linearly interpolated; values are clipped to their
+    documented ranges. Returns None when there are no usable readings.
+    """
+    points = points or get_emotion_arc_config().points
+    readings = (timeline or {}).get("readings") if isinstance(timeline, Mapping) else None
+    samples: List[Tuple[float, float, float]] = []
+    for reading in readings or []:
+        if not isinstance(reading, Mapping):
+            continue
+        t = _as_float(reading.get("t_s"))
+        if t is None or t < 0:
+            continue
+        intensity = _as_float(reading.get("intensity"))
+        valence = _as_float(reading.get("valence"))
+        samples.append((t, intensity if intensity is not None else 0.0, valence if valence is not None else 0.0))
+    if not samples:
+        return None
+    samples.sort(key=lambda sample: sample[0])
+    times = np.array([sample[0] for sample in samples], dtype=np.float64)
+    end = float(duration_seconds) if duration_seconds and duration_seconds > 0 else float(times[-1])
+    positions = np.clip(times / end, 0.0, 1.0) if end > 0 else np.zeros_like(times)
+    grid = np.linspace(0.0, 1.0, points)
+    channels = []
+    for idx, name in enumerate(CHANNELS, start=1):
+        low, high = _CHANNEL_RANGES[name]
+        values = np.clip([sample[idx] for sample in samples], low, high)
+        channels.append(np.interp(grid, positions, values))
+    return [round(float(v), 4) for v in np.concatenate(channels)]
+
+
+def arc_from_metrics(
+    emotional_metrics: Optional[Mapping[str, Any]], duration_seconds: Optional[float] = None
+) -> Optional[List[float]]:
+    """``resample_arc`` for an ``emotional_metrics`` JSONB payload (ingest helper)."""
+    if not isinstance(emotional_metrics, Mapping):
+        return None
+    return resample_arc(emotional_metrics.get("emotional_timeline"), duration_seconds)
+
+
+def dtw_distances(query: np.ndarray, candidates: np.ndarray, window: int) -> np.ndarray:
+    """
+    Banded DTW distance from ``query`` (channels x points) to each candidate
+    (n x channels x points), summing squared differences over channels.
+
+    The recurrence runs over the ``points x (2 * window + 1)`` band, with every
+    step vectorised across all candidates. Returns RMS-scaled distances (n,).
+    """
+    n, _, length = candidates.shape
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    # cost[k, i, j]: candidate k at step i vs query at step j
+    cost = ((candidates[:, :, :, None] - query[None, :, None, :]) ** 2).sum(axis=1)
+    acc = np.full((n, length + 1, length + 1), np.inf, dtype=np.float32)
+    acc[:, 0, 0] = 0.0
+    for i in range(1, length + 1):
+        for j in range(max(1, i - window), min(length, i + window) + 1):
+            best = np.minimum(np.minimum(acc[:, i - 1, j], acc[:, i, j - 1]), acc[:, i - 1, j - 1])
+            acc[:, i, j] = cost[:, i - 1, j - 1] + best
+    return np.sqrt(acc[:, length, length] / length)
+
+
+class ArcIndex:
+    """Immutable matrix of stored arcs plus the row metadata returned with matches."""
+
+    def __init__(self, rows: Sequence[Mapping[str, Any]], points: int):
+        self.points = points
+        self._rows: List[Dict[str, Any]] = []
+        arcs: List[Sequence[float]] = []
+        skipped = 0
+        for row in rows:
+            arc = row.get("emotional_arc")
+            if arc is None or len(arc) != points * len(CHANNELS):
+                skipped += 1
+                continue
+            arcs.append(arc)
+            self._rows.append({k: v for k, v in row.items() if k != "emotional_arc"})
+        if skipped:
+            # Usually arcs stored before EMOTION_ARC_POINTS changed; rerun the backfill
+            logger.warning("Skipped %d emotional arcs that are not %d points long", skipped, points)
+        self._matrix = np.asarray(arcs, dtype=np.float32).reshape(len(arcs), len(CHANNELS), points)
+        self._positions = {str(row["external_id"]): pos for pos, row in enumerate(self._rows)}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def arc_of(self, external_id: str) -> Optional[np.ndarray]:
+        pos = self._positions.get(external_id)
+        return None if pos is None else self._matrix[pos]
+
+    def search(
+        self,
+        query: np.ndarray,
+        limit: int,
+        *,
+        shortlist: int,
+        dtw_window: Optional[int],
+        exclude: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Nearest arcs to ``query`` (channels x points), best first, each row with
+        a ``distance``. ``dtw_window=None`` ranks by RMS distance alone.
+        """
+        if len(self) == 0 or limit <= 0:
+            return []
+        distances = np.sqrt(((self._matrix - query[None, :, :]) ** 2).sum(axis=(1, 2)) / self.points)
+        excluded = self._positions.get(exclude) if exclude is not None else None
+        if excluded is not None:
+            distances[excluded] = np.inf
+        keep = min(len(self) - (excluded is not None), max(shortlist, limit))
+        if keep <= 0:
+            return []
+        candidates = np.argpartition(distances, keep - 1)[:keep]
+        if dtw_window is not None:
+            scores = dtw_distances(query, self._matrix[candidates], dtw_window)
+        else:
+            scores = distances[candidates]
+        order = np.argsort(scores, kind="stable")[:limit]
+        return [
+            {**self._rows[int(candidates[i])], "distance": round(float(scores[i]), 4)} for i in order
+        ]
+
+
+class ArcSearch:
+    """
+    Process-wide ``ArcIndex``. The first request loads it; after that the API
+    calls ``refresh`` every EMOTION_ARC_REFRESH_SECONDS in the background, and
+    requests keep using the previous index until the new one is swapped in.
+    """
+
+    def __init__(self, config: Optional[EmotionArcConfig] = None, fetch=None):
+        self._config = config or get_emotion_arc_config()
+        self._fetch = fetch or db_backend.fetch_emotional_arcs
+        # Serialises loads; readers never take it once an index exists
+        self._load_lock = threading.Lock()
+        self._index: Optional[ArcIndex] = None
+
+    def index(self) -> ArcIndex:
+        index = self._index
+        if index is not None:
+            return index
+        with self._load_lock:
+            if self._index is None:
+                self._load()
+            return self._index
+
+    def refresh(self) -> int:
+        """Rebuild the index from the database and swap it in; returns its size."""
+        with self._load_lock:
+            return self._load()
+
+    def _load(self) -> int:
+        index = ArcIndex(self._fetch(), self._config.points)
+        self._index = index
+        logger.info("Emotional-arc index loaded: %d ads", len(index))
+        return len(index)
+
+    def similar_to(self, external_id: str, limit: int = 10, *, dtw: bool = True) -> Optional[List[Dict[str, Any]]]:
+        """Ads whose arc is closest to ``external_id``'s; None if that ad has no arc."""
+        index = self.index()
+        query = index.arc_of(external_id)
+        if query is None:
+            return None
+        window = max(1, int(round(self._config.dtw_window * self._config.points))) if dtw else None
+        return index.search(
+            query, limit, shortlist=self._config.shortlist, dtw_window=window, exclude=external_id
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {"ads": len(self._index) if self._index is not None else None, "points": self._config.points}
+
+
+_arc_search: Optional[ArcSearch] = None
+_arc_search_lock = threading.Lock()
+
+
+def get_arc_search() -> ArcSearch:
+    global _arc_search
+    with _arc_search_lock:
+        if _arc_search is None:
+            _arc_search = ArcSearch()
+        return _arc_search
+
+
+__all__ = [
+    "CHANNELS",
+    "resample_arc",
+    "arc_from_metrics",
+    "dtw_distances",
+    "ArcIndex",
+    "ArcSearch",
+    "get_arc_search",
+]
@@ -93,15 +93,17 @@ def main() -> None:
     args = _parse_args()
     samples = _load_golden_set(Path(args.golden_path))
 
-    def _retrieve(query: str):
-        return retrieval.retrieve_with_rerank(
-            query,
-            candidate_k=args.candidate_k,
-            final_k=args.final_k,
-            item_types=args.item_types,
-        )
+    # One embedding request and one SQL round trip for the whole golden set
+    queries = [str(sample.get("query")) for sample in samples]
+    batch = retrieval.retrieve_batch(
+        queries,
+        candidate_k=args.candidate_k,
+        final_k=args.final_k,
+        item_types=args.item_types,
+    )
+    results_by_query = dict(zip(queries, batch))
 
-    report = evaluate_samples(samples, _retrieve)
+    report = evaluate_samples(samples, results_by_query.__getitem__)
     print(f"Golden set accuracy: {report['accuracy']:.2%}")
     for sample in report["samples"]:
         status = "✅" if sample["hit"] else "⚠️"
@@ -18,6 +18,8 @@ from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
 # Parallel processing configuration (conservative default: 3 workers)
 PARALLEL_WORKERS = int(os.getenv("INGEST_PARALLEL_WORKERS", "3"))
 _progress_lock = threading.Lock()
+# Ads whose embeddings were stored this run; feeds the ad_neighbors update.
+_embedded_ad_ids: List[str] = []
 
 # Retry configuration
 MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))
@@ -34,6 +36,11 @@ def with_retry(
 ) -> Callable:
     """
     Decorator to retry a function on transient failures.
+
+    ``CircuitOpenError`` is never retried: the provider is known to be down,
+    so the stage fails fast instead of sleeping through backoff. Provider
+    client errors (4xx other than 408/429) are not retried either; the same
+    request would be rejected again.
     
     Args:
         max_retries: Maximum number of retry attempts
@@ -48,7 +55,11 @@ def with_retry(
             for attempt in range(max_retries + 1):
                 try:
                     return func(*args, **kwargs)
+                except CircuitOpenError:
+                    raise
                 except exceptions as e:
+                    if is_client_error(e):
+                        raise
                     last_exception = e
                     if attempt < max_retries:
                         wait_time = delay * (2 ** attempt)  # Exponential backoff
@@ -67,11 +78,13 @@ def with_retry(
         return wrapper
     return decorator
 
-from . import asr, embeddings, media, visual_analysis, metadata_ingest, deep_analysis
+from . import asr, embeddings, media, visual_analysis, metadata_ingest, deep_analysis, neighbors, emotion_arc
+from .circuit_breaker import CircuitOpenError, is_client_error
 from .visual_analysis import SafetyBlockError, StoryboardTimeoutError
 from .analysis import analyse_ad_transcript, extract_flat_metadata, extract_jsonb_columns, EXTRACTION_VERSION
 from .config import (
     describe_active_models,
+    get_neighbor_config,
     get_pipeline_config,
     get_storage_config,
     get_vision_config,
@@ -177,6 +190,9 @@ def _build_ad_payload(
             flat_fields["one_line_summary"] = metadata_entry.title
         if metadata_entry.duration_seconds and not probe.get("duration_seconds"):
             probe["duration_seconds"] = metadata_entry.duration_seconds
+        # Served directly by the API instead of re-reading the spreadsheet
+        flat_fields["video_url"] = metadata_entry.video_url or None
+        flat_fields["image_url"] = metadata_entry.still_url or None
 
     payload = {**flat_fields}
     payload.update(
@@ -194,6 +210,10 @@ def _build_ad_payload(
         # Extraction v2.0 JSONB columns
         impact_scores=jsonb_columns.get("impact_scores"),
         emotional_metrics=jsonb_columns.get("emotional_metrics"),
+        # Fixed-length resampled timeline for arc-similarity search
+        emotional_arc=emotion_arc.arc_from_metrics(
+            jsonb_columns.get("emotional_metrics"), probe.get("duration_seconds")
+        ),
         effectiveness=jsonb_columns.get("effectiveness"),
         extraction_version=EXTRACTION_VERSION,
         # Legacy columns (for backwards compatibility)
@@ -580,6 +600,8 @@ def _embed_and_store(ad_id: str, items: List[Dict]) -> None:
     for attempt in range(max_retries):
         try:
             db_backend.insert_embedding_items(ad_id, items)
+            with _progress_lock:
+                _embedded_ad_ids.append(ad_id)
             return
         except Exception as e:
             error_str = str(e)
@@ -932,6 +954,15 @@ def process_ad_record(
                     "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
                 }
                 storyboard_items = []
+            except CircuitOpenError as e:
+                # Provider is failing fast; park the stage for repair_storyboards.
+                logger.warning("[%s] Storyboard parked: %s", external_id, str(e))
+                processing_notes["storyboard_error"] = {
+                    "type": "circuit_open",
+                    "reason": str(e),
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                }
+                storyboard_items = []
             except StoryboardTimeoutError as e:
                 logger.warning("[%s] Storyboard analysis timed out: %s", external_id, str(e))
                 processing_notes["storyboard_error"] = {
@@ -983,7 +1014,32 @@ def process_ad_record(
         # Stage 8: Embeddings
         logger.debug("[%s] Stage 8: Generating embeddings...", external_id)
         if embedding_items:
-            _embed_and_store(ad_id, embedding_items)
+            try:
+                _embed_and_store(ad_id, embedding_items)
+            except CircuitOpenError as e:
+                # Park embeddings; find_incomplete_ads/repair_embeddings pick the ad up later.
+                logger.warning("[%s] Embeddings parked: %s", external_id, str(e))
+                processing_notes["embeddings_error"] = {
+                    "type": "circuit_open",
+                    "reason": str(e),
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                }
+                try:
+                    db_backend.update_processing_notes(ad_id, processing_notes)
+                except Exception as notes_err:
+                    logger.warning(
+                        "[%s] Failed to store processing notes: %s",
+                        external_id, str(notes_err)[:100]
+                    )
+
+        # Invalidate cached retrieval results now that the corpus changed
+        try:
+            db_backend.bump_corpus_generation()
+        except Exception as gen_err:
+            logger.warning(
+                "[%s] Failed to bump corpus generation: %s",
+                external_id, str(gen_err)[:100]
+            )
 
         elapsed = time.time() - start_time
         logger.info(
@@ -1091,6 +1147,23 @@ def _run_retry_incomplete(args, storage_cfg, metadata_index, vision_tier) -> Non
             failed += 1
     
     logger.info("Completed retry: %s/%s succeeded", success, total)
+    _refresh_ad_neighbors()
+
+
+def _refresh_ad_neighbors() -> None:
+    """Fold this run's newly embedded ads into the precomputed ad_neighbors graph."""
+    # Drain the list so a later run in the same process starts empty
+    with _progress_lock:
+        ad_ids = list(_embedded_ad_ids)
+        _embedded_ad_ids.clear()
+    if not ad_ids or not get_neighbor_config().update_on_ingest:
+        return
+    try:
+        neighbors.update_for_ads(ad_ids)
+    except Exception as e:
+        # Similar-ads pages fall back to stale neighbours; a later run or
+        # `python -m tvads_rag.tvads_rag.neighbors --rebuild` repairs it.
+        logger.warning("ad_neighbors update failed: %s", e)
 
 
 def main() -> None:
@@ -1196,6 +1269,7 @@ def main() -> None:
                     failed += 1
 
     logger.info("Completed ingestion: %s/%s succeeded", success, total)
+    _refresh_ad_neighbors()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,197 @@
+"""
+Precomputed ad-level similarity graph (``ad_neighbors``).
+
+Each ad is represented by the centroid of its embedding_items vectors. Top-K
+neighbours are computed in batches with a normalised float32 matrix product
+and stored in ``ad_neighbors``, so the similar-ads endpoint is a single
+indexed lookup instead of a hybrid search + rerank per page view.
+
+Centroids are stored in ``ad_embedding_centroids``. After an ingest only the
+ingested ads' centroids are recomputed and their neighbour lists rebuilt.
+An existing ad is recomputed only in two cases: a new ad beats its current
+K-th similarity, or its list includes a re-ingested ad, whose stored
+similarity may now be stale.
+
+Usage:
+    python -m tvads_rag.tvads_rag.neighbors --rebuild
+    python -m tvads_rag.tvads_rag.neighbors --ad-id <uuid> --ad-id <uuid> --k 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import db_backend
+from .config import get_neighbor_config
+
+logger = logging.getLogger(__name__)
+
+Neighbors = Dict[str, List[Tuple[str, float]]]
+
+
+def build_matrix(centroids: Sequence[Mapping[str, object]]) -> Tuple[List[str], np.ndarray]:
+    """Stack centroids into a unit-normalised float32 matrix (zero vectors dropped)."""
+    ids: List[str] = []
+    vectors: List[np.ndarray] = []
+    for row in centroids:
+        vector = np.asarray(row["centroid"], dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if vector.ndim != 1 or norm == 0.0:
+            continue
+        ids.append(str(row["ad_id"]))
+        vectors.append(vector / norm)
+    if not vectors:
+        return [], np.zeros((0, 0), dtype=np.float32)
+    return ids, np.vstack(vectors)
+
+
+def top_k(
+    matrix: np.ndarray,
+    rows: Sequence[int],
+    k: int,
+    *,
+    batch_size: int = 512,
+) -> Dict[int, List[Tuple[int, float]]]:
+    """
+    Cosine top-``k`` neighbours (excluding self) for the given row indices.
+
+    Similarities are computed ``batch_size`` rows at a time; ``argpartition``
+    selects the candidates and only those are sorted.
+    """
+    total = matrix.shape[0]
+    k = min(k, total - 1)
+    result: Dict[int, List[Tuple[int, float]]] = {}
+    if k <= 0:
+        return {int(row): [] for row in rows}
+    rows = np.asarray(list(rows), dtype=np.int64)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start : start + batch_size]
+        sims = matrix[batch] @ matrix.T
+        sims[np.arange(len(batch)), batch] = -np.inf
+        candidates = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        for offset, row in enumerate(batch):
+            cols = candidates[offset]
+            order = cols[np.argsort(-sims[offset, cols], kind="stable")]
+            result[int(row)] = [(int(col), float(sims[offset, col])) for col in order]
+    return result
+
+
+def _to_neighbors(ids: Sequence[str], ranked: Mapping[int, List[Tuple[int, float]]]) -> Neighbors:
+    return {ids[row]: [(ids[col], sim) for col, sim in pairs] for row, pairs in ranked.items()}
+
+
+def affected_rows(
+    matrix: np.ndarray,
+    ids: Sequence[str],
+    new_rows: Sequence[int],
+    floors: Mapping[str, Mapping[str, float]],
+    k: int,
+    stale: Iterable[str] = (),
+) -> List[int]:
+    """
+    Rows whose neighbour lists can change when ``new_rows`` join the graph:
+    the new ads themselves, ads with fewer than ``k`` stored neighbours, ads
+    for which some new ad is more similar than their current K-th neighbour,
+    and ``stale`` ads (whose lists include a re-ingested ad).
+    """
+    new_set = set(int(row) for row in new_rows)
+    stale_set = set(stale)
+    affected = set(new_set)
+    best_new = (matrix[sorted(new_set)] @ matrix.T).max(axis=0) if new_set else None
+    for row, ad_id in enumerate(ids):
+        if row in new_set:
+            continue
+        if ad_id in stale_set:
+            affected.add(row)
+            continue
+        if best_new is None:
+            continue
+        floor = floors.get(ad_id)
+        if floor is None or floor["neighbor_count"] < k or best_new[row] > floor["min_similarity"]:
+            affected.add(row)
+    return sorted(affected)
+
+
+def rebuild_all(k: Optional[int] = None) -> int:
+    """Recompute every ad's neighbours. Returns the number of ads written."""
+    cfg = get_neighbor_config()
+    k = k or cfg.k
+    db_backend.refresh_ad_centroids(None)
+    ids, matrix = build_matrix(db_backend.fetch_stored_centroids())
+    if not ids:
+        logger.info("No ad centroids found; ad_neighbors left unchanged.")
+        return 0
+    ranked = top_k(matrix, range(len(ids)), k, batch_size=cfg.batch_size)
+    written = db_backend.replace_ad_neighbors(_to_neighbors(ids, ranked))
+    logger.info("Rebuilt ad_neighbors for %d ads (%d rows, k=%d)", len(ids), written, k)
+    return len(ids)
+
+
+def update_for_ads(ad_ids: Iterable[str], k: Optional[int] = None) -> int:
+    """
+    Incrementally refresh the graph after ``ad_ids`` were ingested (or re-ingested).
+
+    Only these ads' centroids are recomputed; the rest come from the stored
+    centroids. Returns the number of ads whose neighbour lists were rewritten.
+    """
+    cfg = get_neighbor_config()
+    k = k or cfg.k
+    wanted = sorted({str(ad_id) for ad_id in ad_ids})
+    if not wanted:
+        return 0
+    db_backend.refresh_ad_centroids(wanted)
+    ids, matrix = build_matrix(db_backend.fetch_stored_centroids())
+    present = set(ids)
+    new_rows = [row for row, ad_id in enumerate(ids) if ad_id in wanted]
+    stale = set(db_backend.get_neighbor_referrers(wanted)) - set(wanted)
+    rows = affected_rows(matrix, ids, new_rows, db_backend.get_neighbor_floors(), k, stale=stale)
+    lists = _to_neighbors(ids, top_k(matrix, rows, k, batch_size=cfg.batch_size)) if ids else {}
+    # Ads that no longer have embeddings keep no neighbour list
+    lists.update({ad_id: [] for ad_id in wanted if ad_id not in present})
+    if not lists:
+        logger.info("None of the %d ingested ads have embeddings; skipping neighbour update.", len(wanted))
+        return 0
+    written = db_backend.replace_ad_neighbors(lists)
+    logger.info(
+        "Updated ad_neighbors: %d new ads, %d stale lists, %d ads rewritten (%d rows, k=%d)",
+        len(new_rows), len(stale), len(lists), written, k,
+    )
+    return len(lists)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the precomputed ad similarity graph.")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--rebuild", action="store_true", help="Recompute neighbours for every ad.")
+    group.add_argument(
+        "--ad-id",
+        action="append",
+        dest="ad_ids",
+        help="Incrementally update for this ad UUID (repeatable).",
+    )
+    parser.add_argument("--k", type=int, default=None, help="Neighbours per ad (default: NEIGHBORS_K).")
+    return parser.parse_args()
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO"),
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    args = _parse_args()
+    if args.rebuild:
+        rebuild_all(args.k)
+    else:
+        update_for_ads(args.ad_ids, args.k)
+
+
+__all__ = ["build_matrix", "top_k", "affected_rows", "rebuild_all", "update_for_ads"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Opaque pagination cursors.
+
+Listing endpoints page with keyset cursors (the sort key of the last row
+returned), so deep pages cost the same index range scan as the first one.
+Search pages carry a token pointing at a server-side cached result list.
+Cursors are URL-safe base64 of a small JSON object; clients must treat them
+as opaque.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+RECENT = "recent"
+BRANDS = "brands"
+SEARCH = "search"
+
+
+class InvalidCursor(ValueError):
+    """Raised for malformed, foreign or expired cursors."""
+
+
+def encode_cursor(kind: str, **values: Any) -> str:
+    payload = json.dumps({"k": kind, **values}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, kind: str) -> Dict[str, Any]:
+    """Decode ``token`` and check it was issued for ``kind``."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise InvalidCursor("Malformed pagination cursor.") from exc
+    if not isinstance(payload, dict) or payload.get("k") != kind:
+        raise InvalidCursor(f"Cursor was not issued for {kind} pagination.")
+    return payload
+
+
+def recent_cursor(row: Dict[str, Any]) -> str:
+    """Cursor positioned after ``row`` in (created_at DESC, id DESC) order."""
+    created_at = row["created_at"]
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    return encode_cursor(RECENT, t=created_at, i=str(row["id"]))
+
+
+def decode_recent_cursor(token: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Return the ``(created_at, id)`` keyset position, or None for the first page."""
+    if not token:
+        return None
+    payload = decode_cursor(token, RECENT)
+    if not payload.get("t") or not payload.get("i"):
+        raise InvalidCursor("Incomplete recent-ads cursor.")
+    return str(payload["t"]), str(payload["i"])
+
+
+def brand_cursor(brand_name: str) -> str:
+    return encode_cursor(BRANDS, n=brand_name)
+
+
+def decode_brand_cursor(token: Optional[str]) -> Optional[str]:
+    """Return the last brand name already served, or None for the first page."""
+    if not token:
+        return None
+    payload = decode_cursor(token, BRANDS)
+    if not isinstance(payload.get("n"), str):
+        raise InvalidCursor("Incomplete brand cursor.")
+    return payload["n"]
+
+
+__all__ = [
+    "InvalidCursor",
+    "encode_cursor",
+    "decode_cursor",
+    "recent_cursor",
+    "decode_recent_cursor",
+    "brand_cursor",
+    "decode_brand_cursor",
+]
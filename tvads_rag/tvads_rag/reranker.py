@@ -1,12 +1,20 @@
 """
-Reranking helpers for blending Cohere scores into retrieval results.
+Reranking helpers for blending Cohere or local cross-encoder scores into
+retrieval results.
 """
 
 from __future__ import annotations
 
+import hashlib
+import threading
 from functools import lru_cache
-from typing import Any, Iterable, List, Mapping, MutableMapping, Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Optional, Sequence, Tuple
 
+import numpy as np
+
+from .cache import LRUCache
+from .circuit_breaker import protected
 from .config import RerankConfig
 
 try:  # pragma: no cover - optional dependency checked at runtime
@@ -14,6 +22,19 @@ try:  # pragma: no cover - optional dependency checked at runtime
 except ImportError:  # pragma: no cover - optional dependency checked at runtime
     cohere = None  # type: ignore[assignment]
 
+try:  # pragma: no cover - optional dependency checked at runtime
+    import onnxruntime as ort  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency checked at runtime
+    ort = None  # type: ignore[assignment]
+
+try:  # pragma: no cover - optional dependency checked at runtime
+    from tokenizers import Tokenizer  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency checked at runtime
+    Tokenizer = None  # type: ignore[assignment]
+
+# Preferred model files inside RERANK_LOCAL_MODEL_PATH (int8 first).
+_LOCAL_MODEL_FILES = ("model_quantized.onnx", "model_int8.onnx", "model.onnx")
+
 
 def _ensure_cohere_installed() -> None:
     if cohere is None:  # pragma: no cover - exercised via unit tests
@@ -29,6 +50,192 @@ def _get_cohere_client(api_key: str):
     return cohere.Client(api_key=api_key)
 
 
+def _ensure_local_reranker_installed() -> None:
+    if ort is None or Tokenizer is None:  # pragma: no cover - exercised via unit tests
+        raise RuntimeError(
+            "onnxruntime and tokenizers are required for RERANK_PROVIDER=local. "
+            "Run `pip install onnxruntime tokenizers` or choose another provider."
+        )
+
+
+class LocalCrossEncoder:
+    """
+    ONNX cross-encoder scored on CPU.
+
+    Expects a directory holding an exported model (``model_quantized.onnx`` is
+    preferred over ``model.onnx``) plus its ``tokenizer.json``. Query/document
+    pairs are truncated to ``max_seq_length`` tokens and scored in batches on a
+    session limited to ``threads`` intra-op threads, so latency is bounded and
+    predictable regardless of host size.
+    """
+
+    def __init__(self, model_dir: str, *, threads: int, max_seq_length: int):
+        _ensure_local_reranker_installed()
+        directory = Path(model_dir)
+        model_file = next(
+            (directory / name for name in _LOCAL_MODEL_FILES if (directory / name).exists()),
+            None,
+        )
+        tokenizer_file = directory / "tokenizer.json"
+        if model_file is None or not tokenizer_file.exists():
+            raise RuntimeError(
+                f"Local reranker directory {directory} must contain tokenizer.json and one of "
+                f"{', '.join(_LOCAL_MODEL_FILES)}."
+            )
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(
+            str(model_file), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {node.name for node in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(str(tokenizer_file))
+        self._tokenizer.enable_truncation(max_length=max_seq_length)
+        self._tokenizer.enable_padding()
+        # Tokenizers are not safe to reconfigure concurrently; guard encode/run.
+        self._lock = threading.Lock()
+
+    def score(self, query_text: str, documents: Sequence[str], batch_size: int) -> List[float]:
+        """Return a 0-1 relevance score per document (sigmoid of the logit)."""
+        scores: List[float] = []
+        for start in range(0, len(documents), max(batch_size, 1)):
+            batch = documents[start : start + batch_size]
+            with self._lock:
+                encodings = self._tokenizer.encode_batch([(query_text, doc) for doc in batch])
+                features = {
+                    "input_ids": np.array([enc.ids for enc in encodings], dtype=np.int64),
+                    "attention_mask": np.array([enc.attention_mask for enc in encodings], dtype=np.int64),
+                    "token_type_ids": np.array([enc.type_ids for enc in encodings], dtype=np.int64),
+                }
+                feed = {name: value for name, value in features.items() if name in self._input_names}
+                logits = self._session.run(None, feed)[0]
+            logits = np.asarray(logits, dtype=np.float32)
+            if logits.ndim == 2 and logits.shape[1] > 1:
+                logits = logits[:, -1]
+            scores.extend((1.0 / (1.0 + np.exp(-logits.reshape(-1)))).tolist())
+        return scores
+
+
+@lru_cache(maxsize=2)
+def _get_local_cross_encoder(model_dir: str, threads: int, max_seq_length: int) -> LocalCrossEncoder:
+    return LocalCrossEncoder(model_dir, threads=threads, max_seq_length=max_seq_length)
+
+
+_score_cache_lock = threading.Lock()
+_score_cache: Optional[LRUCache[Tuple[str, str], float]] = None
+_payload_stats: Dict[str, int] = {
+    "calls": 0,
+    "provider_calls": 0,
+    "candidates_in": 0,
+    "candidates_pruned": 0,
+    "documents_sent": 0,
+    "payload_chars": 0,
+}
+
+
+def _get_score_cache(config: RerankConfig) -> LRUCache[Tuple[str, str], float]:
+    global _score_cache
+    with _score_cache_lock:
+        if _score_cache is None:
+            _score_cache = LRUCache(
+                maxsize=config.score_cache_size,
+                ttl_seconds=config.score_cache_ttl_seconds,
+            )
+        return _score_cache
+
+
+def _record(**increments: int) -> None:
+    with _score_cache_lock:
+        for name, value in increments.items():
+            _payload_stats[name] += value
+
+
+def rerank_stats() -> Dict[str, Any]:
+    """Payload-size and score-cache counters for the reranker."""
+    with _score_cache_lock:
+        stats: Dict[str, Any] = dict(_payload_stats)
+        cache = _score_cache
+    calls = stats["provider_calls"]
+    stats["avg_documents_per_call"] = round(stats["documents_sent"] / calls, 2) if calls else 0.0
+    stats["avg_payload_chars_per_call"] = round(stats["payload_chars"] / calls, 1) if calls else 0.0
+    stats["score_cache"] = cache.stats.as_dict() if cache is not None else None
+    return stats
+
+
+def reset_rerank_state() -> None:
+    """Drop cached scores and zero the payload counters."""
+    global _score_cache
+    with _score_cache_lock:
+        _score_cache = None
+        for name in _payload_stats:
+            _payload_stats[name] = 0
+
+
+def prune_candidates(
+    candidates: Sequence[Mapping[str, Any]],
+    top_n: int,
+    config: RerankConfig,
+) -> Tuple[List[Mapping[str, Any]], List[Mapping[str, Any]]]:
+    """
+    Split RRF-ordered candidates into (to_rerank, pruned) before scoring.
+
+    Drops candidates whose text is shorter than ``min_text_chars``, whose
+    ``rrf_score`` falls below ``prune_rrf_ratio`` x the best score, or that
+    exceed ``max_per_ad`` chunks from the same ad. If that leaves fewer than
+    ``top_n``, the best pruned candidates (by RRF order) are kept after all.
+    """
+    scores = [c.get("rrf_score") for c in candidates if c.get("rrf_score") is not None]
+    floor = max(scores) * config.prune_rrf_ratio if scores else None
+    per_ad: Dict[Any, int] = {}
+    kept: List[Mapping[str, Any]] = []
+    pruned: List[Mapping[str, Any]] = []
+    for candidate in candidates:
+        text = str(candidate.get("text", "") or "").strip()
+        if len(text) < config.min_text_chars:
+            pruned.append(candidate)
+            continue
+        rrf_score = candidate.get("rrf_score")
+        if floor is not None and rrf_score is not None and rrf_score < floor:
+            pruned.append(candidate)
+            continue
+        ad_id = candidate.get("ad_id")
+        if ad_id is not None:
+            if per_ad.get(ad_id, 0) >= config.max_per_ad:
+                pruned.append(candidate)
+                continue
+            per_ad[ad_id] = per_ad.get(ad_id, 0) + 1
+        kept.append(candidate)
+
+    if len(kept) < top_n and pruned:
+        refill = [c for c in pruned if str(c.get("text", "") or "").strip()][: top_n - len(kept)]
+        refill_ids = {id(c) for c in refill}
+        order = {id(c): idx for idx, c in enumerate(candidates)}
+        kept = sorted(kept + refill, key=lambda c: order[id(c)])
+        pruned = [c for c in pruned if id(c) not in refill_ids]
+    return kept, pruned
+
+
+def _query_fingerprint(query_text: str, config: RerankConfig) -> str:
+    normalised = " ".join((query_text or "").split()).casefold()
+    raw = f"{config.provider}|{config.model_name}|{config.max_text_chars}|{normalised}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _candidate_key(candidate: Mapping[str, Any], text: str) -> str:
+    embedding_id = candidate.get("embedding_id") or candidate.get("id")
+    if embedding_id:
+        return str(embedding_id)
+    return "text:" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def candidate_key(candidate: Mapping[str, Any]) -> str:
+    """Stable identity of a candidate row: its embedding id, else a hash of its text."""
+    return _candidate_key(candidate, str(candidate.get("text", "") or ""))
+
+
 def rerank_candidates(
     query_text: str,
     candidates: Sequence[Mapping[str, Any]],
@@ -39,32 +246,87 @@ def rerank_candidates(
     """
     Apply reranking based on the configured provider.
 
-    Currently only Cohere is supported; when disabled the original order
-    is preserved (truncated to ``top_n``).
+    Supports Cohere (remote) and a local ONNX cross-encoder; when disabled the
+    original order is preserved (truncated to ``top_n``). Candidates are
+    pruned locally first (see ``prune_candidates``) and scores are cached per
+    (query, embedding_id), so repeated or paginated queries only send
+    candidates that have not been scored yet. Pruned candidates are dropped,
+    so every returned row carries a cross-encoder ``rerank_score``; fewer than
+    ``top_n`` rows come back only when too few candidates have any text.
     """
     if not candidates or top_n <= 0:
         return []
     limit = min(top_n, len(candidates))
-    if config.provider != "cohere":
+    if config.provider not in ("cohere", "local"):
         return [dict(candidates[idx]) for idx in range(limit)]
-    return _cohere_rerank(query_text, candidates, limit, config)
+
+    kept, pruned = prune_candidates(candidates, limit, config)
+    _record(calls=1, candidates_in=len(candidates), candidates_pruned=len(pruned))
+    scores = _scores_with_cache(query_text, kept, config)
+    return _apply_scores(kept, scores, limit)
 
 
-def _cohere_rerank(
+def _scores_with_cache(
     query_text: str,
     candidates: Sequence[Mapping[str, Any]],
-    top_n: int,
     config: RerankConfig,
-) -> List[Mapping[str, Any]]:
+) -> Dict[int, float]:
+    cache = _get_score_cache(config)
+    fingerprint = _query_fingerprint(query_text, config)
+    documents = [str(c.get("text", "") or "")[: config.max_text_chars] for c in candidates]
+    keys = [(fingerprint, _candidate_key(c, doc)) for c, doc in zip(candidates, documents)]
+
+    scores: Dict[int, float] = {}
+    missing: List[int] = []
+    for idx, key in enumerate(keys):
+        cached = cache.get(key)
+        if cached is None:
+            missing.append(idx)
+        else:
+            scores[idx] = cached
+    if not missing:
+        return scores
+
+    payload = [documents[idx] for idx in missing]
+    _record(provider_calls=1, documents_sent=len(payload), payload_chars=sum(len(doc) for doc in payload))
+    if config.provider == "cohere":
+        fresh = _cohere_scores(query_text, payload, config)
+    else:
+        fresh = _local_scores(query_text, payload, config)
+    for idx, score in zip(missing, fresh):
+        scores[idx] = score
+        cache.set(keys[idx], score)
+    return scores
+
+
+@protected("cohere.rerank")
+def _cohere_scores(query_text: str, documents: Sequence[str], config: RerankConfig) -> List[float]:
     client = _get_cohere_client(config.api_key or "")
-    documents = [{"text": str(candidate.get("text", "") or "")} for candidate in candidates]
     response = client.rerank(
         model=config.model_name,
         query=query_text,
-        documents=documents,
-        top_n=top_n,
+        documents=[{"text": doc} for doc in documents],
+        top_n=len(documents),
     )
-    scores = {result.index: getattr(result, "relevance_score", 0.0) for result in response.results}
+    scores = [0.0] * len(documents)
+    for result in response.results:
+        scores[result.index] = getattr(result, "relevance_score", 0.0)
+    return scores
+
+
+def _local_scores(query_text: str, documents: Sequence[str], config: RerankConfig) -> List[float]:
+    encoder = _get_local_cross_encoder(
+        config.model_path or "", config.threads, config.max_seq_length
+    )
+    return list(encoder.score(query_text, list(documents), config.batch_size))
+
+
+def _apply_scores(
+    candidates: Sequence[Mapping[str, Any]],
+    scores: Mapping[int, float],
+    top_n: int,
+) -> List[Mapping[str, Any]]:
+    """Order candidates by score and attach ``rerank_score``."""
     ordered_indices = sorted(
         range(len(candidates)),
         key=lambda idx: (scores.get(idx, 0.0), -idx),
@@ -79,5 +341,12 @@ def _cohere_rerank(
     return reranked
 
 
-__all__ = ["rerank_candidates"]
+__all__ = [
+    "rerank_candidates",
+    "prune_candidates",
+    "candidate_key",
+    "rerank_stats",
+    "reset_rerank_state",
+    "LocalCrossEncoder",
+]
 
@@ -4,16 +4,357 @@ High-level retrieval helpers combining hybrid search + reranking.
 
 from __future__ import annotations
 
-from typing import Any, List, Mapping, Optional, Sequence
+import hashlib
+import json
+import logging
+import secrets
+import threading
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
 
 from . import embeddings
 from . import db_backend as db_helpers
+from . import pagination
 from . import reranker
-from .config import get_rerank_config, is_rerank_enabled
+from .cache import LRUCache, TieredCache, build_cache_tier
+from .circuit_breaker import CircuitOpenError, is_client_error
+from .config import (
+    RerankConfig,
+    get_cache_config,
+    get_openai_config,
+    get_rerank_config,
+    get_search_budget_config,
+    is_rerank_enabled,
+)
+from .db import normalise_search_filters
+from .semantic_cache import SemanticQueryCache
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_CANDIDATE_K = 50
 DEFAULT_FINAL_K = 10
 
+# Progressive-result stages, in the order they are reported to ``on_partial``
+PARTIAL_STAGES = ("lexical", "fused")
+
+# on_partial(stage, rows): receives early result lists while a search runs
+PartialCallback = Callable[[str, List[Dict[str, Any]]], None]
+
+_cache_lock = threading.Lock()
+_query_embedding_cache: Optional[TieredCache[List[float]]] = None
+_result_cache: Optional[TieredCache[List[Dict[str, Any]]]] = None
+_semantic_cache: Optional[SemanticQueryCache] = None
+_search_page_cache: Optional[TieredCache[List[Dict[str, Any]]]] = None
+# (generation, monotonic time it was read)
+_corpus_generation: Optional[tuple] = None
+# One pool per stage ("embed", "search", "rerank"): a backlog of reranks must
+# not hold up the embedding or SQL of a newer search while its deadline runs.
+_executors: Dict[str, ThreadPoolExecutor] = {}
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when not even a degraded search fits in the latency budget."""
+
+
+@dataclass
+class BudgetedRetrieval:
+    """Results of ``retrieve_with_budget`` plus what was skipped to meet the deadline."""
+
+    results: List[Dict[str, Any]]
+    skipped_stages: List[str] = field(default_factory=list)
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    elapsed_ms: float = 0.0
+    hedged: bool = False
+    from_cache: bool = False
+    # Facet buckets over the fused candidates, when requested
+    facets: Optional[Dict[str, Any]] = None
+
+    @property
+    def degraded(self) -> bool:
+        return bool(self.skipped_stages)
+
+
+@dataclass
+class SearchPage:
+    """One page of search results plus the cursor for the next page."""
+
+    results: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+    # None when the page was served from a search cursor (no retrieval ran)
+    retrieval: Optional[BudgetedRetrieval] = None
+    # First pages only, when requested; cursor pages carry None (clients keep
+    # the facets from the first page)
+    facets: Optional[Dict[str, Any]] = None
+
+
+class _PartialResults:
+    """
+    Forwards early result lists to an ``on_partial`` callback in stage order.
+
+    The lexical leg reports from a worker thread and may lose the race against
+    the fused list (e.g. a cached query embedding); a stage is dropped once a
+    later one has been reported, and everything is dropped after ``close``.
+    """
+
+    def __init__(self, callback: PartialCallback):
+        self._callback = callback
+        self._lock = threading.Lock()
+        self._reached = -1
+
+    def emit(self, stage: str, rows: Sequence[Mapping[str, Any]]) -> None:
+        rank = PARTIAL_STAGES.index(stage)
+        with self._lock:
+            if rank <= self._reached:
+                return
+            self._reached = rank
+            try:
+                self._callback(stage, [dict(row) for row in rows])
+            except Exception as exc:
+                logger.warning("Partial %s results dropped: %s", stage, str(exc)[:100])
+
+    def close(self) -> None:
+        with self._lock:
+            self._reached = len(PARTIAL_STAGES)
+
+
+def normalise_query_text(query_text: str) -> str:
+    """Collapse whitespace and case so trivially different queries share cache keys."""
+    return " ".join((query_text or "").split()).casefold()
+
+
+def _encode_vector(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _decode_vector(raw: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(raw)
+    return values.tolist()
+
+
+def _get_query_embedding_cache() -> TieredCache[List[float]]:
+    global _query_embedding_cache
+    with _cache_lock:
+        if _query_embedding_cache is None:
+            cfg = get_cache_config()
+            _query_embedding_cache = TieredCache(
+                "query_embedding",
+                LRUCache(maxsize=cfg.query_embedding_cache_size),
+                build_cache_tier(cfg.backend, cfg.path),
+                encode=_encode_vector,
+                decode=_decode_vector,
+            )
+        return _query_embedding_cache
+
+
+def _query_embedding_key(query_text: str) -> str:
+    model = get_openai_config().embedding_model_name
+    raw = f"{model}|{embeddings.EMBEDDING_DIMENSIONS}|{normalise_query_text(query_text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def embed_query(query_text: str) -> List[float]:
+    """
+    Embed a search query, reusing cached vectors for repeat queries.
+
+    Keys combine the normalised query text with the embedding model and
+    dimensions, so changing EMBEDDING_MODEL never serves stale vectors. The
+    normalised text is also what gets embedded, so every spelling that shares
+    a key gets the same vector whichever arrived first.
+    """
+    cache = _get_query_embedding_cache()
+    key = _query_embedding_key(query_text)
+    cached = cache.get(key)
+    if cached is not None:
+        return list(cached)
+    vector = embeddings.embed_texts([normalise_query_text(query_text)])[0]
+    cache.set(key, list(vector))
+    return vector
+
+
+def embed_queries(query_texts: Sequence[str]) -> List[List[float]]:
+    """
+    Batch ``embed_query``: cached vectors are reused, and the misses (deduplicated
+    by normalised text) are embedded in one ``embed_texts`` request.
+    """
+    cache = _get_query_embedding_cache()
+    vectors: List[Optional[List[float]]] = []
+    missing: Dict[str, List[int]] = {}
+    for idx, query_text in enumerate(query_texts):
+        key = _query_embedding_key(query_text)
+        cached = cache.get(key)
+        vectors.append(list(cached) if cached is not None else None)
+        if cached is None:
+            missing.setdefault(key, []).append(idx)
+    if missing:
+        order = list(missing)
+        fresh = embeddings.embed_texts([normalise_query_text(query_texts[missing[key][0]]) for key in order])
+        for key, vector in zip(order, fresh):
+            cache.set(key, list(vector))
+            for idx in missing[key]:
+                vectors[idx] = list(vector)
+    return vectors  # type: ignore[return-value]
+
+
+def _encode_rows(rows: List[Dict[str, Any]]) -> bytes:
+    return json.dumps(rows, default=str).encode("utf-8")
+
+
+def _decode_rows(raw: bytes) -> List[Dict[str, Any]]:
+    return json.loads(raw.decode("utf-8"))
+
+
+def _get_result_cache() -> TieredCache[List[Dict[str, Any]]]:
+    global _result_cache
+    with _cache_lock:
+        if _result_cache is None:
+            cfg = get_cache_config()
+            _result_cache = TieredCache(
+                "retrieval_result",
+                LRUCache(maxsize=cfg.result_cache_size),
+                build_cache_tier(cfg.backend, cfg.path),
+                encode=_encode_rows,
+                decode=_decode_rows,
+                ttl_seconds=cfg.result_cache_ttl_seconds,
+            )
+        return _result_cache
+
+
+def _get_search_page_cache() -> TieredCache[List[Dict[str, Any]]]:
+    global _search_page_cache
+    with _cache_lock:
+        if _search_page_cache is None:
+            cfg = get_cache_config()
+            _search_page_cache = TieredCache(
+                "search_page",
+                LRUCache(maxsize=cfg.search_page_cache_size),
+                build_cache_tier(cfg.backend, cfg.path),
+                encode=_encode_rows,
+                decode=_decode_rows,
+                ttl_seconds=cfg.search_page_ttl_seconds,
+            )
+        return _search_page_cache
+
+
+def _get_semantic_cache() -> Optional[SemanticQueryCache]:
+    global _semantic_cache
+    cfg = get_cache_config()
+    if not cfg.semantic_cache_enabled:
+        return None
+    with _cache_lock:
+        if _semantic_cache is None:
+            _semantic_cache = SemanticQueryCache(
+                maxsize=cfg.semantic_cache_size,
+                threshold=cfg.semantic_cache_threshold,
+                ttl_seconds=cfg.result_cache_ttl_seconds,
+            )
+        return _semantic_cache
+
+
+def current_corpus_generation() -> Optional[int]:
+    """
+    Return the corpus generation, re-reading it at most every
+    CORPUS_GENERATION_POLL_SECONDS. Returns None when it cannot be read, in
+    which case result caching is bypassed rather than risking stale results.
+    """
+    global _corpus_generation
+    poll_seconds = get_cache_config().corpus_generation_poll_seconds
+    now = time.monotonic()
+    with _cache_lock:
+        if _corpus_generation is not None and now - _corpus_generation[1] < poll_seconds:
+            return _corpus_generation[0]
+    try:
+        generation = int(db_helpers.get_corpus_generation())
+    except Exception as exc:
+        logger.warning("Could not read corpus generation; bypassing result cache: %s", str(exc)[:100])
+        return None
+    with _cache_lock:
+        _corpus_generation = (generation, now)
+    return generation
+
+
+def _search_context_key(
+    candidate_k: int,
+    final_k: int,
+    item_types: Optional[Sequence[str]],
+    filters: Optional[Mapping[str, Any]],
+    rerank_cfg: RerankConfig,
+    generation: int,
+    rerank_k: Optional[int] = None,
+) -> str:
+    """Hash every search parameter except the query text itself."""
+    payload = {
+        "candidate_k": candidate_k,
+        "final_k": final_k,
+        "rerank_k": rerank_k,
+        "item_types": sorted(item_types) if item_types else None,
+        "filters": normalise_search_filters(filters),
+        "rerank": [rerank_cfg.provider, rerank_cfg.model_name],
+        "generation": generation,
+    }
+    raw = json.dumps(payload, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _result_cache_key(query_text: str, context_key: str) -> str:
+    raw = f"{context_key}|{normalise_query_text(query_text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _facets_cache_key(cache_key: str) -> str:
+    """Facets share the result cache, stored next to the rows they describe."""
+    return f"{cache_key}|facets"
+
+
+def _cache_keys(
+    query_text: str,
+    candidate_k: int,
+    final_k: int,
+    item_types: Optional[Sequence[str]],
+    filters: Optional[Mapping[str, Any]],
+    rerank_cfg: RerankConfig,
+    use_cache: bool,
+    rerank_k: Optional[int] = None,
+) -> Tuple[Optional[str], Optional[str]]:
+    """Return (context_key, result_cache_key), or (None, None) when caching is off."""
+    if not use_cache:
+        return None, None
+    generation = current_corpus_generation()
+    if generation is None:
+        return None, None
+    context_key = _search_context_key(
+        candidate_k, final_k, item_types, filters, rerank_cfg, generation, rerank_k
+    )
+    return context_key, _result_cache_key(query_text, context_key)
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Return hit/miss metrics for the retrieval caches."""
+    semantic = _get_semantic_cache()
+    return {
+        "query_embedding": _get_query_embedding_cache().stats(),
+        "results": _get_result_cache().stats(),
+        "semantic": semantic.stats() if semantic is not None else None,
+        "search_pages": _get_search_page_cache().stats(),
+        "rerank": reranker.rerank_stats(),
+        "corpus_generation": _corpus_generation[0] if _corpus_generation else None,
+    }
+
+
+def reset_caches() -> None:
+    """Drop in-memory cache state (persistent tiers are left untouched)."""
+    global _query_embedding_cache, _result_cache, _semantic_cache, _search_page_cache, _corpus_generation
+    with _cache_lock:
+        _query_embedding_cache = None
+        _result_cache = None
+        _semantic_cache = None
+        _search_page_cache = None
+        _corpus_generation = None
+    reranker.reset_rerank_state()
+
 
 def retrieve_with_rerank(
     query_text: str,
@@ -21,25 +362,622 @@ def retrieve_with_rerank(
     candidate_k: int = DEFAULT_CANDIDATE_K,
     final_k: int = DEFAULT_FINAL_K,
     item_types: Optional[Sequence[str]] = None,
+    filters: Optional[Mapping[str, Any]] = None,
+    use_cache: bool = True,
 ) -> List[Mapping[str, Any]]:
     """
     Run hybrid search followed by optional reranking.
+
+    ``filters`` (brand, year range, product_category, format_type, has_celeb,
+    aida_stage, claim_type) are applied inside the SQL search itself, so the
+    ``candidate_k`` rows handed to the reranker all satisfy them.
+
+    Results are cached for RESULT_CACHE_TTL_SECONDS under a key that includes
+    the corpus generation, so any ingest write invalidates them. When
+    SEMANTIC_CACHE_ENABLED is set, an exact miss can be served the results of
+    a near-duplicate query issued with the same parameters.
     """
     if final_k <= 0 or candidate_k <= 0:
         raise ValueError("candidate_k and final_k must be positive.")
 
-    embedding = embeddings.embed_texts([query_text])[0]
-    candidates = db_helpers.hybrid_search(embedding, query_text, candidate_k, item_types)
     rerank_cfg = get_rerank_config()
+    context_key, cache_key = _cache_keys(
+        query_text, candidate_k, final_k, item_types, filters, rerank_cfg, use_cache
+    )
+    if cache_key is not None:
+        cached = _get_result_cache().get(cache_key)
+        if cached is not None:
+            return [dict(row) for row in cached]
+
+    embedding = embed_query(query_text)
+    semantic = _get_semantic_cache() if context_key is not None else None
+    if semantic is not None:
+        match = semantic.lookup(embedding, context_key)
+        if match is not None:
+            logger.debug(
+                "Semantic cache hit (%.3f) for %r via %r",
+                match.similarity, query_text, match.matched_query,
+            )
+            # Not copied into the exact cache: a borrowed answer must not
+            # outlive the near-duplicate entry it came from
+            return [dict(row) for row in match.results]
+
+    candidates = db_helpers.hybrid_search(
+        embedding, query_text, candidate_k, item_types, filters=filters
+    )
     if is_rerank_enabled(rerank_cfg):
-        return reranker.rerank_candidates(
+        results = reranker.rerank_candidates(
             query_text,
             candidates,
             top_n=final_k,
             config=rerank_cfg,
         )
-    return list(candidates)[: min(final_k, len(candidates))]
+    else:
+        results = list(candidates)[: min(final_k, len(candidates))]
+
+    if cache_key is not None:
+        _get_result_cache().set(cache_key, [dict(row) for row in results])
+    if semantic is not None:
+        semantic.add(query_text, embedding, context_key, results)
+    return results
+
+
+def retrieve_batch(
+    query_texts: Sequence[str],
+    *,
+    candidate_k: int = DEFAULT_CANDIDATE_K,
+    final_k: int = DEFAULT_FINAL_K,
+    item_types: Optional[Sequence[str]] = None,
+    filters: Optional[Mapping[str, Any]] = None,
+    use_cache: bool = True,
+    timeout_ms: Optional[int] = None,
+) -> List[List[Dict[str, Any]]]:
+    """
+    ``retrieve_with_rerank`` for many queries at once (evaluation, bulk analytics).
+
+    Queries in the result cache are served from it. The rest share one
+    embedding request (``embed_queries``) and one SQL round trip
+    (``hybrid_search_batch``). Their reranks run on the rerank pool, at most
+    SEARCH_BATCH_RERANK_CONCURRENCY at a time. If a rerank fails, that query
+    keeps its RRF order and is not cached. The semantic cache is not
+    consulted, so evaluations measure real retrieval. Returns one result list
+    per query, in input order.
+
+    ``timeout_ms`` bounds the whole batch. The SQL gets the time left after
+    embedding (``DeadlineExceeded`` if it overruns); reranks that cannot finish
+    in time fall back to RRF order.
+    """
+    if final_k <= 0 or candidate_k <= 0:
+        raise ValueError("candidate_k and final_k must be positive.")
+    rerank_cfg = get_rerank_config()
+    deadline = time.monotonic() + timeout_ms / 1000.0 if timeout_ms else None
+    results: List[Optional[List[Dict[str, Any]]]] = [None] * len(query_texts)
+    cache_keys: List[Optional[str]] = []
+    pending: List[int] = []
+    for idx, query_text in enumerate(query_texts):
+        _, cache_key = _cache_keys(
+            query_text, candidate_k, final_k, item_types, filters, rerank_cfg, use_cache
+        )
+        cache_keys.append(cache_key)
+        cached = _get_result_cache().get(cache_key) if cache_key is not None else None
+        if cached is not None:
+            results[idx] = [dict(row) for row in cached]
+        else:
+            pending.append(idx)
+    if not pending:
+        return results  # type: ignore[return-value]
+
+    texts = [query_texts[idx] for idx in pending]
+    vectors = embed_queries(texts)
+    sql_timeout_ms: Optional[int] = None
+    if deadline is not None:
+        sql_timeout_ms = int(_remaining_ms(deadline))
+        if sql_timeout_ms <= 0:
+            raise DeadlineExceeded("No time left for the batch search.")
+    try:
+        candidate_lists = db_helpers.hybrid_search_batch(
+            vectors, texts, candidate_k, item_types, filters=filters, timeout_ms=sql_timeout_ms
+        )
+    except Exception as exc:
+        if _is_timeout(exc):
+            raise DeadlineExceeded("Batch search did not finish within its timeout.") from exc
+        raise
+    if is_rerank_enabled(rerank_cfg):
+        jobs = list(zip(pending, candidate_lists))
+        window = get_search_budget_config().batch_rerank_concurrency
+        futures: Dict[int, "Future[Any]"] = {}
+
+        def _start(pos: int) -> None:
+            idx, candidates = jobs[pos]
+            futures[idx] = _submit(
+                "rerank",
+                deadline,
+                reranker.rerank_candidates,
+                query_texts[idx],
+                candidates,
+                top_n=final_k,
+                config=rerank_cfg,
+            )
+
+        # Sliding window: a large batch never floods the pool shared with live searches
+        for pos in range(min(window, len(jobs))):
+            _start(pos)
+        for pos, (idx, candidates) in enumerate(jobs):
+            try:
+                wait_s = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+                results[idx] = [dict(row) for row in futures[idx].result(timeout=wait_s)]
+            except Exception as exc:
+                futures[idx].cancel()
+                logger.warning("Rerank failed for %r; keeping RRF order: %s", query_texts[idx], str(exc)[:100])
+                results[idx] = [dict(row) for row in candidates[:final_k]]
+                cache_keys[idx] = None
+            if pos + window < len(jobs):
+                _start(pos + window)
+    else:
+        for idx, candidates in zip(pending, candidate_lists):
+            results[idx] = [dict(row) for row in candidates[:final_k]]
+    for idx in pending:
+        if cache_keys[idx] is not None:
+            _get_result_cache().set(cache_keys[idx], [dict(row) for row in results[idx]])
+    return results  # type: ignore[return-value]
+
+
+def _get_executor(stage: str) -> ThreadPoolExecutor:
+    with _cache_lock:
+        pool = _executors.get(stage)
+        if pool is None:
+            pool = ThreadPoolExecutor(
+                max_workers=get_search_budget_config().worker_threads,
+                thread_name_prefix=f"retrieval-{stage}",
+            )
+            _executors[stage] = pool
+        return pool
+
+
+def _submit(
+    stage: str, deadline: Optional[float], func: Callable[..., Any], *args: Any, **kwargs: Any
+) -> "Future[Any]":
+    """
+    Run ``func`` on the ``stage`` pool. Work still queued when ``deadline``
+    passes is skipped with ``DeadlineExceeded`` instead of occupying a worker.
+    """
+
+    def _bounded() -> Any:
+        if deadline is not None and time.monotonic() >= deadline:
+            raise DeadlineExceeded(f"{stage} expired before a worker was free.")
+        return func(*args, **kwargs)
+
+    return _get_executor(stage).submit(_bounded)
+
+
+def _remaining_ms(deadline: float) -> float:
+    return (deadline - time.monotonic()) * 1000.0
+
+
+def _hedged_embed(query_text: str, deadline: float, hedge_ms: float) -> Tuple[Optional[List[float]], bool]:
+    """
+    Embed with a hedge: if the first request has not answered within
+    ``hedge_ms`` (or fails transiently), fire one duplicate and take whichever
+    returns first. Returns (embedding or None, hedged).
+    """
+    pending = {_submit("embed", deadline, embed_query, query_text)}
+    hedged = False
+    try:
+        while pending:
+            remaining = _remaining_ms(deadline)
+            if remaining <= 0:
+                break
+            wait_ms = remaining if hedged else min(hedge_ms, remaining)
+            done, pending = wait(pending, timeout=wait_ms / 1000.0, return_when=FIRST_COMPLETED)
+            for future in done:
+                exc = future.exception()
+                if exc is None:
+                    return future.result(), hedged
+                logger.warning("Query embedding failed: %s", str(exc)[:100])
+                # A duplicate cannot help when the provider is down or rejected the input
+                if isinstance(exc, CircuitOpenError) or is_client_error(exc):
+                    return None, hedged
+            if not hedged and _remaining_ms(deadline) > 0:
+                pending.add(_submit("embed", deadline, embed_query, query_text))
+                hedged = True
+        return None, hedged
+    finally:
+        # Drop requests that never started (a running one finishes on its own)
+        for future in pending:
+            future.cancel()
+
+
+def _is_timeout(exc: BaseException) -> bool:
+    # 57014 = query_canceled, raised when statement_timeout fires.
+    return isinstance(exc, TimeoutError) or getattr(exc, "pgcode", None) == "57014"
+
+
+def _run_within(future: "Future[Any]", deadline: float, stage: str) -> Any:
+    remaining = _remaining_ms(deadline)
+    done, _ = wait({future}, timeout=max(remaining, 0.0) / 1000.0)
+    if not done:
+        future.cancel()
+        raise DeadlineExceeded(f"{stage} did not finish within the latency budget.")
+    exc = future.exception()
+    if exc is not None:
+        if _is_timeout(exc):
+            raise DeadlineExceeded(f"{stage} did not finish within the latency budget.") from exc
+        raise exc
+    return future.result()
+
+
+def _cached_outcome(cache_key: Optional[str], facets: bool) -> Optional[BudgetedRetrieval]:
+    """The exact result-cache entry for ``cache_key`` as a finished retrieval, or None."""
+    if cache_key is None:
+        return None
+    cached = _get_result_cache().get(cache_key)
+    cached_facets = _get_result_cache().get(_facets_cache_key(cache_key)) if facets else None
+    if cached is None or (facets and not cached_facets):
+        return None
+    return BudgetedRetrieval(
+        results=[dict(row) for row in cached],
+        from_cache=True,
+        facets=dict(cached_facets[0]) if cached_facets else None,
+    )
+
+
+def retrieve_with_budget(
+    query_text: str,
+    *,
+    budget_ms: Optional[int] = None,
+    candidate_k: int = DEFAULT_CANDIDATE_K,
+    final_k: int = DEFAULT_FINAL_K,
+    item_types: Optional[Sequence[str]] = None,
+    filters: Optional[Mapping[str, Any]] = None,
+    use_cache: bool = True,
+    on_partial: Optional[PartialCallback] = None,
+    facets: bool = False,
+    rerank_k: Optional[int] = None,
+) -> BudgetedRetrieval:
+    """
+    Deadline-aware variant of ``retrieve_with_rerank``.
+
+    Stages degrade instead of stalling the request:
+
+    - The query embedding is hedged after SEARCH_EMBED_HEDGE_MS and may use at
+      most SEARCH_EMBED_BUDGET_FRACTION of the budget; if it is unavailable the
+      search runs lexical-only (skipped stage ``embedding``).
+    - Hybrid SQL runs with a statement_timeout equal to the time left; if it
+      cannot finish, ``DeadlineExceeded`` is raised.
+    - Reranking is skipped (stage ``rerank``, results stay in RRF order) when
+      fewer than SEARCH_RERANK_MIN_REMAINING_MS remain or it overruns.
+
+    Degraded results are never written to the result caches.
+
+    ``on_partial`` enables progressive results for streaming clients. It is
+    called with ``("lexical", rows)`` when a lexical-only search, run alongside
+    the query embedding, returns. It is called with ``("fused", rows)`` when the
+    RRF list is ready and a rerank will follow. Cache hits report nothing early,
+    and the lexical preview is skipped when the query embedding is cached.
+
+    ``facets`` also returns facet counts over the fused candidate set (see
+    ``db_backend.hybrid_search_faceted``), computed by the same SQL round trip.
+    Semantic-cache hits are skipped for faceted searches, because the facets
+    of a similar query would be wrong.
+
+    ``rerank_k`` reranks only the best ``rerank_k`` rows (default ``final_k``),
+    so pruning can drop weak candidates instead of refilling up to
+    ``final_k``. The rest of the ``final_k`` rows follow in RRF order, without
+    a ``rerank_score``.
+    """
+    if final_k <= 0 or candidate_k <= 0:
+        raise ValueError("candidate_k and final_k must be positive.")
+    rerank_top = min(rerank_k, final_k) if rerank_k else final_k
+    budget_cfg = get_search_budget_config()
+    budget = float(budget_ms or budget_cfg.default_budget_ms)
+    started = time.monotonic()
+    deadline = started + budget / 1000.0
+    outcome = BudgetedRetrieval(results=[])
+    partial: Optional[_PartialResults] = None
+    lexical_leg: Optional["Future[Any]"] = None
+
+    def _mark(stage: str, since: float) -> float:
+        now = time.monotonic()
+        outcome.timings_ms[stage] = round((now - since) * 1000.0, 1)
+        return now
+
+    def _finish(results: List[Dict[str, Any]]) -> BudgetedRetrieval:
+        if lexical_leg is not None:
+            lexical_leg.cancel()
+        if partial is not None:
+            partial.close()
+        outcome.results = results
+        outcome.elapsed_ms = round((time.monotonic() - started) * 1000.0, 1)
+        return outcome
+
+    rerank_cfg = get_rerank_config()
+    context_key, cache_key = _cache_keys(
+        query_text, candidate_k, final_k, item_types, filters, rerank_cfg, use_cache, rerank_k
+    )
+    hit = _cached_outcome(cache_key, facets)
+    if hit is not None:
+        outcome.from_cache = True
+        outcome.facets = hit.facets
+        return _finish(hit.results)
+
+    stage_start = time.monotonic()
+    embedding: Optional[List[float]] = None
+    if on_partial is not None:
+        partial = _PartialResults(on_partial)
+        cached_embedding = _get_query_embedding_cache().get(_query_embedding_key(query_text))
+        if cached_embedding is not None:
+            # The fused list is one SQL round trip away; a preview would only add load
+            embedding = list(cached_embedding)
+        else:
+            lexical_leg = _start_lexical_leg(
+                partial, query_text, candidate_k, final_k, item_types, filters, budget
+            )
+    if embedding is None:
+        embed_deadline = started + budget * budget_cfg.embed_budget_fraction / 1000.0
+        embedding, outcome.hedged = _hedged_embed(query_text, embed_deadline, budget_cfg.embed_hedge_ms)
+    stage_start = _mark("embedding", stage_start)
+    if embedding is None:
+        outcome.skipped_stages.append("embedding")
+
+    semantic = _get_semantic_cache() if context_key is not None and embedding is not None else None
+    if semantic is not None and not facets:
+        match = semantic.lookup(embedding, context_key)
+        if match is not None:
+            outcome.from_cache = True
+            return _finish([dict(row) for row in match.results])
+
+    remaining = _remaining_ms(deadline)
+    if remaining <= 0:
+        raise DeadlineExceeded("No time left for hybrid search.")
+    future = _submit(
+        "search",
+        deadline,
+        db_helpers.hybrid_search_faceted if facets else db_helpers.hybrid_search,
+        embedding,
+        query_text,
+        candidate_k,
+        item_types,
+        filters=filters,
+        timeout_ms=int(remaining),
+    )
+    if facets:
+        candidates, outcome.facets = _run_within(future, deadline, "Hybrid search")
+        candidates = list(candidates)
+    else:
+        candidates = list(_run_within(future, deadline, "Hybrid search"))
+    stage_start = _mark("search", stage_start)
+    if lexical_leg is not None:
+        # Superseded by the fused list; drop it if it is still queued
+        lexical_leg.cancel()
+
+    results: Optional[List[Dict[str, Any]]] = None
+    if is_rerank_enabled(rerank_cfg):
+        if _remaining_ms(deadline) >= budget_cfg.rerank_min_remaining_ms:
+            if partial is not None:
+                partial.emit("fused", candidates[:final_k])
+            future = _submit(
+                "rerank",
+                deadline,
+                reranker.rerank_candidates,
+                query_text,
+                candidates,
+                top_n=rerank_top,
+                config=rerank_cfg,
+            )
+            try:
+                results = [dict(row) for row in _run_within(future, deadline, "Rerank")]
+                if len(results) < final_k:
+                    results.extend(_unreranked_tail(candidates, results, final_k - len(results)))
+            except Exception as exc:
+                logger.warning("Rerank skipped: %s", str(exc)[:100])
+            _mark("rerank", stage_start)
+        if results is None:
+            outcome.skipped_stages.append("rerank")
+    if results is None:
+        results = [dict(row) for row in candidates[: min(final_k, len(candidates))]]
+
+    if not outcome.degraded:
+        if cache_key is not None:
+            _get_result_cache().set(cache_key, [dict(row) for row in results])
+            if outcome.facets is not None:
+                _get_result_cache().set(_facets_cache_key(cache_key), [dict(outcome.facets)])
+        if semantic is not None:
+            semantic.add(query_text, embedding, context_key, results)
+    return _finish(results)
+
+
+def _unreranked_tail(
+    candidates: Sequence[Mapping[str, Any]], reranked: Sequence[Mapping[str, Any]], count: int
+) -> List[Dict[str, Any]]:
+    """Up to ``count`` candidates not in ``reranked``, in RRF order."""
+    seen = {reranker.candidate_key(row) for row in reranked}
+    tail = [dict(row) for row in candidates if reranker.candidate_key(row) not in seen]
+    return tail[:count]
+
+
+def _start_lexical_leg(
+    partial: _PartialResults,
+    query_text: str,
+    candidate_k: int,
+    final_k: int,
+    item_types: Optional[Sequence[str]],
+    filters: Optional[Mapping[str, Any]],
+    budget_ms: float,
+) -> "Future[Any]":
+    """
+    Run the tsquery leg on its own (no embedding needed) and report it as
+    ``lexical``. Returns the future so the caller can cancel it.
+    """
+
+    def _report(future: "Future[Any]") -> None:
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            logger.debug("Lexical preview skipped: %s", str(exc)[:100])
+            return
+        partial.emit("lexical", list(future.result())[:final_k])
+
+    future = _submit(
+        "search",
+        time.monotonic() + budget_ms / 1000.0,
+        db_helpers.hybrid_search,
+        None,
+        query_text,
+        candidate_k,
+        item_types,
+        filters=filters,
+        timeout_ms=int(budget_ms),
+    )
+    future.add_done_callback(_report)
+    return future
+
+
+def _search_page_key(token: str, query_text: str) -> str:
+    raw = f"{token}|{normalise_query_text(query_text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def search_page(
+    query_text: str,
+    *,
+    limit: int,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    budget_ms: Optional[int] = None,
+    item_types: Optional[Sequence[str]] = None,
+    filters: Optional[Mapping[str, Any]] = None,
+    on_partial: Optional[PartialCallback] = None,
+    facets: bool = False,
+) -> SearchPage:
+    """
+    Paginated ``retrieve_with_budget``.
+
+    The first request fetches SEARCH_PAGE_DEPTH results once but reranks only
+    the ``offset + limit`` rows it returns; the deeper rows keep RRF order.
+    When more remain, the list is stored under a random search token for
+    SEARCH_PAGE_TTL_SECONDS. ``next_cursor`` points into that list, so later
+    pages are sliced from it without re-embedding, re-searching or
+    re-reranking.
+
+    Degraded first pages get no cursor. Cursors are bound to the query text;
+    an expired or foreign cursor raises ``pagination.InvalidCursor``.
+
+    ``on_partial`` receives the requested page slice of each early result list
+    (see ``retrieve_with_budget``); cursor pages are served without any.
+    ``facets`` adds facet counts to first pages.
+    """
+    if limit <= 0 or offset < 0:
+        raise ValueError("limit must be positive and offset non-negative.")
+    if cursor:
+        payload = pagination.decode_cursor(cursor, pagination.SEARCH)
+        token = str(payload.get("s") or "")
+        rows = _get_search_page_cache().get(_search_page_key(token, query_text)) if token else None
+        if rows is None:
+            raise pagination.InvalidCursor("Search cursor expired or belongs to another query; search again.")
+        return _slice_page(rows, int(payload.get("o") or 0), limit, token, None)
+
+    depth = _search_page_depth(limit, offset)
+    page_partial = None
+    if on_partial is not None:
+        def page_partial(stage: str, rows: List[Dict[str, Any]]) -> None:
+            on_partial(stage, rows[offset : offset + limit])
+    outcome = retrieve_with_budget(
+        query_text,
+        budget_ms=budget_ms,
+        candidate_k=max(DEFAULT_CANDIDATE_K, depth),
+        final_k=depth,
+        item_types=item_types,
+        filters=filters,
+        on_partial=page_partial,
+        facets=facets,
+        rerank_k=offset + limit,
+    )
+    return _first_page(query_text, outcome, limit, offset)
+
+
+def cached_search_page(
+    query_text: str,
+    *,
+    limit: int,
+    offset: int = 0,
+    item_types: Optional[Sequence[str]] = None,
+    filters: Optional[Mapping[str, Any]] = None,
+    facets: bool = False,
+) -> Optional[SearchPage]:
+    """
+    The first page ``search_page`` would return, if its ranked list is in the
+    exact result cache; otherwise None. Never embeds, searches or reranks, so
+    the API serves cache hits without taking an admission slot.
+    """
+    if limit <= 0 or offset < 0:
+        raise ValueError("limit must be positive and offset non-negative.")
+    depth = _search_page_depth(limit, offset)
+    _, cache_key = _cache_keys(
+        query_text,
+        max(DEFAULT_CANDIDATE_K, depth),
+        depth,
+        item_types,
+        filters,
+        get_rerank_config(),
+        True,
+        offset + limit,
+    )
+    outcome = _cached_outcome(cache_key, facets)
+    return _first_page(query_text, outcome, limit, offset) if outcome is not None else None
+
+
+def _search_page_depth(limit: int, offset: int) -> int:
+    return max(get_cache_config().search_page_depth, offset + limit)
+
+
+def _first_page(query_text: str, outcome: BudgetedRetrieval, limit: int, offset: int) -> SearchPage:
+    """
+    Slice a first page and, when more rows remain, store them under a new
+    search token. Degraded results are never stored, so a search that skipped
+    stages has no cursor; the next request re-runs it.
+    """
+    rows = outcome.results
+    token = ""
+    if not outcome.degraded and len(rows) > offset + limit:
+        token = secrets.token_urlsafe(12)
+        _get_search_page_cache().set(_search_page_key(token, query_text), [dict(row) for row in rows])
+    return _slice_page(rows, offset, limit, token, outcome)
+
 
+def _slice_page(
+    rows: Sequence[Mapping[str, Any]],
+    start: int,
+    limit: int,
+    token: str,
+    outcome: Optional[BudgetedRetrieval],
+) -> SearchPage:
+    end = start + limit
+    next_cursor = None
+    if token and end < len(rows):
+        next_cursor = pagination.encode_cursor(pagination.SEARCH, s=token, o=end)
+    return SearchPage(
+        results=[dict(row) for row in rows[start:end]],
+        next_cursor=next_cursor,
+        retrieval=outcome,
+        facets=outcome.facets if outcome is not None else None,
+    )
 
-__all__ = ["retrieve_with_rerank"]
 
+__all__ = [
+    "retrieve_with_rerank",
+    "retrieve_batch",
+    "retrieve_with_budget",
+    "search_page",
+    "cached_search_page",
+    "SearchPage",
+    "BudgetedRetrieval",
+    "DeadlineExceeded",
+    "PARTIAL_STAGES",
+    "embed_query",
+    "embed_queries",
+    "normalise_query_text",
+    "cache_stats",
+    "current_corpus_generation",
+    "reset_caches",
+]
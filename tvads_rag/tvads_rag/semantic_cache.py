@@ -0,0 +1,197 @@
+"""
+Semantic near-duplicate query cache.
+
+Keeps the embeddings of recent queries in a small in-memory matrix. When a new
+query's embedding is within a cosine-similarity threshold of a cached query
+issued with the same search parameters, the cached query's results are reused,
+skipping hybrid SQL and reranking for paraphrases such as
+"ads with celebrities driving EVs" vs "EV ads featuring celebrities".
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+@dataclass
+class SemanticCacheEntry:
+    """One cached query plus similarity stats for the lookups it served."""
+
+    query_text: str
+    context_key: str
+    results: List[Dict[str, Any]]
+    created_at: float
+    expires_at: Optional[float]
+    last_used: float
+    hits: int = 0
+    min_similarity: Optional[float] = None
+    max_similarity: Optional[float] = None
+    last_similarity: Optional[float] = None
+
+    def record_hit(self, similarity: float, now: float) -> None:
+        self.hits += 1
+        self.last_used = now
+        self.last_similarity = similarity
+        self.min_similarity = similarity if self.min_similarity is None else min(self.min_similarity, similarity)
+        self.max_similarity = similarity if self.max_similarity is None else max(self.max_similarity, similarity)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "query_text": self.query_text,
+            "hits": self.hits,
+            "min_similarity": self.min_similarity,
+            "max_similarity": self.max_similarity,
+            "last_similarity": self.last_similarity,
+            "age_seconds": round(time.monotonic() - self.created_at, 1),
+        }
+
+
+@dataclass
+class SemanticMatch:
+    """A cache hit: the reused results and how similar the cached query was."""
+
+    results: List[Dict[str, Any]]
+    similarity: float
+    matched_query: str
+
+
+@dataclass
+class _Counters:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    similarities: List[float] = field(default_factory=list)
+
+
+class SemanticQueryCache:
+    """
+    Fixed-capacity cosine-similarity cache over unit-normalised query vectors.
+
+    Lookups are one matrix-vector product over at most ``maxsize`` rows, so the
+    cost stays well under a millisecond for a few hundred 1536-d entries.
+    Entries only match queries with an identical ``context_key`` (search
+    parameters + corpus generation); the least recently used entry is replaced
+    when the cache is full.
+    """
+
+    def __init__(self, maxsize: int = 256, threshold: float = 0.95, ttl_seconds: Optional[float] = None):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive.")
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1].")
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Optional[SemanticCacheEntry]] = [None] * maxsize
+        self._counters = _Counters()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalise(embedding: Sequence[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if vector.ndim != 1 or norm == 0.0:
+            return None
+        return vector / norm
+
+    def lookup(self, embedding: Sequence[float], context_key: str) -> Optional[SemanticMatch]:
+        """Return cached results for the most similar query above the threshold."""
+        vector = self._normalise(embedding)
+        with self._lock:
+            if vector is None or self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                self._counters.misses += 1
+                return None
+            now = time.monotonic()
+            usable = np.array(
+                [
+                    entry is not None
+                    and entry.context_key == context_key
+                    and (entry.expires_at is None or entry.expires_at > now)
+                    for entry in self._entries
+                ]
+            )
+            if not usable.any():
+                self._counters.misses += 1
+                return None
+            similarities = self._vectors @ vector
+            similarities[~usable] = -1.0
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self._counters.misses += 1
+                return None
+            entry = self._entries[best]
+            assert entry is not None
+            entry.record_hit(similarity, now)
+            self._counters.hits += 1
+            self._counters.similarities.append(similarity)
+            del self._counters.similarities[:-1000]
+            return SemanticMatch(
+                results=[dict(row) for row in entry.results],
+                similarity=similarity,
+                matched_query=entry.query_text,
+            )
+
+    def add(
+        self,
+        query_text: str,
+        embedding: Sequence[float],
+        context_key: str,
+        results: Sequence[Dict[str, Any]],
+    ) -> None:
+        vector = self._normalise(embedding)
+        if vector is None:
+            return
+        now = time.monotonic()
+        entry = SemanticCacheEntry(
+            query_text=query_text,
+            context_key=context_key,
+            results=[dict(row) for row in results],
+            created_at=now,
+            expires_at=now + self.ttl_seconds if self.ttl_seconds else None,
+            last_used=now,
+        )
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                self._vectors = np.zeros((self.maxsize, vector.shape[0]), dtype=np.float32)
+                self._entries = [None] * self.maxsize
+            slot = self._free_slot(now)
+            self._vectors[slot] = vector
+            self._entries[slot] = entry
+
+    def _free_slot(self, now: float) -> int:
+        for idx, entry in enumerate(self._entries):
+            if entry is None or (entry.expires_at is not None and entry.expires_at <= now):
+                return idx
+        self._counters.evictions += 1
+        return min(range(self.maxsize), key=lambda idx: self._entries[idx].last_used)  # type: ignore[union-attr]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors = None
+            self._entries = [None] * self.maxsize
+
+    def stats(self, top_n: int = 10) -> Dict[str, Any]:
+        """Aggregate counters plus per-entry similarity stats for the busiest entries."""
+        with self._lock:
+            live = [entry for entry in self._entries if entry is not None]
+            sims = self._counters.similarities
+            busiest = sorted(live, key=lambda entry: entry.hits, reverse=True)[:top_n]
+            return {
+                "size": len(live),
+                "threshold": self.threshold,
+                "hits": self._counters.hits,
+                "misses": self._counters.misses,
+                "evictions": self._counters.evictions,
+                "mean_hit_similarity": round(float(np.mean(sims)), 4) if sims else None,
+                "entries": [entry.as_dict() for entry in busiest],
+            }
+
+
+__all__ = ["SemanticQueryCache", "SemanticMatch", "SemanticCacheEntry"]
@@ -0,0 +1,274 @@
+"""
+In-memory typeahead index behind ``/api/suggest``.
+
+Brand, product and category names (weighted by ad count) and popular search
+queries are stored in a sorted array of normalised keys. Each term is indexed
+under its full text and under each later word, so "cola" also finds
+"Coca-Cola". A lookup is a bisect to the first matching key followed by a
+short scan, so keystrokes never reach Postgres.
+
+The terms come from the ``suggestion_terms`` SQL function. The index is built
+at startup and rebuilt every SUGGEST_REBUILD_SECONDS. Between rebuilds,
+``refresh`` fetches only the terms of ads changed since the last watermark and
+recounts them; terms an ad no longer uses (renames, deletes) are only dropped by
+the next rebuild.
+Every update builds a new immutable ``PrefixIndex`` and swaps it in, so
+lookups never take a lock.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from . import db_backend
+from .config import SuggestConfig, get_suggest_config
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("brand", "product", "category", "query")
+# Word boundaries used for mid-term matches ("coca-cola" -> "cola")
+_WORD_SPLIT = re.compile(r"[\s\-/&+.,:;'\"()]+")
+# Keys per term: the full text plus suffixes starting at the next few words
+_MAX_WORD_KEYS = 4
+# Longest query remembered as a popular-query suggestion
+_MAX_QUERY_LENGTH = 80
+# One- and two-letter prefixes match thousands of keys; their results are memoised
+_SHORT_PREFIX = 2
+_SHORT_CACHE_SIZE = 4096
+
+
+def normalise(text: str) -> str:
+    """Collapse whitespace and case, matching how prefixes are looked up."""
+    return " ".join((text or "").split()).casefold()
+
+
+def _index_keys(text: str) -> Tuple[List[str], List[str]]:
+    """Return (full-text keys, mid-word keys) for one term."""
+    norm = normalise(text)
+    if not norm:
+        return [], []
+    words = [word for word in _WORD_SPLIT.split(norm) if word]
+    keys = [norm]
+    # Punctuation-free spelling counts as a full match ("coca cola" -> "Coca-Cola")
+    joined = " ".join(words)
+    if joined and joined != norm:
+        keys.append(joined)
+    full = len(keys)
+    for start in range(1, min(len(words), _MAX_WORD_KEYS + 1)):
+        keys.append(" ".join(words[start:]))
+    return keys[:full], keys[full:]
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    text: str
+    kind: str
+    weight: int
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"text": self.text, "kind": self.kind, "weight": self.weight}
+
+
+class PrefixIndex:
+    """
+    Immutable sorted-array prefix index.
+
+    ``_keys`` holds the sorted normalised keys. ``_refs`` is a parallel uint32
+    array of ``term_id << 1 | mid_word``, so the per-key overhead is one string
+    plus four bytes.
+    """
+
+    def __init__(self, terms: Iterable[Suggestion]):
+        self._terms: List[Suggestion] = list(terms)
+        pairs: List[Tuple[str, int]] = []
+        for term_id, term in enumerate(self._terms):
+            full_keys, word_keys = _index_keys(term.text)
+            pairs.extend((key, term_id << 1) for key in full_keys)
+            pairs.extend((key, term_id << 1 | 1) for key in word_keys)
+        pairs.sort()
+        self._keys: List[str] = [key for key, _ in pairs]
+        self._refs = array("I", (ref for _, ref in pairs))
+        # Safe to memoise: the index never changes after construction
+        self._short_cache: Dict[Tuple[str, int, Optional[Tuple[str, ...]]], List[Suggestion]] = {}
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def lookup(
+        self,
+        prefix: str,
+        limit: int = 10,
+        kinds: Optional[Sequence[str]] = None,
+        *,
+        scan_limit: int = 5000,
+    ) -> List[Suggestion]:
+        """
+        Up to ``limit`` terms with a key starting with ``prefix``.
+
+        Terms whose full text starts with the prefix rank before mid-word
+        matches, then by weight. Results are deduplicated by normalised text.
+        ``scan_limit`` bounds the work for one-letter prefixes.
+        """
+        key = normalise(prefix)
+        if not key or limit <= 0:
+            return []
+        if len(key) <= _SHORT_PREFIX:
+            memo_key = (key, limit, tuple(sorted(kinds)) if kinds else None)
+            cached = self._short_cache.get(memo_key)
+            if cached is None:
+                cached = self._scan(key, limit, kinds, scan_limit)
+                if len(self._short_cache) < _SHORT_CACHE_SIZE:
+                    self._short_cache[memo_key] = cached
+            return list(cached)
+        return self._scan(key, limit, kinds, scan_limit)
+
+    def _scan(
+        self, key: str, limit: int, kinds: Optional[Sequence[str]], scan_limit: int
+    ) -> List[Suggestion]:
+        wanted = set(kinds) if kinds else None
+        best: Dict[int, bool] = {}
+        start = bisect_left(self._keys, key)
+        for pos in range(start, min(len(self._keys), start + scan_limit)):
+            if not self._keys[pos].startswith(key):
+                break
+            term_id, mid_word = self._refs[pos] >> 1, bool(self._refs[pos] & 1)
+            if wanted is not None and self._terms[term_id].kind not in wanted:
+                continue
+            best[term_id] = best.get(term_id, True) and mid_word
+        ranked = heapq.nlargest(
+            limit * 2,
+            best.items(),
+            key=lambda item: (not item[1], self._terms[item[0]].weight, -len(self._terms[item[0]].text)),
+        )
+        results: List[Suggestion] = []
+        seen = set()
+        for term_id, _ in ranked:
+            term = self._terms[term_id]
+            norm = normalise(term.text)
+            if norm in seen:
+                continue
+            seen.add(norm)
+            results.append(term)
+            if len(results) >= limit:
+                break
+        return results
+
+
+class Suggester:
+    """Owns the term weights and popular-query counts behind the current ``PrefixIndex``."""
+
+    def __init__(
+        self,
+        config: Optional[SuggestConfig] = None,
+        fetch: Optional[Callable[[Optional[Any]], List[Mapping[str, Any]]]] = None,
+    ):
+        self._config = config or get_suggest_config()
+        self._fetch = fetch or db_backend.fetch_suggestion_terms
+        self._lock = threading.Lock()
+        self._terms: Dict[Tuple[str, str], int] = {}
+        self._queries: Counter = Counter()
+        self._query_text: Dict[str, str] = {}
+        self._watermark: Optional[Any] = None
+        self._built_at = 0.0
+        self._index = PrefixIndex(())
+        self.ready = False
+
+    def rebuild(self) -> int:
+        """Reload every term from the database. Returns the number of indexed terms."""
+        rows = self._fetch(None)
+        with self._lock:
+            self._terms = {}
+            self._watermark = None
+            self._apply(rows)
+            self._built_at = time.monotonic()
+            self._swap()
+        logger.info("Suggest index rebuilt: %d terms", len(self._index))
+        return len(self._index)
+
+    def refresh(self) -> int:
+        """
+        Apply terms of ads changed since the last watermark (a full rebuild
+        when SUGGEST_REBUILD_SECONDS have passed, which also drops deleted
+        terms). Returns the number of rows applied.
+        """
+        if not self.ready or time.monotonic() - self._built_at >= self._config.rebuild_seconds:
+            return self.rebuild()
+        rows = self._fetch(self._watermark)
+        with self._lock:
+            self._apply(rows)
+            self._swap()
+        return len(rows)
+
+    def record_query(self, query_text: str) -> None:
+        """Count a search that returned results; shown once seen SUGGEST_QUERY_MIN_COUNT times."""
+        norm = normalise(query_text)
+        if not norm or len(norm) > _MAX_QUERY_LENGTH:
+            return
+        with self._lock:
+            self._queries[norm] += 1
+            self._query_text.setdefault(norm, " ".join(query_text.split()))
+            # Bound memory: keep only the most frequent queries
+            if len(self._queries) > self._config.popular_queries * 4:
+                self._queries = Counter(dict(self._queries.most_common(self._config.popular_queries)))
+                self._query_text = {q: self._query_text[q] for q in self._queries}
+
+    def suggest(
+        self,
+        prefix: str,
+        limit: Optional[int] = None,
+        kinds: Optional[Sequence[str]] = None,
+    ) -> List[Suggestion]:
+        return self._index.lookup(prefix, limit or self._config.max_results, kinds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "terms": len(self._index),
+            "tracked_queries": len(self._queries),
+            "watermark": str(self._watermark) if self._watermark is not None else None,
+        }
+
+    def _apply(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        for row in rows:
+            # suggestion_terms only returns terms still in use, so a renamed or
+            # deleted term lingers until the next full rebuild
+            self._terms[(str(row["kind"]), str(row["term"]))] = int(row["weight"])
+            as_of = row.get("as_of")
+            if as_of is not None and (self._watermark is None or as_of > self._watermark):
+                self._watermark = as_of
+
+    def _swap(self) -> None:
+        cfg = self._config
+        terms = [Suggestion(text, kind, weight) for (kind, text), weight in self._terms.items()]
+        terms.extend(
+            Suggestion(self._query_text[norm], "query", count)
+            for norm, count in self._queries.most_common(cfg.popular_queries)
+            if count >= cfg.query_min_count
+        )
+        self._index = PrefixIndex(terms)
+        self.ready = True
+
+
+_suggester: Optional[Suggester] = None
+_suggester_lock = threading.Lock()
+
+
+def get_suggester() -> Suggester:
+    """Process-wide suggester (built lazily by the caller via ``rebuild``)."""
+    global _suggester
+    with _suggester_lock:
+        if _suggester is None:
+            _suggester = Suggester()
+        return _suggester
+
+
+__all__ = ["KINDS", "Suggestion", "PrefixIndex", "Suggester", "get_suggester", "normalise"]
@@ -11,10 +11,12 @@ the Supabase REST/RPC APIs are reachable.
 from __future__ import annotations
 
 import logging
+import time
 from functools import lru_cache
-from typing import Any, Iterable, Mapping, MutableSequence, Optional, Sequence
+from typing import Any, Dict, Iterable, List, Mapping, MutableSequence, Optional, Sequence, Tuple
 
-from .config import get_db_config
+from .circuit_breaker import get_breaker
+from .config import get_db_config, get_search_budget_config
 from .db import (
     AD_COLUMNS,
     SEGMENT_COLUMNS,
@@ -23,12 +25,22 @@ from .db import (
     SUPER_COLUMNS,
     STORYBOARD_COLUMNS,
     DEFAULT_HYBRID_ITEM_TYPES,
+    LEADERBOARD_COLUMNS,
+    RECENT_AD_COLUMNS,
+    _split_facets,
+    _vector_literal,
+    ad_detail_columns,
+    clean_transcript_phrase,
+    leaderboard_column,
+    normalise_search_filters,
 )
 
 logger = logging.getLogger(__name__)
 
 try:
-    from supabase import Client, create_client
+    import httpx
+    from postgrest.exceptions import APIError
+    from supabase import Client, ClientOptions, create_client
 except ImportError as exc:  # pragma: no cover - import error path
     raise RuntimeError(
         "Supabase HTTP backend requires the 'supabase' package. "
@@ -36,6 +48,16 @@ except ImportError as exc:  # pragma: no cover - import error path
     ) from exc
 
 
+def _credentials() -> Tuple[str, str]:
+    cfg = get_db_config()
+    if not cfg.supabase_url or not cfg.service_key:
+        raise RuntimeError(
+            "SUPABASE_URL and SUPABASE_SERVICE_KEY must be set when using the "
+            "HTTP DB backend (DB_BACKEND=http)."
+        )
+    return cfg.supabase_url, cfg.service_key
+
+
 @lru_cache(maxsize=1)
 def _get_client() -> Client:
     """
@@ -44,13 +66,63 @@ def _get_client() -> Client:
     Uses SUPABASE_URL + SUPABASE_SERVICE_KEY so we never depend on direct
     Postgres connectivity when DB_BACKEND=http.
     """
-    cfg = get_db_config()
-    if not cfg.supabase_url or not cfg.service_key:
-        raise RuntimeError(
-            "SUPABASE_URL and SUPABASE_SERVICE_KEY must be set when using the "
-            "HTTP DB backend (DB_BACKEND=http)."
-        )
-    return create_client(cfg.supabase_url, cfg.service_key)
+    return create_client(*_credentials())
+
+
+# Deadline-aware searches round their timeout up to this step, so a handful of
+# cached clients cover every remaining budget.
+_TIMEOUT_STEP_MS = 250
+
+
+@lru_cache(maxsize=16)
+def _get_timed_client(timeout_ms: int) -> Client:
+    """Client whose PostgREST HTTP timeout is ``timeout_ms``."""
+    return create_client(
+        *_credentials(), options=ClientOptions(postgrest_client_timeout=timeout_ms / 1000.0)
+    )
+
+
+def _search_client(timeout_ms: Optional[int]) -> Client:
+    if not timeout_ms or timeout_ms <= 0:
+        return _get_client()
+    steps = -(-int(timeout_ms) // _TIMEOUT_STEP_MS)
+    return _get_timed_client(steps * _TIMEOUT_STEP_MS)
+
+
+# SQLSTATE classes that mean the database itself is unwell: connection
+# exceptions, insufficient resources, operator intervention (including
+# statement timeouts), system and internal errors.
+_OUTAGE_SQLSTATE_CLASSES = ("08", "53", "57", "58", "XX")
+
+
+def _is_outage(exc: BaseException) -> bool:
+    """
+    Whether a Supabase error should count against the circuit breaker.
+
+    Request errors -- 4xx responses, constraint violations, bad input, unknown
+    columns -- come back as ``APIError`` and say nothing about availability.
+    """
+    if not isinstance(exc, APIError):
+        return True
+    code = str(exc.code or "")
+    if code.isdigit() and len(code) == 3:  # HTTP status when the body was not JSON
+        return int(code) >= 500 or code == "429"
+    if code.startswith("PGRST"):
+        return code.startswith("PGRST0")  # PGRST0xx: PostgREST cannot reach Postgres
+    return code[:2] in _OUTAGE_SQLSTATE_CLASSES
+
+
+def _execute(query: Any) -> Any:
+    """Execute a PostgREST/RPC request behind the ``supabase`` circuit breaker."""
+    return get_breaker("supabase", is_failure=_is_outage).call(query.execute)
+
+
+def _execute_search(query: Any) -> Any:
+    """``_execute`` for search RPCs; an HTTP timeout surfaces as ``TimeoutError``."""
+    try:
+        return _execute(query)
+    except httpx.TimeoutException as exc:
+        raise TimeoutError(f"Supabase search timed out: {exc}") from exc
 
 
 def ad_exists(*, external_id: Optional[str] = None, s3_key: Optional[str] = None) -> bool:
@@ -67,24 +139,22 @@ def ad_exists(*, external_id: Optional[str] = None, s3_key: Optional[str] = None
 
     # Check if ad exists by external_id
     if external_id:
-        resp = (
+        resp = _execute(
             client.table("ads")
             .select("id")
             .eq("external_id", external_id)
             .limit(1)
-            .execute()
         )
         if getattr(resp, "data", None) and len(resp.data) > 0:
             return True
     
     # Check by s3_key if external_id not found
     if s3_key:
-        resp = (
+        resp = _execute(
             client.table("ads")
             .select("id")
             .eq("s3_key", s3_key)
             .limit(1)
-            .execute()
         )
         if getattr(resp, "data", None) and len(resp.data) > 0:
             return True
@@ -97,7 +167,7 @@ def insert_ad(ad_data: Mapping[str, Any]) -> str:
     row = {column: ad_data.get(column) for column in AD_COLUMNS}
     client = _get_client()
     # Insert with returning clause to get the ID back
-    resp = client.table("ads").insert(row).execute()
+    resp = _execute(client.table("ads").insert(row))
     data = getattr(resp, "data", None) or []
     if not data:
         raise RuntimeError("Failed to insert ad via Supabase HTTP backend (no id returned).")
@@ -117,7 +187,7 @@ def update_processing_notes(ad_id: str, notes: dict) -> None:
     """
     client = _get_client()
     try:
-        resp = client.table("ads").update({"processing_notes": notes}).eq("id", ad_id).execute()
+        resp = _execute(client.table("ads").update({"processing_notes": notes}).eq("id", ad_id))
         data = getattr(resp, "data", None) or []
         if not data:
             logger.warning("Failed to update processing_notes for ad %s", ad_id)
@@ -141,7 +211,7 @@ def _insert_many(table: str, rows: Iterable[Sequence[Any]]) -> Sequence[str]:
         return []
     client = _get_client()
     # Insert with default returning (should include id)
-    resp = client.table(table).insert(rows_list).execute()
+    resp = _execute(client.table(table).insert(rows_list))
     data = getattr(resp, "data", None) or []
     return [row["id"] for row in data]
 
@@ -231,30 +301,474 @@ def insert_embedding_items(ad_id: str, items: Iterable[Mapping[str, Any]]) -> Se
 
 
 def hybrid_search(
-    query_embedding: Sequence[float],
+    query_embedding: Optional[Sequence[float]],
     query_text: str,
     limit: int = 50,
     item_types: Optional[Sequence[str]] = None,
+    filters: Optional[Mapping[str, Any]] = None,
+    timeout_ms: Optional[int] = None,
 ) -> Sequence[Mapping[str, Any]]:
     """
     Call the match_embedding_items_hybrid Postgres function via Supabase RPC.
+
+    ``filters`` are applied server-side inside both search legs; a ``None``
+    embedding runs the lexical leg only. ``timeout_ms`` bounds the HTTP request
+    (rounded up to 250 ms); it raises ``TimeoutError`` when exceeded. The
+    statement itself is not cancelled server-side over HTTP.
     """
     if limit <= 0:
         raise ValueError("limit must be positive for hybrid search.")
 
     search_types: MutableSequence[str] = list(item_types or DEFAULT_HYBRID_ITEM_TYPES)
-    client = _get_client()
+    client = _search_client(timeout_ms)
     payload = {
-        "query_embedding": list(query_embedding),
+        "query_embedding": list(query_embedding) if query_embedding is not None else None,
         "query_text": query_text,
         "limit_count": int(limit),
         "item_types": search_types,
+        "filters": normalise_search_filters(filters),
+        "lexical_limit": get_search_budget_config().lexical_limit,
     }
-    resp = client.rpc("match_embedding_items_hybrid", payload).execute()
+    resp = _execute_search(client.rpc("match_embedding_items_hybrid", payload))
     data = getattr(resp, "data", None) or []
     return data
 
 
+def hybrid_search_faceted(
+    query_embedding: Optional[Sequence[float]],
+    query_text: str,
+    limit: int = 50,
+    item_types: Optional[Sequence[str]] = None,
+    filters: Optional[Mapping[str, Any]] = None,
+    timeout_ms: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Hybrid search plus facet counts in one RPC (match_embedding_items_hybrid_faceted)."""
+    if limit <= 0:
+        raise ValueError("limit must be positive for hybrid search.")
+    client = _search_client(timeout_ms)
+    payload = {
+        "query_embedding": list(query_embedding) if query_embedding is not None else None,
+        "query_text": query_text,
+        "limit_count": int(limit),
+        "item_types": list(item_types or DEFAULT_HYBRID_ITEM_TYPES),
+        "filters": normalise_search_filters(filters),
+        "lexical_limit": get_search_budget_config().lexical_limit,
+    }
+    resp = _execute_search(client.rpc("match_embedding_items_hybrid_faceted", payload))
+    return _split_facets(getattr(resp, "data", None) or [])
+
+
+def hybrid_search_batch(
+    query_embeddings: Sequence[Optional[Sequence[float]]],
+    query_texts: Sequence[str],
+    limit: int = 50,
+    item_types: Optional[Sequence[str]] = None,
+    filters: Optional[Mapping[str, Any]] = None,
+    timeout_ms: Optional[int] = None,
+    page_size: int = 1000,
+) -> List[List[Mapping[str, Any]]]:
+    """
+    Batch hybrid search via match_embedding_items_hybrid_batch.
+
+    PostgREST caps every response at ``page_size`` rows (its max-rows), so the
+    queries are sent in chunks of ``page_size // limit`` per RPC. ``timeout_ms``
+    bounds the whole batch; each chunk gets the time still left.
+    """
+    if limit <= 0:
+        raise ValueError("limit must be positive for hybrid search.")
+    if len(query_embeddings) != len(query_texts):
+        raise ValueError("query_embeddings and query_texts must have the same length.")
+    grouped: List[List[Mapping[str, Any]]] = [[] for _ in query_texts]
+    if not query_texts:
+        return grouped
+    deadline = time.monotonic() + timeout_ms / 1000.0 if timeout_ms else None
+    per_call = max(1, page_size // int(limit))
+    for start in range(0, len(query_texts), per_call):
+        remaining_ms = None
+        if deadline is not None:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                raise TimeoutError("Supabase batch search ran out of time.")
+        chunk = slice(start, start + per_call)
+        payload = {
+            # text[] over HTTP; the function casts each literal to vector
+            "query_embeddings": [
+                _vector_literal(vec) if vec is not None else None for vec in query_embeddings[chunk]
+            ],
+            "query_texts": list(query_texts[chunk]),
+            "limit_count": int(limit),
+            "item_types": list(item_types or DEFAULT_HYBRID_ITEM_TYPES),
+            "filters": normalise_search_filters(filters),
+            "lexical_limit": get_search_budget_config().lexical_limit,
+        }
+        client = _search_client(remaining_ms)
+        resp = _execute_search(client.rpc("match_embedding_items_hybrid_batch", payload))
+        for row in getattr(resp, "data", None) or []:
+            row = dict(row)
+            grouped[start + int(row.pop("query_index"))].append(row)
+    return grouped
+
+
+def get_corpus_generation() -> int:
+    """Return the corpus generation counter via HTTP."""
+    client = _get_client()
+    resp = _execute(client.table("corpus_state").select("generation").eq("id", 1).limit(1))
+    data = getattr(resp, "data", None) or []
+    return int(data[0]["generation"]) if data else 0
+
+
+def bump_corpus_generation() -> int:
+    """Advance the corpus generation via the bump_corpus_generation RPC."""
+    client = _get_client()
+    resp = _execute(client.rpc("bump_corpus_generation", {}))
+    data = getattr(resp, "data", None)
+    return int(data) if data is not None else 0
+
+
+def get_ad_by_external_id(
+    external_id: str, *, include: Optional[Iterable[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """Fetch one ad with an explicit column projection via HTTP."""
+    client = _get_client()
+    columns = ",".join(ad_detail_columns(include))
+    resp = _execute(client.table("ads").select(columns).eq("external_id", external_id).limit(1))
+    data = getattr(resp, "data", None) or []
+    return data[0] if data else None
+
+
+def get_ad_version(external_id: str) -> Optional[str]:
+    """``updated_at`` of one ad via HTTP, or None if it does not exist."""
+    client = _get_client()
+    resp = _execute(client.table("ads").select("updated_at").eq("external_id", external_id).limit(1))
+    data = getattr(resp, "data", None) or []
+    return data[0].get("updated_at") if data else None
+
+
+def _quoted(value: Any) -> str:
+    """
+    Double-quote a value for a PostgREST ``or``/``and`` filter, so commas,
+    parentheses and dots in it cannot change the filter's structure.
+    """
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def list_recent(
+    limit: int = 20,
+    offset: int = 0,
+    *,
+    after: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """Most recently indexed ads via HTTP (keyset when ``after`` is given)."""
+    if limit <= 0 or offset < 0:
+        raise ValueError("limit must be positive and offset non-negative.")
+    client = _get_client()
+    query = (
+        client.table("ads")
+        .select(",".join(RECENT_AD_COLUMNS))
+        .order("created_at", desc=True)
+        .order("id", desc=True)
+    )
+    if after is not None:
+        created_at, ad_id = (_quoted(value) for value in after)
+        query = query.or_(
+            f"created_at.lt.{created_at},and(created_at.eq.{created_at},id.lt.{ad_id})"
+        ).limit(limit)
+    else:
+        query = query.range(offset, offset + limit - 1)
+    resp = _execute(query)
+    return getattr(resp, "data", None) or []
+
+
+def list_brand_counts(
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    page_size: int = 1000,
+) -> List[Dict[str, Any]]:
+    """Brand directory rows ``{brand_name, ad_count}`` from the brands table via HTTP."""
+    if limit is not None and limit <= 0:
+        raise ValueError("limit must be positive.")
+    client = _get_client()
+    brands: List[Dict[str, Any]] = []
+    while limit is None or len(brands) < limit:
+        want = page_size if limit is None else min(page_size, limit - len(brands))
+        query = client.table("brands").select("brand_name,ad_count").order("brand_name")
+        if after is not None:
+            query = query.gt("brand_name", after)
+        rows = getattr(_execute(query.limit(want)), "data", None) or []
+        brands.extend(rows)
+        if len(rows) < want:
+            break
+        after = rows[-1]["brand_name"]
+    return brands
+
+
+def list_brands(limit: Optional[int] = None, after: Optional[str] = None) -> List[str]:
+    """Brand names from the trigger-maintained brands table via HTTP."""
+    return [row["brand_name"] for row in list_brand_counts(limit, after)]
+
+
+def list_sitemap_shards(shard_size: int = 5000) -> List[Dict[str, Any]]:
+    """Sitemap shard summary via the sitemap_shards RPC."""
+    if shard_size <= 0:
+        raise ValueError("shard_size must be positive.")
+    client = _get_client()
+    resp = _execute(client.rpc("sitemap_shards", {"shard_size": int(shard_size)}))
+    return getattr(resp, "data", None) or []
+
+
+def list_sitemap_page(start: str, limit: int, page_size: int = 1000) -> List[Dict[str, Any]]:
+    """``{external_id, updated_at}`` rows from ``start`` (inclusive) via HTTP, keyset-paged."""
+    if limit <= 0:
+        raise ValueError("limit must be positive.")
+    client = _get_client()
+    rows: List[Dict[str, Any]] = []
+    while len(rows) < limit:
+        want = min(page_size, limit - len(rows))
+        query = client.table("ads").select("external_id,updated_at").order("external_id")
+        # First request includes start; later ones resume after the last row
+        query = query.gt("external_id", rows[-1]["external_id"]) if rows else query.gte("external_id", start)
+        page = getattr(_execute(query.limit(want)), "data", None) or []
+        rows.extend(page)
+        if len(page) < want:
+            break
+    return rows
+
+
+def _ilike_exact(value: str) -> str:
+    """Escape LIKE wildcards so ``ilike`` acts as a case-insensitive equality."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def impact_leaderboard(
+    metric: str = "overall_impact",
+    limit: int = 50,
+    *,
+    category: Optional[str] = None,
+    brand: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    min_score: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Top ads by one promoted score via HTTP (same filters as the Postgres backend)."""
+    if limit <= 0:
+        raise ValueError("limit must be positive.")
+    column = leaderboard_column(metric)
+    client = _get_client()
+    query = (
+        client.table("ads")
+        .select(f"{','.join(LEADERBOARD_COLUMNS)},score:{column}")
+        .not_.is_(column, "null")
+    )
+    if category is not None:
+        query = query.ilike("product_category", _ilike_exact(category))
+    if brand is not None:
+        query = query.ilike("brand_name", _ilike_exact(brand))
+    if year_from is not None:
+        query = query.gte("year", int(year_from))
+    if year_to is not None:
+        query = query.lte("year", int(year_to))
+    if min_score is not None:
+        query = query.gte(column, float(min_score))
+    resp = _execute(query.order(column, desc=True).order("id").limit(int(limit)))
+    return getattr(resp, "data", None) or []
+
+
+def stats() -> Dict[str, int]:
+    """Public archive counters from archive_stats via HTTP."""
+    client = _get_client()
+    resp = _execute(client.table("archive_stats").select("total_ads,total_brands").eq("id", 1).limit(1))
+    data = getattr(resp, "data", None) or []
+    if not data:
+        return {"total_ads": 0, "total_brands": 0}
+    return {"total_ads": int(data[0]["total_ads"]), "total_brands": int(data[0]["total_brands"])}
+
+
+def update_asset_urls(urls: Mapping[str, Sequence[Optional[str]]]) -> int:
+    """Write ``external_id -> (video_url, image_url)`` onto matching ads via HTTP (one request per ad)."""
+    client = _get_client()
+    updated = 0
+    for external_id, (video_url, image_url) in urls.items():
+        values = {key: value for key, value in (("video_url", video_url), ("image_url", image_url)) if value}
+        if not values:
+            continue
+        resp = _execute(client.table("ads").update(values).eq("external_id", external_id))
+        updated += len(getattr(resp, "data", None) or [])
+    return updated
+
+
+def fetch_ad_centroids(
+    ad_ids: Optional[Sequence[str]] = None, page_size: int = 500
+) -> List[Dict[str, Any]]:
+    """Per-ad embedding centroids via the ad_centroids RPC (paged)."""
+    client = _get_client()
+    payload = {"ad_ids": [str(ad_id) for ad_id in ad_ids] if ad_ids is not None else None}
+    rows: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        resp = _execute(client.rpc("ad_centroids", payload).range(offset, offset + page_size - 1))
+        page = getattr(resp, "data", None) or []
+        rows.extend({"ad_id": row["ad_id"], "centroid": row["centroid"]} for row in page)
+        if len(page) < page_size:
+            return rows
+        offset += page_size
+
+
+def refresh_ad_centroids(ad_ids: Optional[Sequence[str]] = None) -> int:
+    """Recompute stored centroids via the refresh_ad_centroids RPC (all ads when None)."""
+    client = _get_client()
+    payload = {"p_ad_ids": [str(ad_id) for ad_id in ad_ids] if ad_ids is not None else None}
+    resp = _execute(client.rpc("refresh_ad_centroids", payload))
+    return int(getattr(resp, "data", None) or 0)
+
+
+def fetch_stored_centroids() -> List[Dict[str, Any]]:
+    """Every stored ad centroid from ad_embedding_centroids via HTTP (paged)."""
+    client = _get_client()
+    rows = _fetch_all(
+        lambda: client.table("ad_embedding_centroids").select("ad_id,centroid").order("ad_id"),
+        page_size=500,
+    )
+    return [{"ad_id": row["ad_id"], "centroid": row["centroid"]} for row in rows]
+
+
+def get_neighbor_referrers(ad_ids: Sequence[str]) -> List[str]:
+    """Ads whose stored neighbour list includes any of ``ad_ids`` (ad_neighbor_referrers RPC)."""
+    if not ad_ids:
+        return []
+    client = _get_client()
+    rows = _fetch_all(
+        lambda: client.rpc("ad_neighbor_referrers", {"p_ad_ids": [str(ad_id) for ad_id in ad_ids]})
+    )
+    return [row["ad_id"] for row in rows]
+
+
+def get_neighbor_floors() -> Dict[str, Dict[str, Any]]:
+    """Per-ad lowest stored neighbour similarity via the ad_neighbor_floors RPC (paged)."""
+    client = _get_client()
+    return {
+        row["ad_id"]: {
+            "min_similarity": float(row["min_similarity"]),
+            "neighbor_count": int(row["neighbor_count"]),
+        }
+        for row in _fetch_all(lambda: client.rpc("ad_neighbor_floors", {}))
+    }
+
+
+def replace_ad_neighbors(neighbors: Mapping[str, Sequence[Sequence[Any]]]) -> int:
+    """Replace stored neighbour lists via HTTP (delete + bulk insert; not atomic)."""
+    if not neighbors:
+        return 0
+    client = _get_client()
+    rows = [
+        {
+            "ad_id": ad_id,
+            "neighbor_ad_id": neighbor_id,
+            "rank": rank,
+            "similarity": float(similarity),
+        }
+        for ad_id, ranked in neighbors.items()
+        for rank, (neighbor_id, similarity) in enumerate(ranked, start=1)
+    ]
+    _execute(client.table("ad_neighbors").delete().in_("ad_id", [str(ad_id) for ad_id in neighbors]))
+    if rows:
+        _execute(client.table("ad_neighbors").insert(rows))
+    return len(rows)
+
+
+def get_similar_ads(external_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Precomputed nearest ads via the similar_ads RPC."""
+    if limit <= 0:
+        raise ValueError("limit must be positive.")
+    client = _get_client()
+    resp = _execute(client.rpc("similar_ads", {"p_external_id": external_id, "p_limit": int(limit)}))
+    return getattr(resp, "data", None) or []
+
+
+def fetch_suggestion_terms(since: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Typeahead terms via the suggestion_terms RPC (only changed terms when
+    ``since`` is set), paged in (kind, term) order past PostgREST's max-rows.
+    """
+    client = _get_client()
+    return _fetch_all(
+        lambda: client.rpc("suggestion_terms", {"p_since": since}).order("kind").order("term")
+    )
+
+
+def _fetch_all(query_factory, page_size: int = 1000) -> List[Dict[str, Any]]:
+    """Read every row of a PostgREST query (in a stable order) in ``page_size`` ranges."""
+    rows: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        page = getattr(_execute(query_factory().range(offset, offset + page_size - 1)), "data", None) or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        offset += page_size
+
+
+def fetch_emotional_timelines(missing_only: bool = True) -> List[Dict[str, Any]]:
+    """``{id, duration_seconds, timeline}`` for ads with an emotional timeline via HTTP."""
+    client = _get_client()
+
+    def query():
+        q = (
+            client.table("ads")
+            .select("id,duration_seconds,timeline:emotional_metrics->emotional_timeline")
+            .not_.is_("emotional_metrics->emotional_timeline", "null")
+        )
+        if missing_only:
+            q = q.is_("emotional_arc", "null")
+        return q.order("id")
+
+    return [
+        {
+            "id": row["id"],
+            "duration_seconds": float(row["duration_seconds"]) if row.get("duration_seconds") is not None else None,
+            "timeline": row.get("timeline"),
+        }
+        for row in _fetch_all(query)
+    ]
+
+
+def update_emotional_arcs(arcs: Mapping[str, Optional[Sequence[float]]]) -> int:
+    """Write ``ad_id -> emotional_arc`` via HTTP (one request per ad)."""
+    client = _get_client()
+    updated = 0
+    for ad_id, arc in arcs.items():
+        value = list(arc) if arc is not None else None
+        resp = _execute(client.table("ads").update({"emotional_arc": value}).eq("id", str(ad_id)))
+        updated += len(getattr(resp, "data", None) or [])
+    return updated
+
+
+def fetch_emotional_arcs() -> List[Dict[str, Any]]:
+    """Every stored arc with the columns the similar-arc results show, via HTTP."""
+    client = _get_client()
+    return _fetch_all(
+        lambda: client.table("ads")
+        .select("id,external_id,brand_name,product_name,one_line_summary,emotional_arc")
+        .not_.is_("emotional_arc", "null")
+        .not_.is_("external_id", "null")
+        .order("id")
+    )
+
+
+def search_transcript_phrase(phrase: str, limit: int = 20, *, exact_only: bool = False) -> List[Dict[str, Any]]:
+    """Spoken lines containing ``phrase`` via the search_transcript_phrase RPC."""
+    if limit <= 0:
+        raise ValueError("limit must be positive.")
+    client = _get_client()
+    resp = _execute(
+        client.rpc(
+            "search_transcript_phrase",
+            {"p_phrase": clean_transcript_phrase(phrase), "p_limit": int(limit), "p_exact_only": bool(exact_only)},
+        )
+    )
+    return getattr(resp, "data", None) or []
+
+
 __all__ = [
     "ad_exists",
     "insert_ad",
@@ -265,6 +779,32 @@ __all__ = [
     "insert_storyboards",
     "insert_embedding_items",
     "hybrid_search",
+    "hybrid_search_batch",
+    "hybrid_search_faceted",
+    "get_corpus_generation",
+    "bump_corpus_generation",
+    "get_ad_by_external_id",
+    "get_ad_version",
+    "list_recent",
+    "list_brands",
+    "list_brand_counts",
+    "list_sitemap_shards",
+    "list_sitemap_page",
+    "impact_leaderboard",
+    "stats",
+    "update_asset_urls",
+    "fetch_ad_centroids",
+    "refresh_ad_centroids",
+    "fetch_stored_centroids",
+    "get_neighbor_referrers",
+    "get_neighbor_floors",
+    "replace_ad_neighbors",
+    "get_similar_ads",
+    "fetch_suggestion_terms",
+    "fetch_emotional_timelines",
+    "update_emotional_arcs",
+    "fetch_emotional_arcs",
+    "search_transcript_phrase",
     "find_incomplete_ads",
     "delete_ad",
 ]
@@ -290,10 +830,10 @@ def find_incomplete_ads(
     """
     client = _get_client()
     
-    # Get all ads with their key fields
-    resp = client.table("ads").select(
-        "id, external_id, s3_key, extraction_version, impact_scores"
-    ).order("created_at", desc=True).limit(limit).execute()
+    # Child counts come from the trigger-maintained counter columns
+    resp = _execute(client.table("ads").select(
+        "id, external_id, s3_key, extraction_version, impact_scores, storyboard_count, embedding_count"
+    ).order("created_at", desc=True).limit(limit))
     
     ads = getattr(resp, "data", None) or []
     incomplete = []
@@ -315,22 +855,12 @@ def find_incomplete_ads(
                 missing.append("impact_scores")
         
         # Check storyboard
-        if check_storyboard:
-            story_resp = client.table("ad_storyboards").select(
-                "id", count="exact"
-            ).eq("ad_id", ad_id).limit(1).execute()
-            has_storyboard = bool(getattr(story_resp, "data", None) and len(story_resp.data) > 0)
-            if not has_storyboard:
-                missing.append("storyboard")
+        if check_storyboard and not ad.get("storyboard_count"):
+            missing.append("storyboard")
         
         # Check embeddings
-        if check_embeddings:
-            emb_resp = client.table("embedding_items").select(
-                "id", count="exact"
-            ).eq("ad_id", ad_id).limit(1).execute()
-            has_embeddings = bool(getattr(emb_resp, "data", None) and len(emb_resp.data) > 0)
-            if not has_embeddings:
-                missing.append("embeddings")
+        if check_embeddings and not ad.get("embedding_count"):
+            missing.append("embeddings")
         
         if missing:
             incomplete.append({
@@ -370,13 +900,14 @@ def delete_ad(ad_id: str) -> bool:
     
     for table in child_tables:
         try:
-            client.table(table).delete().eq("ad_id", ad_id).execute()
+            _execute(client.table(table).delete().eq("ad_id", ad_id))
         except Exception as e:
             logger.warning("Failed to delete from %s: %s", table, e)
     
     # Delete the ad itself
     try:
-        client.table("ads").delete().eq("id", ad_id).execute()
+        # trg_ads_bump_generation_on_delete invalidates cached results
+        _execute(client.table("ads").delete().eq("id", ad_id))
         logger.info("Deleted ad %s and all child records", ad_id)
         return True
     except Exception as e:
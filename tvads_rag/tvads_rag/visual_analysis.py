@@ -20,6 +20,7 @@ except ImportError:  # pragma: no cover - optional dependency
     genai = None  # type: ignore
     types = None  # type: ignore
 
+from .circuit_breaker import protected
 from .config import get_vision_config, is_vision_enabled, resolve_vision_model, VisionConfig
 
 logger = logging.getLogger(__name__)
@@ -275,6 +276,12 @@ def analyse_frames_to_storyboard(
     return []
 
 
+@protected("gemini")
+def generate_gemini_content(client, model_name: str, contents):
+    """Call Gemini generate_content behind the shared ``gemini`` circuit breaker."""
+    return client.models.generate_content(model=model_name, contents=contents)
+
+
 def _analyse_with_gemini(
     samples: Sequence[FrameSample], 
     cfg: VisionConfig, 
@@ -304,10 +311,7 @@ def _analyse_with_gemini(
                 types.Part.from_bytes(data=fh.read(), mime_type="image/jpeg")
             )
 
-    response = client.models.generate_content(
-        model=model_name,
-        contents=content_parts,
-    )
+    response = generate_gemini_content(client, model_name, content_parts)
     
     # Check for blocked/filtered responses
     if hasattr(response, "candidates") and response.candidates:
@@ -483,5 +487,6 @@ __all__ = [
     "sample_frames_for_storyboard",
     "cleanup_frame_samples",
     "analyse_frames_to_storyboard",
+    "generate_gemini_content",
 ]
 